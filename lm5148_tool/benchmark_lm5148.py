@@ -0,0 +1,477 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from lm5148_tool.lm5148_core import DesignInputs, run_design, run_design_batch
+
+
+TOOL_DIR = Path(__file__).resolve().parent
+REPO_ROOT = TOOL_DIR.parent
+
+PAYLOAD_FIXTURE = TOOL_DIR / "lm5148_design.json"
+EQUATION_IMAGES_FIXTURE = TOOL_DIR / "lm5148_equations_images_v3"
+QUICKSTART_TEMPLATE = REPO_ROOT / "training" / "LM5148_LM25148_quickstart_calculator_A4.xlsm"
+BASELINE_DEFAULT = TOOL_DIR / "benchmark_baseline.json"
+
+# Relative slowdown of the median (vs. baseline) that counts as a regression.
+THRESHOLD_DEFAULT = 0.25
+
+# Cold-import budget for modules that batch workers and the Streamlit app load at startup.
+IMPORT_BUDGET_MS_DEFAULT = 150.0
+IMPORT_BUDGET_MODULES = [
+    "lm5148_tool.lm5148_core",
+    "lm5148_tool.lm5148_design_tool",
+    "lm5148_tool.export_results_xlsx",
+]
+# Exporter-only dependencies that must not be pulled in by a plain import (numpy comes in with
+# the batch/image helpers, which the design tool imports only when exporting).
+HEAVY_MODULES = ("fitz", "pymupdf", "xlsxwriter", "openpyxl", "docx", "win32com", "numpy")
+
+BATCH_SIZE = 1_000
+SYNTHETIC_PDF_PAGES = 12
+EQUATION_NUMBERS = [31, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 43, 44, 45]
+
+
+@dataclass(frozen=True)
+class BenchCase:
+    name: str
+    description: str
+    # setup(work_dir) -> state; run(state) is the timed body.
+    setup: Callable[[Path], Any]
+    run: Callable[[Any], Any]
+    # Timed calls per sample; cheap cases loop so one sample is well above timer resolution.
+    inner_loops: int = 1
+
+
+@dataclass(frozen=True)
+class BenchResult:
+    name: str
+    samples_s: list[float]
+
+    @property
+    def median_s(self) -> float:
+        return statistics.median(self.samples_s)
+
+    @property
+    def min_s(self) -> float:
+        return min(self.samples_s)
+
+
+def _load_payload() -> dict:
+    return json.loads(PAYLOAD_FIXTURE.read_text(encoding="utf-8"))
+
+
+def _batch_inputs(n: int) -> list[DesignInputs]:
+    # Spread fsw/ripple so the batch is not n copies of one design.
+    base = DesignInputs()
+    return [
+        replace(base, fsw_hz=300e3 + (i % 50) * 40e3, ripple_frac=0.2 + (i % 7) * 0.03)
+        for i in range(n)
+    ]
+
+
+def write_synthetic_pdf(pdf_path: Path, pages: int = SYNTHETIC_PDF_PAGES) -> Path:
+    """Write a datasheet-like PDF: prose paragraphs plus numbered equation lines.
+
+    Equation numbers (31)-(45) are spread over the pages so both the label search in
+    `extract_equation_images` and the block classifier in `export_lm5148_equations_to_excel`
+    have realistic work to do.
+    """
+
+    import fitz  # PyMuPDF
+
+    prose = (
+        "The inductor is chosen so the ripple current stays near 30 percent of the rated output "
+        "current over the input voltage range. Lower ripple reduces output voltage ripple but "
+        "slows the transient response of the converter."
+    )
+    equations = [
+        "L = Vout*(Vin - Vout)/(Vin*Fsw*dIL)",
+        "IL(pk) = Iout + dIL/2",
+        "Rs = Vcs/(1.25*IL(pk))",
+        "Cout = L*Iout^2/((Vout+dV)^2 - Vout^2)",
+        "Icin(rms) = Iout*sqrt(D*(1-D))",
+        "Fsw(kHz) = 10^6/(45*Rt + 53)",
+    ]
+
+    pdf_path.parent.mkdir(parents=True, exist_ok=True)
+    doc = fitz.open()
+    try:
+        eq_iter = iter(EQUATION_NUMBERS)
+        for pno in range(pages):
+            page = doc.new_page()
+            y = 72.0
+            for block in range(6):
+                page.insert_textbox(fitz.Rect(72, y, 540, y + 60), prose, fontsize=9)
+                y += 70
+                eq_num = next(eq_iter, None)
+                text = equations[(pno + block) % len(equations)]
+                label = f"({eq_num})" if eq_num is not None else ""
+                page.insert_text((90, y), text, fontsize=10)
+                if label:
+                    page.insert_text((500, y), label, fontsize=10)
+                y += 40
+        doc.save(pdf_path.as_posix())
+    finally:
+        doc.close()
+    return pdf_path
+
+
+def _setup_none(_work_dir: Path) -> None:
+    return None
+
+
+def _setup_batch(_work_dir: Path) -> list[DesignInputs]:
+    return _batch_inputs(BATCH_SIZE)
+
+
+def _setup_batch_columns(_work_dir: Path) -> dict:
+    from lm5148_tool.lm5148_batch import inputs_to_columns
+
+    return inputs_to_columns(_batch_inputs(BATCH_SIZE))
+
+
+def _run_batch_columns(cols: dict) -> dict:
+    from lm5148_tool.lm5148_batch import run_design_columns
+
+    return run_design_columns(cols)
+
+
+def _run_jacobian_columns(cols: dict):
+    from lm5148_tool.lm5148_jacobian import jacobian_columns
+
+    return jacobian_columns(cols)
+
+
+def _setup_results_xlsx(_work_dir: Path) -> dict:
+    payload = _load_payload()
+    return {"inputs": payload["inputs"], "results": payload["results"]}
+
+
+def _run_results_xlsx(state: dict) -> bytes:
+    from lm5148_tool.export_results_xlsx import build_results_xlsx_bytes
+
+    return build_results_xlsx_bytes(inputs=state["inputs"], results=state["results"])
+
+
+def _setup_export_to_excel(work_dir: Path) -> dict:
+    inp = DesignInputs()
+    images = {}
+    for path in sorted(EQUATION_IMAGES_FIXTURE.glob("eq_*_p*.png")):
+        images[int(path.name.split("_")[1])] = path
+    return {"inp": inp, "res": run_design(inp), "images": images, "out": work_dir / "export.xlsx"}
+
+
+def _run_export_to_excel(state: dict) -> None:
+    from lm5148_tool.lm5148_design_tool import export_to_excel
+
+    export_to_excel(state["inp"], state["res"], state["out"], state["images"])
+
+
+def _setup_fill_quickstart(work_dir: Path) -> dict:
+    return {"payload": _load_payload(), "out": work_dir / "quickstart_filled.xlsm"}
+
+
+def _run_fill_quickstart(state: dict) -> None:
+    from lm5148_tool.populate_quickstart_calculator import fill_quickstart
+
+    fill_quickstart(QUICKSTART_TEMPLATE, state["payload"], state["out"])
+
+
+def _setup_synthetic_pdf(work_dir: Path) -> dict:
+    pdf_path = write_synthetic_pdf(work_dir / "synthetic_datasheet.pdf")
+    return {"pdf": pdf_path, "images_dir": work_dir / "eq_images"}
+
+
+def _run_extract_equation_images(state: dict) -> None:
+    from lm5148_tool.lm5148_design_tool import extract_equation_images
+
+    extract_equation_images(
+        state["pdf"],
+        state["images_dir"],
+        equation_numbers=EQUATION_NUMBERS,
+        pages_1based=(1, SYNTHETIC_PDF_PAGES),
+    )
+
+
+def _run_extract_equations(state: dict) -> None:
+    from lm5148_tool.export_lm5148_equations_to_excel import extract_equations
+
+    extract_equations(state["pdf"], state["images_dir"], zoom=3.0, min_len=6, require_equals=True)
+
+
+CASES: list[BenchCase] = [
+    BenchCase(
+        "run_design_scalar",
+        "run_design() on the default inputs",
+        _setup_none,
+        lambda _state: run_design(DesignInputs()),
+        inner_loops=1_000,
+    ),
+    BenchCase(
+        "run_design_batch",
+        f"run_design_batch() over {BATCH_SIZE} designs",
+        _setup_batch,
+        run_design_batch,
+    ),
+    BenchCase(
+        "run_design_columns",
+        f"Vectorized run_design_columns() over {BATCH_SIZE} designs",
+        _setup_batch_columns,
+        _run_batch_columns,
+        inner_loops=20,
+    ),
+    BenchCase(
+        "jacobian_columns",
+        f"Analytic Jacobian of every result w.r.t. every input over {BATCH_SIZE} designs",
+        _setup_batch_columns,
+        _run_jacobian_columns,
+        inner_loops=5,
+    ),
+    BenchCase(
+        "build_results_xlsx_bytes",
+        "Standalone results .xlsx from lm5148_design.json",
+        _setup_results_xlsx,
+        _run_results_xlsx,
+        inner_loops=5,
+    ),
+    BenchCase(
+        "export_to_excel",
+        "Inputs/Results/Equations workbook with the bundled equation images",
+        _setup_export_to_excel,
+        _run_export_to_excel,
+    ),
+    BenchCase(
+        "fill_quickstart",
+        "openpyxl fill of the bundled TI quickstart template",
+        _setup_fill_quickstart,
+        _run_fill_quickstart,
+    ),
+    BenchCase(
+        "extract_equation_images",
+        f"Equation label search + render on a {SYNTHETIC_PDF_PAGES}-page synthetic PDF",
+        _setup_synthetic_pdf,
+        _run_extract_equation_images,
+    ),
+    BenchCase(
+        "extract_equations",
+        f"Block classification + crops on a {SYNTHETIC_PDF_PAGES}-page synthetic PDF",
+        _setup_synthetic_pdf,
+        _run_extract_equations,
+    ),
+]
+
+
+def run_case(case: BenchCase, *, repeat: int, warmup: int, work_dir: Path) -> BenchResult:
+    case_dir = work_dir / case.name
+    case_dir.mkdir(parents=True, exist_ok=True)
+    state = case.setup(case_dir)
+
+    for _ in range(warmup):
+        case.run(state)
+
+    samples: list[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(case.inner_loops):
+            case.run(state)
+        samples.append((time.perf_counter() - t0) / case.inner_loops)
+    return BenchResult(case.name, samples)
+
+
+def run_benchmarks(
+    names: Optional[list[str]] = None,
+    *,
+    repeat: int = 5,
+    warmup: int = 1,
+) -> list[BenchResult]:
+    cases = CASES
+    if names:
+        known = {c.name for c in CASES}
+        unknown = [n for n in names if n not in known]
+        if unknown:
+            raise ValueError(f"Unknown benchmark(s): {', '.join(unknown)}")
+        cases = [c for c in CASES if c.name in names]
+
+    with tempfile.TemporaryDirectory(prefix="lm5148_bench_") as td:
+        return [run_case(c, repeat=repeat, warmup=warmup, work_dir=Path(td)) for c in cases]
+
+
+def measure_import(module: str, *, repeat: int = 3) -> dict:
+    """Cold-import `module` in fresh interpreters; report the best wall time and any heavy modules loaded."""
+
+    probe = (
+        "import json, sys, time\n"
+        "t0 = time.perf_counter()\n"
+        f"import {module}\n"
+        "dt = time.perf_counter() - t0\n"
+        f"print(json.dumps({{'seconds': dt, 'heavy': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    best = float("inf")
+    heavy: list[str] = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", probe],
+            cwd=str(REPO_ROOT),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        data = json.loads(out.stdout.strip().splitlines()[-1])
+        best = min(best, data["seconds"])
+        heavy = data["heavy"]
+    return {"module": module, "seconds": best, "heavy": heavy}
+
+
+def check_import_budget(budget_ms: float = IMPORT_BUDGET_MS_DEFAULT) -> list[dict]:
+    rows = []
+    for module in IMPORT_BUDGET_MODULES:
+        row = measure_import(module)
+        row["ok"] = row["seconds"] * 1e3 <= budget_ms and not row["heavy"]
+        rows.append(row)
+    return rows
+
+
+def results_to_json(results: list[BenchResult]) -> dict:
+    return {
+        "meta": {
+            "createdAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "cases": {
+            r.name: {"median_s": r.median_s, "min_s": r.min_s, "samples_s": r.samples_s} for r in results
+        },
+    }
+
+
+def compare_to_baseline(results: list[BenchResult], baseline: dict, threshold: float) -> list[dict]:
+    """Return one row per case; `regressed` is set when the median slowed down by more than `threshold`."""
+
+    rows = []
+    base_cases = baseline.get("cases", {})
+    for r in results:
+        base = base_cases.get(r.name)
+        if base is None:
+            rows.append({"name": r.name, "median_s": r.median_s, "baseline_s": None, "ratio": None, "regressed": False})
+            continue
+        ratio = r.median_s / base["median_s"] if base["median_s"] > 0 else float("inf")
+        rows.append(
+            {
+                "name": r.name,
+                "median_s": r.median_s,
+                "baseline_s": base["median_s"],
+                "ratio": ratio,
+                "regressed": ratio > 1.0 + threshold,
+            }
+        )
+    return rows
+
+
+def _fmt_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:9.1f} µs"
+    if seconds < 1.0:
+        return f"{seconds * 1e3:9.2f} ms"
+    return f"{seconds:9.3f} s "
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the LM5148 design engine, exporters and PDF equation pipeline (offline)."
+    )
+    parser.add_argument("--only", action="append", default=[], help="Run only this case (repeatable)")
+    parser.add_argument("--list", action="store_true", help="List benchmark cases and exit")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed samples per case")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed warm-up runs per case")
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        default=str(BASELINE_DEFAULT),
+        help="Baseline JSON to compare against (and to write with --save-baseline)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD_DEFAULT,
+        help="Allowed relative slowdown of the median before a case is flagged (0.25 = 25%%)",
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--json-out", type=str, default="", help="Optional path for the raw results JSON")
+    parser.add_argument(
+        "--check-imports",
+        action="store_true",
+        help="Only check cold-import time of the core modules against --import-budget-ms",
+    )
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS_DEFAULT)
+
+    args = parser.parse_args()
+
+    if args.list:
+        for c in CASES:
+            print(f"{c.name:26s} {c.description}")
+        return 0
+
+    if args.check_imports:
+        failed = 0
+        for row in check_import_budget(args.import_budget_ms):
+            status = "ok" if row["ok"] else "OVER BUDGET"
+            extra = f"  loads {', '.join(row['heavy'])}" if row["heavy"] else ""
+            print(f"{row['module']:36s} {row['seconds'] * 1e3:7.1f} ms  {status}{extra}")
+            failed += int(not row["ok"])
+        return 1 if failed else 0
+
+    if not QUICKSTART_TEMPLATE.exists():
+        raise SystemExit(f"Template not found: {QUICKSTART_TEMPLATE}")
+
+    results = run_benchmarks(args.only, repeat=args.repeat, warmup=args.warmup)
+    data = results_to_json(results)
+
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        if baseline_path.exists() and args.only:
+            # Merge partial runs so `--only` does not drop other cases from the baseline.
+            merged = json.loads(baseline_path.read_text(encoding="utf-8"))
+            merged.setdefault("cases", {}).update(data["cases"])
+            merged["meta"] = data["meta"]
+            data = merged
+        baseline_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+    baseline = {}
+    if baseline_path.exists() and not args.save_baseline:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+
+    rows = compare_to_baseline(results, baseline, args.threshold)
+    regressions = 0
+    for row in rows:
+        line = f"{row['name']:26s} {_fmt_time(row['median_s'])}"
+        if row["baseline_s"] is not None:
+            flag = "REGRESSION" if row["regressed"] else "ok"
+            line += f"   baseline {_fmt_time(row['baseline_s'])}   x{row['ratio']:.2f}  {flag}"
+            regressions += int(row["regressed"])
+        print(line)
+
+    if args.save_baseline:
+        print(f"Wrote baseline: {baseline_path}")
+    if regressions:
+        print(f"{regressions} case(s) slower than baseline by more than {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
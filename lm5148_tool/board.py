@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from lm5148_tool.lm5148_batch import RESULT_FIELDS, inputs_to_columns, run_design_columns
+from lm5148_tool.lm5148_core import DesignInputs, design_inputs_from_webapp
+
+
+# Bus keys shared by every rail (webapp names); they override per-rail values.
+BUS_KEYS = ("vinMin", "vinNom", "vinMax", "vinRippleSpec")
+
+EFFICIENCY_DEFAULT = 0.90
+# Two rails whose switching frequencies (or low harmonics) land closer than this beat in-band.
+COLLISION_MARGIN_HZ_DEFAULT = 20_000.0
+COLLISION_HARMONICS = 3
+
+CACHE_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Rail:
+    name: str
+    inputs: DesignInputs
+
+
+@dataclass(frozen=True)
+class FswCollision:
+    rail_a: str
+    rail_b: str
+    harmonic_a: int
+    harmonic_b: int
+    # |n*fsw_a - m*fsw_b|
+    beat_hz: float
+
+
+@dataclass
+class BoardReport:
+    rails: list[Rail]
+    results: list[dict[str, float]]
+    # Per-rail input-capacitor RMS at its own duty (Eq.39 at D = Vout/Vin nom) and DC input current.
+    cin_rms_a: list[float]
+    iin_dc_a: list[float]
+    bus_iin_dc_a: float
+    # Unsynchronized rails add in RSS; rails on a common SYNC edge stack their pulses (worst case).
+    bus_cin_rms_rss_a: float
+    bus_cin_rms_in_phase_a: float
+    total_cin_required_f: float
+    total_cout_f: float
+    collisions: list[FswCollision]
+    recomputed: list[str] = field(default_factory=list)
+
+
+def rail_key(inp: DesignInputs) -> str:
+    """Stable key of a rail's inputs (for the recompute cache)."""
+
+    return hashlib.sha1(json.dumps(asdict(inp), sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_board(path: Path) -> tuple[list[Rail], dict[str, Any]]:
+    """Board JSON: `{"bus": {...}, "defaults": {...}, "rails": [{"name": ..., "vout": ..., ...}]}`.
+
+    Rails use the lm5148_design.json input keys; `defaults` apply to every rail and `bus`
+    (VIN range, input ripple spec) overrides them, since all rails share the input bus.
+    """
+
+    board = json.loads(path.read_text(encoding="utf-8"))
+    bus = {k: v for k, v in (board.get("bus") or {}).items() if k in BUS_KEYS}
+    defaults = board.get("defaults") or {}
+    rails = []
+    for i, raw in enumerate(board.get("rails") or []):
+        name = str(raw.get("name") or f"rail{i + 1}")
+        try:
+            inp = design_inputs_from_webapp({**defaults, **{k: v for k, v in raw.items() if k != "name"}, **bus})
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Rail {name!r}: {e}") from None
+        rails.append(Rail(name, inp))
+    names = [r.name for r in rails]
+    if len(set(names)) != len(names):
+        raise ValueError("Rail names must be unique")
+    options = {
+        "efficiency": float(board.get("efficiency", EFFICIENCY_DEFAULT)),
+        "collision_margin_hz": float(board.get("collisionMarginHz", COLLISION_MARGIN_HZ_DEFAULT)),
+    }
+    return rails, options
+
+
+def find_collisions(
+    names: list[str], fsw_hz: np.ndarray, *, margin_hz: float, harmonics: int = COLLISION_HARMONICS
+) -> list[FswCollision]:
+    """Rail pairs whose switching harmonics (up to `harmonics`) are closer than `margin_hz`."""
+
+    n = np.arange(1, harmonics + 1)
+    h = fsw_hz[:, None] * n[None, :]  # (rails, harmonics)
+    # |n*fa - m*fb| for every rail pair and harmonic pair in one broadcast.
+    beat = np.abs(h[:, None, :, None] - h[None, :, None, :])
+    out = []
+    for a, b, ha, hb in zip(*np.nonzero(beat < margin_hz)):
+        # Each unordered pair once; the fundamental pair (or lowest harmonics) first.
+        if a < b:
+            out.append(FswCollision(names[a], names[b], int(n[ha]), int(n[hb]), float(beat[a, b, ha, hb])))
+    out.sort(key=lambda c: (c.rail_a, c.rail_b, c.harmonic_a + c.harmonic_b))
+    return out
+
+
+class BoardEvaluator:
+    """Evaluates a rail list in one batched call, re-running only rails whose inputs changed.
+
+    The cache maps `rail_key(inputs)` to result dicts; it can be loaded from and saved to a
+    JSON file so repeated CLI runs (or Streamlit reruns) skip unchanged rails.
+    """
+
+    def __init__(self, cache: Optional[dict[str, dict[str, float]]] = None) -> None:
+        self.cache: dict[str, dict[str, float]] = cache if cache is not None else {}
+
+    @classmethod
+    def load(cls, path: Path) -> "BoardEvaluator":
+        if path.exists():
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("version") == CACHE_VERSION:
+                return cls(data.get("entries") or {})
+        return cls()
+
+    def save(self, path: Path, keep: Optional[set[str]] = None) -> None:
+        entries = {k: v for k, v in self.cache.items() if keep is None or k in keep}
+        data = {"version": CACHE_VERSION, "entries": entries}
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data, allow_nan=True), encoding="utf-8")
+        tmp.replace(path)
+
+    def evaluate(
+        self,
+        rails: list[Rail],
+        *,
+        efficiency: float = EFFICIENCY_DEFAULT,
+        collision_margin_hz: float = COLLISION_MARGIN_HZ_DEFAULT,
+    ) -> BoardReport:
+        keys = [rail_key(r.inputs) for r in rails]
+        stale = [i for i, k in enumerate(keys) if k not in self.cache]
+        if stale:
+            res = run_design_columns(inputs_to_columns([rails[i].inputs for i in stale]))
+            for row, i in enumerate(stale):
+                self.cache[keys[i]] = {name: float(res[name][row]) for name in RESULT_FIELDS}
+        results = [self.cache[k] for k in keys]
+
+        vin_nom = np.array([r.inputs.vin_nom_v for r in rails])
+        vout = np.array([r.inputs.vout_v for r in rails])
+        iout = np.array([r.inputs.iout_a for r in rails])
+        duty = np.clip(vout / vin_nom, 0.0, 0.95)
+        cin_rms = iout * np.sqrt(duty * (1.0 - duty))
+        iin_dc = vout * iout / (vin_nom * efficiency)
+
+        return BoardReport(
+            rails=rails,
+            results=results,
+            cin_rms_a=cin_rms.tolist(),
+            iin_dc_a=iin_dc.tolist(),
+            bus_iin_dc_a=float(iin_dc.sum()),
+            bus_cin_rms_rss_a=float(np.sqrt(np.sum(cin_rms**2))),
+            bus_cin_rms_in_phase_a=_in_phase_rms(iout, duty),
+            total_cin_required_f=float(sum(r["cin_required_f"] for r in results)),
+            total_cout_f=float(sum(r["cout_load_off_f"] for r in results)),
+            collisions=find_collisions(
+                [r.name for r in rails], np.array([r.inputs.fsw_hz for r in rails]), margin_hz=collision_margin_hz
+            ),
+            recomputed=[rails[i].name for i in stale],
+        )
+
+
+def _in_phase_rms(iout: np.ndarray, duty: np.ndarray) -> float:
+    """Input-capacitor RMS when every rail turns on at the same edge (common SYNC, no interleaving)."""
+
+    # Sum of pulses Iout_k over [0, D_k T): evaluate the piecewise-constant current on the sorted duty edges.
+    order = np.argsort(duty)
+    d = duty[order]
+    i = iout[order]
+    # Between consecutive edges the on-rails are those with D_k greater than the segment start.
+    edges = np.concatenate([[0.0], d])
+    level = np.cumsum(i[::-1])[::-1]  # current while rails k.. are still on
+    widths = np.diff(edges)
+    mean = float(np.sum(level * widths))
+    mean_sq = float(np.sum(level**2 * widths))
+    return math.sqrt(max(mean_sq - mean * mean, 0.0))
+
+
+def report_to_dict(report: BoardReport) -> dict[str, Any]:
+    def clean(v: float) -> Optional[float]:
+        return v if math.isfinite(v) else None
+
+    return {
+        "bus": {
+            "iinDcA": report.bus_iin_dc_a,
+            "cinRmsRssA": report.bus_cin_rms_rss_a,
+            "cinRmsInPhaseA": report.bus_cin_rms_in_phase_a,
+            "totalCinRequiredF": clean(report.total_cin_required_f),
+            "totalCoutF": clean(report.total_cout_f),
+        },
+        "rails": [
+            {
+                "name": rail.name,
+                "inputs": asdict(rail.inputs),
+                "results": {k: clean(v) for k, v in res.items()},
+                "cinRmsA": rms,
+                "iinDcA": iin,
+            }
+            for rail, res, rms, iin in zip(report.rails, report.results, report.cin_rms_a, report.iin_dc_a)
+        ],
+        "collisions": [asdict(c) for c in report.collisions],
+        "recomputed": report.recomputed,
+    }
+
+
+def format_report(report: BoardReport) -> str:
+    lines = [
+        f"{len(report.rails)} rail(s), {len(report.recomputed)} recomputed",
+        f"Bus DC input current      {report.bus_iin_dc_a:10.4g} A",
+        f"Bus Cin RMS (unsync, RSS) {report.bus_cin_rms_rss_a:10.4g} A",
+        f"Bus Cin RMS (in phase)    {report.bus_cin_rms_in_phase_a:10.4g} A",
+        f"Total Cin required        {report.total_cin_required_f:10.4g} F",
+        f"Total Cout (Eq36)         {report.total_cout_f:10.4g} F",
+    ]
+    esr_limited = [rail.name for rail, res in zip(report.rails, report.results) if math.isinf(res["cin_required_f"])]
+    if esr_limited:
+        lines.append(f"Cin required infinite (ESR ripple alone exceeds spec): {', '.join(esr_limited)}")
+    if report.collisions:
+        lines.append("Switching-frequency collisions:")
+        for c in report.collisions:
+            lines.append(f"  {c.rail_a} (x{c.harmonic_a}) vs {c.rail_b} (x{c.harmonic_b}): beat {c.beat_hz / 1e3:.1f} kHz")
+    else:
+        lines.append("No switching-frequency collisions")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Board mode: evaluate every LM5148 rail on a shared input bus at once.")
+    parser.add_argument("--board", type=str, required=True, help="Board JSON (bus, defaults, rails)")
+    parser.add_argument("--xlsx", type=str, default="", help="Combined workbook output")
+    parser.add_argument("--out", type=str, default="", help="JSON report output")
+    parser.add_argument(
+        "--cache", type=str, default="", help="Rail results cache (default: <board>.cache.json; 'none' disables)"
+    )
+    args = parser.parse_args()
+
+    board_path = Path(args.board)
+    rails, options = load_board(board_path)
+    cache_path = None if args.cache == "none" else Path(args.cache or board_path.with_suffix(".cache.json"))
+    evaluator = BoardEvaluator.load(cache_path) if cache_path else BoardEvaluator()
+
+    report = evaluator.evaluate(rails, **options)
+    print(format_report(report))
+
+    if cache_path:
+        evaluator.save(cache_path, keep={rail_key(r.inputs) for r in rails})
+    if args.out:
+        Path(args.out).write_text(json.dumps(report_to_dict(report), indent=2), encoding="utf-8")
+    if args.xlsx:
+        from lm5148_tool.export_results_xlsx import build_board_xlsx_bytes
+
+        Path(args.xlsx).write_bytes(build_board_xlsx_bytes(report))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass, field
+from typing import Mapping, Sequence
+
+import numpy as np
+
+from lm5148_tool.lm5148_batch import (
+    INPUT_FIELDS,
+    RECORD_DTYPES,
+    RESULT_FIELDS,
+    STAGE_OF_RESULT,
+    STAGES,
+    Stage,
+    complete_columns,
+    run_design_records,
+)
+from lm5148_tool.results_db import Constraint, parse_constraint
+
+
+# Rejection rate assumed for a constraint before any row has been checked against it.
+PRIOR_REJECT_RATE = 0.5
+_STAGE_BY_NAME = {st.name: st for st in STAGES}
+
+
+def constraint_label(c: Constraint) -> str:
+    return f"{c.column}{c.op}{c.value:g}"
+
+
+def constraint_mask(values: np.ndarray, c: Constraint) -> np.ndarray:
+    """Rows that satisfy `c` (NaN never does)."""
+
+    with np.errstate(invalid="ignore"):
+        if c.op == "<":
+            return values < c.value
+        if c.op == "<=":
+            return values <= c.value
+        if c.op == ">":
+            return values > c.value
+        if c.op == ">=":
+            return values >= c.value
+        close = np.isclose(values, c.value)
+        return close if c.op == "=" else ~close & ~np.isnan(values)
+
+
+def _stages_for(column: str) -> list[Stage]:
+    """Stages (dependencies first) needed to compute `column`; none for an input."""
+
+    if column in INPUT_FIELDS:
+        return []
+    order: list[Stage] = []
+
+    def visit(st: Stage) -> None:
+        for dep in st.needs:
+            visit(_STAGE_BY_NAME[dep])
+        if st not in order:
+            order.append(st)
+
+    visit(STAGE_OF_RESULT[column])
+    return order
+
+
+@dataclass
+class ConstraintStats:
+    constraint: str
+    checked: int = 0  # rows still alive when this constraint was evaluated
+    rejected: int = 0  # rows this constraint dropped (each row counts for its first failing check)
+    seconds: float = 0.0  # stages computed for it plus the check itself
+
+    @property
+    def reject_rate(self) -> float:
+        return self.rejected / self.checked if self.checked else PRIOR_REJECT_RATE
+
+
+@dataclass
+class ConstrainedEvaluator:
+    """Evaluate batches under `constraints`, cheapest-and-most-selective check first.
+
+    Before each check the evaluator picks the pending constraint with the lowest
+    (cost of the stages it still needs) / (rejection rate seen so far), computes only those
+    stages on the rows that are still alive, and drops the rows it rejects. Only the
+    survivors get the remaining stages. Rejection rates carry over between batches, so the
+    order settles after the first chunk of a sweep.
+    """
+
+    constraints: Sequence[Constraint]
+    stats: dict[str, ConstraintStats] = field(default_factory=dict)
+    rows_in: int = 0
+    rows_out: int = 0
+
+    def __post_init__(self) -> None:
+        unknown = {c.column for c in self.constraints} - set(INPUT_FIELDS) - set(RESULT_FIELDS)
+        if unknown:
+            raise KeyError(f"Unknown column(s): {', '.join(sorted(unknown))}")
+        for c in self.constraints:
+            self.stats.setdefault(constraint_label(c), ConstraintStats(constraint_label(c)))
+
+    def _next(self, pending: list[Constraint], done: set[str]) -> Constraint:
+        def score(c: Constraint) -> float:
+            cost = sum(st.cost for st in _stages_for(c.column) if st.name not in done)
+            return (cost + 1.0) / max(self.stats[constraint_label(c)].reject_rate, 1e-3)
+
+        return min(pending, key=score)
+
+    def evaluate(self, cols: Mapping[str, object], *, precision: str = "float64") -> tuple[np.ndarray, np.ndarray]:
+        """Records (`RECORD_DTYPES[precision]`) of the rows passing every constraint, and their row indices in `cols`."""
+
+        v: dict[str, np.ndarray] = {name: a.reshape(-1) for name, a in complete_columns(cols).items()}
+        rows = np.arange(len(v["vout_v"]))
+        self.rows_in += len(rows)
+        done: set[str] = set()
+        pending = list(self.constraints)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            while pending and len(rows):
+                c = self._next(pending, done)
+                pending.remove(c)
+                t0 = time.perf_counter()
+                for st in _stages_for(c.column):
+                    if st.name not in done:
+                        v.update(st.fn(v))
+                        done.add(st.name)
+                keep = constraint_mask(v[c.column], c)
+                stats = self.stats[constraint_label(c)]
+                stats.checked += len(rows)
+                stats.rejected += int(len(rows) - np.count_nonzero(keep))
+                if not keep.all():
+                    rows = rows[keep]
+                    v = {name: np.broadcast_to(a, keep.shape)[keep] for name, a in v.items()}
+                stats.seconds += time.perf_counter() - t0
+
+            if precision != "float64":
+                # Survivors go through the regular path so the float32 fallback applies.
+                records = run_design_records({name: v[name] for name in INPUT_FIELDS}, precision=precision)
+            else:
+                for st in STAGES:
+                    if st.name not in done:
+                        v.update(st.fn(v))
+                records = np.empty(len(rows), dtype=RECORD_DTYPES[precision])
+                for name in INPUT_FIELDS + RESULT_FIELDS:
+                    records[name] = v[name]
+        self.rows_out += len(rows)
+        return records, rows
+
+
+def format_constraint_stats(ev: ConstrainedEvaluator) -> str:
+    lines = [f"{'constraint':32s} {'checked':>12s} {'rejected':>12s} {'rate':>7s} {'seconds':>8s}"]
+    for s in sorted(ev.stats.values(), key=lambda s: -s.checked):
+        rate = f"{s.rejected / s.checked:7.1%}" if s.checked else f"{'-':>7s}"
+        lines.append(f"{s.constraint:32s} {s.checked:12,d} {s.rejected:12,d} {rate} {s.seconds:8.3f}")
+    lines.append(f"{ev.rows_out:,} of {ev.rows_in:,} design(s) pass every constraint")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    from lm5148_tool.lm5148_sweep import CHUNK_ROWS_DEFAULT, SweepSpec, parse_grid, point_columns
+
+    parser = argparse.ArgumentParser(description="Count the sweep points passing constraints, with per-constraint rejection stats.")
+    parser.add_argument("--grid", action="append", default=[], help="Swept input, as in lm5148_sweep")
+    parser.add_argument("--set", action="append", default=[], help="Fixed input override, e.g. vout_v=3.3")
+    parser.add_argument("--require", action="append", default=[], help="Constraint, e.g. 'rsense_ohm>=2m' (repeatable)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS_DEFAULT)
+    parser.add_argument("--compare", action="store_true", help="Also time the unconstrained evaluation of every point")
+    args = parser.parse_args()
+
+    fixed = {}
+    for item in args.set:
+        name, _, value = item.partition("=")
+        fixed[name.strip()] = float(value)
+    spec = SweepSpec(grids=dict(parse_grid(g) for g in args.grid), fixed=fixed)
+    ev = ConstrainedEvaluator([parse_constraint(c) for c in args.require])
+
+    t0 = time.perf_counter()
+    for lo in range(0, spec.n_points, args.chunk_rows):
+        ev.evaluate(point_columns(spec, lo, min(lo + args.chunk_rows, spec.n_points)))
+    dt = time.perf_counter() - t0
+    print(format_constraint_stats(ev))
+    print(f"Constrained evaluation: {dt:.3f} s")
+    if args.compare:
+        t0 = time.perf_counter()
+        for lo in range(0, spec.n_points, args.chunk_rows):
+            run_design_records(point_columns(spec, lo, min(lo + args.chunk_rows, spec.n_points)))
+        print(f"Full evaluation:        {time.perf_counter() - t0:.3f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
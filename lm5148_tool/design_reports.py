@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import math
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, Optional
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from lm5148_tool.export_lm5148_equations_to_word import build_equations, omml_xml
+from lm5148_tool.lm5148_batch import INPUT_FIELDS, RESULT_FIELDS, inputs_to_columns, run_design_columns
+from lm5148_tool.lm5148_core import DesignInputs, design_inputs_from_webapp
+
+
+# A template paragraph whose whole text is this marker is replaced by the report body;
+# without one, the body goes at the end of the template's document.
+BODY_MARKER = "{{report}}"
+# Also replaced in the template text (heading, header line, ...) by the design name.
+NAME_MARKER = "{{design}}"
+DOCUMENT_PART = "word/document.xml"
+
+# Each datasheet equation with this design's numbers substituted (names are inputs, results
+# or the extras from `_values`).
+SUBSTITUTIONS: dict[str, str] = {
+    "31": "L = {vout_v}*({vin_nom_v} - {vout_v})/({vin_nom_v}*{fsw_hz}*{delta_il_nom_a}) = {l_required_h}",
+    "32": "IL(pk) = {iout_a} + ({vout_v}*({vin_max_v} - {vout_v})/({vin_max_v}*{l_used}*{fsw_hz}))/2 = {il_peak_vin_max_a}",
+    "33": "RO(sc) = {vout_v}*{rsense_ohm}/({l_used}*{fsw_hz}) = {ro_sc}",
+    "34": "Rs = {vcs_th_v}/({il_pk_margin}*{il_peak_vin_max_a}) = {rsense_ohm}",
+    "35": "IL_pk(sc) = ({vcs_th_v}/{rsense_ohm}) + {vin_max_v}*{t_delay_isns_s}/{l_used} = {il_peak_short_a}",
+    "36": "Cout = {l_used}*{iout_a}^2/( ({vout_v}+{vout_overshoot_v})^2 - {vout_v}^2 ) = {cout_load_off_f}",
+    "37": "ΔVout_pp ≈ sqrt( ({delta_il_nom_a}/(8*{fsw_hz}*{cout_load_off_f}))^2 + ({delta_il_nom_a}*{rout_esr_ohm})^2 ) = {vout_ripple_pp_v}",
+    "38": "Ico(rms) = {delta_il_nom_a}/sqrt(12) = {ioutcap_rms_a}",
+    "39": "Icin(rms) = {iout_a}*sqrt(0.5*(1-0.5)) = {cin_rms_a}",
+    "40": "Cin = {iout_a}*0.5*(1-0.5)/({fsw_hz}*sqrt({vin_ripple_pp_v}^2 - ({cin_rms_a}*{rin_esr_ohm})^2)) = {cin_required_f}",
+    "41": "Rt(kΩ) = (10^6/{fsw_khz} - 53)/45 → Rt = {rt_ohm}",
+    "42": "Rtop = {rfb_bottom_ohm}*({vout_v}/{vref_v} - 1) = {rfb_top_ohm}",
+    "43": "RCOMP = {rcomp_ohm} (input)",
+    "44": "CCOMP = 10/(2*π*{f_c_hz}*{rcomp_ohm}) = {ccomp_f}",
+    "45": "CHF = 1/(2*π*{f_esr_zero_hz}*{rcomp_ohm}) - {cbw_f} = {chf_f}",
+}
+
+_UNITS = {"_v": "V", "_a": "A", "_hz": "Hz", "_h": "H", "_f": "F", "_ohm": "Ω", "_s": "s"}
+_PREFIXES = [(1e9, "G"), (1e6, "M"), (1e3, "k"), (1.0, ""), (1e-3, "m"), (1e-6, "µ"), (1e-9, "n"), (1e-12, "p")]
+_PARAGRAPH_RE = re.compile(r"<w:p[ >].*?</w:p>", re.S)
+_TEXT_RE = re.compile(r"<w:t(?: [^>]*)?>([^<]*)</w:t>")
+_FILENAME_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def _unit(name: str) -> str:
+    for suffix, unit in _UNITS.items():
+        if name.endswith(suffix):
+            return unit
+    return ""
+
+
+def format_si(value: float, unit: str = "") -> str:
+    """`4.7 µH`, `12 V`, `315.1m`; non-finite values as `∞` / `n/a`."""
+
+    if not math.isfinite(value):
+        return "n/a" if math.isnan(value) else ("-∞" if value < 0 else "∞")
+    if value == 0.0:
+        return f"0 {unit}".rstrip()
+    scale, prefix = next(((s, p) for s, p in _PREFIXES if abs(value) >= s * 0.9995), _PREFIXES[-1])
+    text = f"{value / scale:.4g}"
+    return f"{text} {prefix}{unit}".rstrip() if unit else f"{text}{prefix}"
+
+
+@dataclass(frozen=True)
+class ReportDesign:
+    """One report: a display name and the design's inputs and results as plain floats (cheap to pickle)."""
+
+    name: str
+    values: dict[str, float]
+
+
+def _values(row: dict[str, float]) -> dict[str, str]:
+    v = dict(row)
+    v["l_used"] = v["l_required_h"] if math.isnan(v["l_used_h"]) else v["l_used_h"]
+    v["ro_sc"] = v["vout_v"] * v["rsense_ohm"] / (v["l_used"] * v["fsw_hz"])
+    v["fsw_khz"] = v["fsw_hz"] / 1e3
+    # L used is not a result; give it the inductance unit by hand.
+    return {k: format_si(x, "H" if k == "l_used" else _unit(k)) for k, x in v.items()}
+
+
+def report_designs(designs: list[tuple[str, DesignInputs]]) -> list[ReportDesign]:
+    """Evaluate every design in one vectorised `run_design_columns` call."""
+
+    if not designs:
+        return []
+    cols = inputs_to_columns([inp for _, inp in designs])
+    res = run_design_columns(cols)
+    table = np.column_stack([cols[n] for n in INPUT_FIELDS] + [res[n] for n in RESULT_FIELDS]).tolist()
+    names = INPUT_FIELDS + RESULT_FIELDS
+    return [ReportDesign(name, dict(zip(names, row))) for (name, _), row in zip(designs, table)]
+
+
+# --- cached document pieces -------------------------------------------------------------------
+
+
+@lru_cache(maxsize=1)
+def equation_blocks() -> tuple[tuple[str, str], ...]:
+    """(number, heading + symbolic equation XML) per datasheet equation, built once per process."""
+
+    return tuple(
+        (item["num"], _heading(f"Equation ({item['num']}): {item['title']}", 2) + f"<w:p>{omml_xml(item['eq'])}</w:p>")
+        for item in build_equations()
+    )
+
+
+@dataclass(frozen=True)
+class _Template:
+    base_zip: bytes  # every part except word/document.xml, already compressed
+    head: str  # document.xml up to where the report body goes
+    tail: str
+
+
+@lru_cache(maxsize=4)
+def _load_template(path: Optional[str]) -> _Template:
+    if path is None:
+        from docx import Document
+
+        buf = io.BytesIO()
+        Document().save(buf)
+        data = buf.getvalue()
+    else:
+        data = Path(path).read_bytes()
+
+    base = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(data)) as src, zipfile.ZipFile(base, "w", zipfile.ZIP_DEFLATED) as dst:
+        document = src.read(DOCUMENT_PART).decode("utf-8")
+        for info in src.infolist():
+            if info.filename != DOCUMENT_PART:
+                dst.writestr(info.filename, src.read(info))
+
+    for m in _PARAGRAPH_RE.finditer(document):
+        if "".join(_TEXT_RE.findall(m.group(0))).strip() == BODY_MARKER:
+            return _Template(base.getvalue(), document[: m.start()], document[m.end() :])
+    # No marker: before the final section properties, i.e. at the end of the body.
+    cut = document.rfind("<w:sectPr")
+    if cut < 0:
+        cut = document.rfind("</w:body>")
+    return _Template(base.getvalue(), document[:cut], document[cut:])
+
+
+# --- document XML -----------------------------------------------------------------------------
+
+
+def _heading(text: str, level: int) -> str:
+    return f'<w:p><w:pPr><w:pStyle w:val="Heading{level}"/></w:pPr><w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+
+def _inputs_table(d: ReportDesign, values: dict[str, str]) -> str:
+    def cell(text: str) -> str:
+        return f'<w:tc><w:p><w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p></w:tc>'
+
+    rows = "".join(f"<w:tr>{cell(name)}{cell(values[name])}</w:tr>" for name in INPUT_FIELDS if not math.isnan(d.values[name]))
+    return (
+        '<w:tbl><w:tblPr><w:tblStyle w:val="TableGrid"/><w:tblW w:w="0" w:type="auto"/></w:tblPr>'
+        f"<w:tblGrid><w:gridCol/><w:gridCol/></w:tblGrid>{rows}</w:tbl>"
+    )
+
+
+def report_body(d: ReportDesign) -> str:
+    """Body XML of one design's report: inputs table, then each cached equation followed by its substituted form."""
+
+    values = _values(d.values)
+    parts = [_heading(d.name, 1), _heading("Inputs", 2), _inputs_table(d, values)]
+    for num, block in equation_blocks():
+        parts.append(block)
+        if num in SUBSTITUTIONS:
+            parts.append(f"<w:p>{omml_xml(SUBSTITUTIONS[num].format_map(values))}</w:p>")
+    return "".join(parts)
+
+
+_PAGE_BREAK = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+
+def docx_bytes(body: str, *, template: Optional[Path] = None, name: str = "") -> bytes:
+    """A .docx from `template` (python-docx's default when None) with `body` spliced into its document."""
+
+    tpl = _load_template(str(template) if template else None)
+    document = tpl.head + body + tpl.tail
+    if NAME_MARKER in document:
+        document = document.replace(NAME_MARKER, escape(name))
+    buf = io.BytesIO(tpl.base_zip)
+    # Appending leaves the already-compressed template parts untouched; only document.xml is deflated.
+    with zipfile.ZipFile(buf, "a", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(DOCUMENT_PART, document)
+    return buf.getvalue()
+
+
+# --- inputs -----------------------------------------------------------------------------------
+
+
+def _design_name(meta: object, fallback: str) -> str:
+    if isinstance(meta, dict):
+        for key in ("name", "design", "title"):
+            if isinstance(meta.get(key), str) and meta[key].strip():
+                return meta[key].strip()
+    return fallback
+
+
+def iter_designs(paths: list[Path]) -> Iterator[tuple[str, DesignInputs]]:
+    """(name, inputs) from payload .json files and .ndjson batches; names come from `meta.name` when present."""
+
+    for path in paths:
+        if path.suffix.lower() == ".ndjson":
+            with open(path, encoding="utf-8") as fh:
+                for lineno, line in enumerate(fh, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        payload = json.loads(line)
+                        yield _design_name(payload.get("meta"), f"{path.stem}_{lineno}"), design_inputs_from_webapp(payload["inputs"])
+                    except (ValueError, TypeError, KeyError, AttributeError) as e:
+                        raise ValueError(f"{path}:{lineno}: {e}") from None
+        else:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            yield _design_name(payload.get("meta"), path.stem), design_inputs_from_webapp(payload.get("inputs") or {})
+
+
+def _file_names(designs: list[ReportDesign]) -> list[str]:
+    seen: dict[str, int] = {}
+    out = []
+    for d in designs:
+        stem = _FILENAME_RE.sub("_", d.name).strip("._") or "design"
+        n = seen.get(stem.lower(), 0)
+        seen[stem.lower()] = n + 1
+        out.append(f"{stem}.docx" if n == 0 else f"{stem}_{n + 1}.docx")
+    return out
+
+
+# --- batch ------------------------------------------------------------------------------------
+
+
+def _write_chunk(job: tuple[list[ReportDesign], list[Path], Optional[Path]]) -> int:
+    designs, targets, template = job
+    total = 0
+    for d, target in zip(designs, targets):
+        data = docx_bytes(report_body(d), template=template, name=d.name)
+        tmp = target.with_name(target.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, target)
+        total += len(data)
+    return total
+
+
+def _bodies_chunk(designs: list[ReportDesign]) -> list[str]:
+    return [report_body(d) for d in designs]
+
+
+def _chunks(n: int, workers: int) -> list[slice]:
+    # A few chunks per worker keeps the pool busy without pickling one task per report.
+    size = max(1, math.ceil(n / max(workers * 4, 1)))
+    return [slice(i, i + size) for i in range(0, n, size)]
+
+
+def write_reports(
+    designs: list[ReportDesign], out_dir: Path, *, template: Optional[Path] = None, workers: int = 0
+) -> tuple[list[Path], int]:
+    """One .docx per design in `out_dir`; returns the paths and the total size in bytes."""
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    targets = [out_dir / name for name in _file_names(designs)]
+    jobs = [(designs[s], targets[s], template) for s in _chunks(len(designs), workers)]
+    if workers > 0 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            sizes = list(pool.map(_write_chunk, jobs))
+    else:
+        sizes = [_write_chunk(j) for j in jobs]
+    return targets, sum(sizes)
+
+
+def combined_report(designs: list[ReportDesign], *, template: Optional[Path] = None, workers: int = 0) -> bytes:
+    """Every design in one document, one design per page run; bodies are rendered in the pool."""
+
+    jobs = [designs[s] for s in _chunks(len(designs), workers)]
+    if workers > 0 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            bodies = [b for part in pool.map(_bodies_chunk, jobs) for b in part]
+    else:
+        bodies = [b for j in jobs for b in _bodies_chunk(j)]
+    return docx_bytes(_PAGE_BREAK.join(bodies), template=template, name="LM5148 design review")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Per-design Word reports (equations with substituted values) from payload files.")
+    parser.add_argument("inputs", nargs="+", help="Payload .json files and/or .ndjson batches (one payload per line)")
+    parser.add_argument("--out-dir", type=str, default="reports", help="Directory for one .docx per design")
+    parser.add_argument("--combined", type=str, default="", help="Write one combined .docx here instead")
+    parser.add_argument("--template", type=str, default="", help=f".docx template; a paragraph reading {BODY_MARKER} marks where reports go")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Process pool size (0 = serial)")
+    args = parser.parse_args()
+
+    template = Path(args.template) if args.template else None
+    t0 = time.perf_counter()
+    try:
+        designs = report_designs(list(iter_designs([Path(p) for p in args.inputs])))
+    except (OSError, ValueError) as e:
+        print(f"Input error: {e}")
+        return 2
+    t1 = time.perf_counter()
+    if args.combined:
+        out = Path(args.combined)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        data = combined_report(designs, template=template, workers=args.workers)
+        tmp = out.with_name(out.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, out)
+        print(f"Wrote: {out} ({len(designs):,} design(s), {len(data) / 1e3:,.0f} kB)")
+    else:
+        paths, size = write_reports(designs, Path(args.out_dir), template=template, workers=args.workers)
+        print(f"Wrote {len(paths):,} report(s) to {args.out_dir} ({size / 1e6:,.1f} MB)")
+    print(f"Designs evaluated in {t1 - t0:.2f} s; reports written in {time.perf_counter() - t1:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import astuple, dataclass
+from typing import Any, Optional
+
+from lm5148_tool.lm5148_core import DesignInputs, DesignResults, design_inputs_from_webapp
+
+
+RESULT_FIELDS: list[str] = list(DesignResults.__dataclass_fields__)
+
+MAX_BODY_BYTES = 64 * 2**20
+MAX_DESIGNS_PER_REQUEST = 200_000
+
+_REASONS = {200: "OK", 204: "No Content", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def _evaluate_rows(rows: list[tuple]) -> list[list[float]]:
+    """Pool worker: vectorized run_design over `DesignInputs` tuples; one result row per input."""
+
+    import numpy as np
+
+    from lm5148_tool.lm5148_batch import INPUT_FIELDS, run_design_columns
+
+    # Rows are astuple(DesignInputs); pick INPUT_FIELDS out by name (pdf_path is not one of them).
+    fields = list(DesignInputs.__dataclass_fields__)
+    cols = [fields.index(name) for name in INPUT_FIELDS]
+    table = np.array([[np.nan if row[i] is None else row[i] for i in cols] for row in rows], dtype=np.float64)
+    res = run_design_columns({name: table[:, i] for i, name in enumerate(INPUT_FIELDS)})
+    return np.column_stack([res[name] for name in RESULT_FIELDS]).tolist()
+
+
+def _result_dict(values: list[float]) -> dict[str, Optional[float]]:
+    # JSON has no inf/NaN (e.g. Eq.40 when ESR ripple alone exceeds the spec): send null.
+    return {k: (v if math.isfinite(v) else None) for k, v in zip(RESULT_FIELDS, values)}
+
+
+@dataclass
+class ServiceStats:
+    requests: int = 0
+    designs: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+    evaluated: int = 0
+    batches: int = 0
+
+
+class DesignService:
+    """Evaluates designs for many concurrent requests.
+
+    - Results are cached per design (LRU over the frozen `DesignInputs`).
+    - Identical designs already queued or in flight share one future (request coalescing).
+    - New designs from all requests are gathered for `batch_window_s` (or until `max_batch`)
+      and evaluated by the vectorized engine in a worker pool, in `chunk_size` slices.
+    """
+
+    def __init__(
+        self,
+        *,
+        executor: Executor,
+        cache_size: int = 100_000,
+        max_batch: int = 8192,
+        batch_window_s: float = 0.002,
+        chunk_size: int = 2048,
+    ) -> None:
+        self.executor = executor
+        self.cache_size = cache_size
+        self.max_batch = max_batch
+        self.batch_window_s = batch_window_s
+        self.chunk_size = chunk_size
+        self.stats = ServiceStats()
+        self._cache: OrderedDict[DesignInputs, dict] = OrderedDict()
+        self._waiting: dict[DesignInputs, asyncio.Future] = {}
+        self._queue: list[DesignInputs] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def _cache_get(self, key: DesignInputs) -> Optional[dict]:
+        hit = self._cache.get(key)
+        if hit is not None:
+            self._cache.move_to_end(key)
+        return hit
+
+    def _cache_put(self, key: DesignInputs, value: dict) -> None:
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = value
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def evaluate(self, designs: list[DesignInputs]) -> list[dict]:
+        loop = asyncio.get_running_loop()
+        self.stats.designs += len(designs)
+        slots: list[Any] = []
+        for d in designs:
+            hit = self._cache_get(d)
+            if hit is not None:
+                self.stats.cache_hits += 1
+                slots.append(hit)
+                continue
+            fut = self._waiting.get(d)
+            if fut is not None:
+                self.stats.coalesced += 1
+            else:
+                fut = loop.create_future()
+                self._waiting[d] = fut
+                self._queue.append(d)
+            slots.append(fut)
+
+        if len(self._queue) >= self.max_batch:
+            self._flush()
+        elif self._queue and self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window_s, self._flush)
+
+        return [await s if isinstance(s, asyncio.Future) else s for s in slots]
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        queue, self._queue = self._queue, []
+        if not queue:
+            return
+        self.stats.batches += 1
+        loop = asyncio.get_running_loop()
+        for start in range(0, len(queue), self.chunk_size):
+            chunk = queue[start : start + self.chunk_size]
+            job = loop.run_in_executor(self.executor, _evaluate_rows, [astuple(d) for d in chunk])
+            job.add_done_callback(lambda j, chunk=chunk: self._complete(chunk, j))
+
+    def _complete(self, chunk: list[DesignInputs], job: asyncio.Future) -> None:
+        exc = job.exception()
+        rows = None if exc is not None else job.result()
+        for i, d in enumerate(chunk):
+            fut = self._waiting.pop(d, None)
+            if fut is None or fut.done():
+                continue
+            if exc is not None:
+                fut.set_exception(exc)
+                continue
+            value = _result_dict(rows[i])
+            self._cache_put(d, value)
+            fut.set_result(value)
+        if exc is None:
+            self.stats.evaluated += len(chunk)
+
+
+def _parse_designs(payload: Any) -> tuple[bool, list[Optional[DesignInputs]], list[dict]]:
+    """Returns (is_batch, designs, errors); invalid entries are None in `designs`."""
+
+    if not isinstance(payload, dict) or "inputs" not in payload:
+        raise ValueError("JSON body must contain an 'inputs' object or array")
+    raw = payload["inputs"]
+    is_batch = isinstance(raw, list)
+    items = raw if is_batch else [raw]
+    if len(items) > MAX_DESIGNS_PER_REQUEST:
+        raise ValueError(f"At most {MAX_DESIGNS_PER_REQUEST} designs per request")
+    designs: list[Optional[DesignInputs]] = []
+    errors: list[dict] = []
+    for i, item in enumerate(items):
+        try:
+            designs.append(design_inputs_from_webapp(item))
+        except (ValueError, TypeError, OverflowError) as e:
+            designs.append(None)
+            errors.append({"index": i, "error": str(e)})
+    return is_batch, designs, errors
+
+
+class DesignHTTPServer:
+    """Minimal HTTP/1.1 JSON front end (keep-alive, CORS) on asyncio streams.
+
+    Routes:
+    - `POST /v1/design`: `{"inputs": {...}}` or `{"inputs": [{...}, ...]}` in the lm5148_design.json
+      schema; answers `{"results": ...}` in the same shape, plus `errors` for rejected entries.
+    - `GET /healthz`, `GET /v1/stats`
+    """
+
+    def __init__(self, service: DesignService) -> None:
+        self.service = service
+        self.started = time.time()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._send(writer, 400, {"error": "Malformed request line"}, keep_alive=False)
+                    break
+
+                headers: dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                try:
+                    length = int(headers.get("content-length", "0") or 0)
+                    if length < 0:
+                        raise ValueError
+                except ValueError:
+                    # The body boundary is unknown, so the connection cannot be reused.
+                    await self._send(writer, 400, {"error": "Invalid Content-Length"}, keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._send(writer, 413, {"error": "Request body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, response = await self._route(method, target.split("?", 1)[0], body)
+                except Exception as e:
+                    # A bug in one request must not drop the connection without an answer.
+                    traceback.print_exc()
+                    status, response, keep_alive = 500, {"error": f"Internal error: {type(e).__name__}"}, False
+                await self._send(writer, status, response, keep_alive=keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes) -> tuple[int, Optional[dict]]:
+        if method == "OPTIONS":
+            return 204, None
+        if path == "/healthz" and method == "GET":
+            return 200, {"status": "ok"}
+        if path == "/v1/stats" and method == "GET":
+            st = self.service.stats
+            return 200, {**st.__dict__, "cacheEntries": len(self.service._cache), "uptimeS": time.time() - self.started}
+        if path != "/v1/design":
+            return 404, {"error": f"No route for {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST"}
+
+        try:
+            is_batch, designs, errors = _parse_designs(json.loads(body or b"null"))
+        except (ValueError, UnicodeDecodeError) as e:
+            return 400, {"error": str(e)}
+        except RecursionError:
+            return 400, {"error": "JSON body is nested too deeply"}
+
+        self.service.stats.requests += 1
+        valid = [d for d in designs if d is not None]
+        computed = iter(await self.service.evaluate(valid))
+        results = [next(computed) if d is not None else None for d in designs]
+
+        response: dict[str, Any] = {"results": results if is_batch else results[0]}
+        if errors:
+            response["errors"] = errors
+        return 200, response
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, status: int, payload: Optional[dict], *, keep_alive: bool) -> None:
+        body = b"" if payload is None else json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Access-Control-Allow-Origin: *\r\n"
+            "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+            "Access-Control-Allow-Headers: Content-Type\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host: str, port: int, service: DesignService) -> None:
+    http = DesignHTTPServer(service)
+    server = await asyncio.start_server(http.handle, host, port)
+    addrs = ", ".join(str(s.getsockname()) for s in server.sockets)
+    print(f"LM5148 design API listening on {addrs} (POST /v1/design)")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local async HTTP JSON API serving run_design for the webapp and batch clients.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=max(1, (os.cpu_count() or 2) - 1),
+        help="Worker processes for evaluation (0 = threads in this process)",
+    )
+    parser.add_argument("--cache-size", type=int, default=100_000, help="Cached designs (LRU); 0 disables")
+    parser.add_argument("--max-batch", type=int, default=8192, help="Flush the pending batch at this many designs")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0, help="Max wait to gather designs into a batch")
+    parser.add_argument("--chunk-size", type=int, default=2048, help="Designs per worker task")
+    args = parser.parse_args()
+
+    executor: Executor
+    if args.workers > 0:
+        executor = ProcessPoolExecutor(max_workers=args.workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers=2)
+
+    service = DesignService(
+        executor=executor,
+        cache_size=args.cache_size,
+        max_batch=args.max_batch,
+        batch_window_s=args.batch_window_ms / 1e3,
+        chunk_size=args.chunk_size,
+    )
+    try:
+        asyncio.run(serve(args.host, args.port, service))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        executor.shutdown(cancel_futures=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import struct
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+from lm5148_tool.lm5148_core import DesignInputs, design_inputs_from_webapp, run_design
+
+
+CFB_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+_FREESECT = 0xFFFFFFFF
+_ENDOFCHAIN = 0xFFFFFFFE
+_NOSTREAM = 0xFFFFFFFF
+
+CACHE_VERSION = 1
+
+
+class CompoundFile:
+    """Minimal read-only reader for OLE compound files (MS-CFB), enough for OrCAD .DSN/.OLB.
+
+    Only the FAT / mini FAT chains needed for a requested stream are followed; streams are
+    returned as bytes and never written back.
+    """
+
+    def __init__(self, data: bytes) -> None:
+        if data[:8] != CFB_SIGNATURE:
+            raise ValueError("Not an OLE compound file")
+        self.data = data
+        (sector_shift, mini_shift) = struct.unpack_from("<HH", data, 0x1E)
+        self.sector_size = 1 << sector_shift
+        self.mini_sector_size = 1 << mini_shift
+        (
+            _n_dir,
+            n_fat,
+            first_dir,
+            _txn,
+            self.mini_cutoff,
+            first_minifat,
+            n_minifat,
+            first_difat,
+            n_difat,
+        ) = struct.unpack_from("<9I", data, 0x28)
+
+        difat = list(struct.unpack_from("<109I", data, 0x4C))
+        sect = first_difat
+        per = self.sector_size // 4
+        for _ in range(n_difat):
+            if sect in (_ENDOFCHAIN, _FREESECT):
+                break
+            entries = struct.unpack_from(f"<{per}I", data, self._offset(sect))
+            difat.extend(entries[:-1])
+            sect = entries[-1]
+        fat_bytes = b"".join(self._sector(s) for s in difat[:n_fat] if s != _FREESECT)
+        self.fat = struct.unpack(f"<{len(fat_bytes) // 4}I", fat_bytes)
+
+        dir_bytes = self._read_chain(first_dir)
+        self.entries = [self._dir_entry(dir_bytes, i) for i in range(len(dir_bytes) // 128)]
+        root = self.entries[0]
+        self.mini_stream = self._read_chain(root["start"])[: root["size"]]
+        minifat_bytes = self._read_chain(first_minifat) if n_minifat else b""
+        self.minifat = struct.unpack(f"<{len(minifat_bytes) // 4}I", minifat_bytes)
+        self.paths = self._walk(root["child"], ())
+
+    def _offset(self, sect: int) -> int:
+        return (sect + 1) * self.sector_size
+
+    def _sector(self, sect: int) -> bytes:
+        off = self._offset(sect)
+        return self.data[off : off + self.sector_size]
+
+    def _read_chain(self, start: int) -> bytes:
+        # Bounded by the sector count so a corrupt (cyclic) chain cannot loop forever.
+        out = []
+        sect = start
+        limit = len(self.data) // self.sector_size
+        while sect not in (_ENDOFCHAIN, _FREESECT) and sect < len(self.fat) and len(out) < limit:
+            out.append(self._sector(sect))
+            sect = self.fat[sect]
+        return b"".join(out)
+
+    def _read_mini_chain(self, start: int, size: int) -> bytes:
+        out = []
+        sect = start
+        while sect not in (_ENDOFCHAIN, _FREESECT) and sect < len(self.minifat) and len(out) < len(self.minifat):
+            off = sect * self.mini_sector_size
+            out.append(self.mini_stream[off : off + self.mini_sector_size])
+            sect = self.minifat[sect]
+        return b"".join(out)[:size]
+
+    @staticmethod
+    def _dir_entry(buf: bytes, i: int) -> dict:
+        raw = buf[i * 128 : (i + 1) * 128]
+        name_len = struct.unpack_from("<H", raw, 64)[0]
+        name = raw[: max(name_len - 2, 0)].decode("utf-16-le", errors="replace")
+        kind = raw[66]
+        left, right, child = struct.unpack_from("<3I", raw, 68)
+        start, size = struct.unpack_from("<IQ", raw, 116)
+        return {"name": name, "type": kind, "left": left, "right": right, "child": child, "start": start, "size": size}
+
+    def _walk(self, node: int, prefix: tuple[str, ...]) -> dict[tuple[str, ...], int]:
+        """Path -> directory index for every stream, via the sibling trees (iterative, cycle-safe)."""
+
+        out: dict[tuple[str, ...], int] = {}
+        stack = [(node, prefix)]
+        seen = set()
+        while stack:
+            idx, pre = stack.pop()
+            if idx == _NOSTREAM or idx >= len(self.entries) or idx in seen:
+                continue
+            seen.add(idx)
+            e = self.entries[idx]
+            stack.append((e["left"], pre))
+            stack.append((e["right"], pre))
+            path = pre + (e["name"],)
+            if e["type"] == 2:
+                out[path] = idx
+            elif e["type"] == 1:
+                stack.append((e["child"], path))
+        return out
+
+    def list_streams(self) -> list[str]:
+        return sorted("/".join(p) for p in self.paths)
+
+    def read(self, path: str) -> bytes:
+        e = self.entries[self.paths[tuple(path.split("/"))]]
+        if e["size"] < self.mini_cutoff:
+            return self._read_mini_chain(e["start"], e["size"])
+        return self._read_chain(e["start"])[: e["size"]]
+
+
+@dataclass(frozen=True)
+class PartInstance:
+    refdes: str
+    value_text: str
+    # Parsed value in SI units (None when the value is not numeric, e.g. "LM5148QRGYRQ1").
+    value: Optional[float]
+    page: str
+    properties: dict[str, str] = field(default_factory=dict)
+
+
+# OrCAD stores names and property values as <u16 length><bytes><NUL>.
+_PRINTABLE = re.compile(rb"^[\x20-\x7e\xb5]+$")
+_REFDES = re.compile(r"^(?:L|R|C|U|Q|D|T|FB|J|TP)\d{1,4}[A-Z]?$")
+_VALUE = re.compile(r"^\s*(\d+(?:\.\d*)?|\.\d+)\s*([pnuµmkKMG]?)\s*(?:H|Ω|R|ohm|Ohm|F)?\s*$")
+# "4R7", "0R005", "2k2", "4u7": the multiplier letter doubles as the decimal point.
+_VALUE_INFIX = re.compile(r"^\s*(\d+)([RpnuµmkKM])(\d+)\s*(?:H|Ω|ohm|F)?\s*$")
+_MULT = {"": 1.0, "R": 1.0, "p": 1e-12, "n": 1e-9, "u": 1e-6, "µ": 1e-6, "m": 1e-3, "k": 1e3, "K": 1e3, "M": 1e6, "G": 1e9}
+_PROP_NAME = re.compile(r"^[A-Za-z][A-Za-z_ ]*$")
+# How far past a reference designator its value is looked for.
+_VALUE_WINDOW = 12
+
+
+def parse_component_value(text: str) -> Optional[float]:
+    m = _VALUE.match(text)
+    if m:
+        return float(m.group(1)) * _MULT[m.group(2)]
+    m = _VALUE_INFIX.match(text)
+    if m:
+        return float(f"{m.group(1)}.{m.group(3)}") * _MULT[m.group(2)]
+    return None
+
+
+def iter_tokens(stream: bytes) -> Iterator[str]:
+    """Length-prefixed strings in an OrCAD record stream, in file order."""
+
+    i = 0
+    n = len(stream)
+    while i + 3 <= n:
+        length = stream[i] | (stream[i + 1] << 8)
+        end = i + 2 + length
+        if 0 < length < 256 and end < n and stream[end] == 0 and _PRINTABLE.match(stream[i + 2 : end]):
+            yield stream[i + 2 : end].decode("latin-1")
+            i = end + 1
+        else:
+            i += 1
+
+
+def parse_page(tokens: list[str], page: str) -> list[PartInstance]:
+    """Part instances on one page: each reference designator with the first numeric value after it.
+
+    Name/value property pairs between the designator and the next designator are kept as
+    `properties` (e.g. "Tolerance" / "1%").
+    """
+
+    parts = []
+    ref_idx = [i for i, t in enumerate(tokens) if _REFDES.match(t)]
+    for k, i in enumerate(ref_idx):
+        stop = ref_idx[k + 1] if k + 1 < len(ref_idx) else len(tokens)
+        window = tokens[i + 1 : min(stop, i + 1 + _VALUE_WINDOW)]
+        value_text, value = "", None
+        for t in window:
+            v = parse_component_value(t)
+            if v is not None:
+                value_text, value = t, v
+                break
+        if not value_text and window:
+            value_text = window[0]
+        props = {}
+        j, rest = 0, tokens[i + 1 : stop]
+        while j + 1 < len(rest):
+            if _PROP_NAME.match(rest[j]) and rest[j] != value_text:
+                props[rest[j]] = rest[j + 1]
+                j += 2
+            else:
+                j += 1
+        parts.append(PartInstance(tokens[i], value_text, value, page, props))
+    return parts
+
+
+def read_parts(data: bytes) -> list[PartInstance]:
+    """Stream every schematic page of a DSN and collect its part instances (last placement wins)."""
+
+    cf = CompoundFile(data)
+    by_ref: dict[str, PartInstance] = {}
+    for path in cf.list_streams():
+        segs = path.split("/")
+        if len(segs) >= 4 and segs[0] == "Views" and segs[2] == "Pages":
+            for part in parse_page(list(iter_tokens(cf.read(path))), page=f"{segs[1]}/{segs[3]}"):
+                by_ref[part.refdes] = part
+    return sorted(by_ref.values(), key=lambda p: (re.sub(r"\d.*", "", p.refdes), int(re.sub(r"\D", "", p.refdes) or 0)))
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_parts(dsn_path: Path, cache_path: Optional[Path] = None) -> tuple[list[PartInstance], bool]:
+    """Parts of a DSN, reusing the cached table while the file hash is unchanged. Returns (parts, from_cache)."""
+
+    digest = file_sha256(dsn_path)
+    if cache_path is not None and cache_path.exists():
+        try:
+            cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            cached = {}
+        if cached.get("version") == CACHE_VERSION and cached.get("sha256") == digest:
+            return [PartInstance(**p) for p in cached["parts"]], True
+    parts = read_parts(dsn_path.read_bytes())
+    if cache_path is not None:
+        data = {"version": CACHE_VERSION, "sha256": digest, "parts": [asdict(p) for p in parts]}
+        tmp = cache_path.with_suffix(cache_path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+        tmp.replace(cache_path)
+    return parts, False
+
+
+# Roles checked against run_design; refdes come from --role or, for L, the only inductor placed.
+ROLES = ("L", "RSENSE", "RT", "RFB_TOP", "RFB_BOT")
+
+
+@dataclass(frozen=True)
+class CrossCheck:
+    role: str
+    refdes: str
+    placed: Optional[float]
+    computed: float
+    error: Optional[float]  # (placed - computed) / computed
+    ok: bool
+
+
+def computed_values(inp: DesignInputs) -> dict[str, float]:
+    res = run_design(inp)
+    return {
+        "L": inp.l_used_h if inp.l_used_h is not None else res.l_required_h,
+        "RSENSE": res.rsense_ohm,
+        "RT": res.rt_ohm,
+        "RFB_TOP": res.rfb_top_ohm,
+        "RFB_BOT": inp.rfb_bottom_ohm,
+    }
+
+
+def cross_check(
+    parts: list[PartInstance], inp: DesignInputs, roles: dict[str, str], *, tolerance: float = 0.05
+) -> list[CrossCheck]:
+    by_ref = {p.refdes: p for p in parts}
+    roles = dict(roles)
+    inductors = [p.refdes for p in parts if p.refdes.startswith("L") and p.refdes[1:2].isdigit()]
+    if "L" not in roles and len(inductors) == 1:
+        roles["L"] = inductors[0]
+
+    out = []
+    for role, computed in computed_values(inp).items():
+        ref = roles.get(role)
+        if ref is None:
+            continue
+        part = by_ref.get(ref)
+        placed = part.value if part is not None else None
+        error = (placed - computed) / computed if placed is not None and computed else None
+        out.append(CrossCheck(role, ref, placed, computed, error, error is not None and abs(error) <= tolerance))
+    return out
+
+
+def format_parts(parts: list[PartInstance]) -> str:
+    lines = [f"{'refdes':8s} {'value':14s} {'parsed':>12s}  page"]
+    for p in parts:
+        parsed = f"{p.value:.4g}" if p.value is not None else "-"
+        lines.append(f"{p.refdes:8s} {p.value_text[:14]:14s} {parsed:>12s}  {p.page}")
+    return "\n".join(lines)
+
+
+def format_checks(checks: list[CrossCheck]) -> str:
+    lines = [f"{'role':8s} {'refdes':8s} {'placed':>11s} {'computed':>11s} {'error':>8s}"]
+    for c in checks:
+        placed = f"{c.placed:.4g}" if c.placed is not None else "missing"
+        error = f"{c.error:+.1%}" if c.error is not None else "-"
+        lines.append(f"{c.role:8s} {c.refdes:8s} {placed:>11s} {c.computed:11.4g} {error:>8s}  {'OK' if c.ok else 'MISMATCH'}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Read part values from an OrCAD .DSN and cross-check them against run_design.")
+    parser.add_argument("--dsn", type=str, required=True)
+    parser.add_argument("--json", type=str, default="", help="lm5148_design.json to cross-check against")
+    parser.add_argument("--role", action="append", default=[], help="Role to refdes, e.g. RSENSE=R5 (roles: L, RSENSE, RT, RFB_TOP, RFB_BOT)")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="Allowed relative difference (standard values)")
+    parser.add_argument("--cache", type=str, default="", help="Parse cache (default: <dsn>.parts.json; 'none' disables)")
+    parser.add_argument("--streams", action="store_true", help="List the compound-file streams and exit")
+    args = parser.parse_args()
+
+    dsn = Path(args.dsn)
+    if args.streams:
+        print("\n".join(CompoundFile(dsn.read_bytes()).list_streams()))
+        return 0
+
+    cache = None if args.cache == "none" else Path(args.cache or str(dsn) + ".parts.json")
+    t0 = time.perf_counter()
+    parts, cached = load_parts(dsn, cache)
+    dt = time.perf_counter() - t0
+    print(format_parts(parts))
+    print(f"{len(parts)} part(s) in {dt * 1e3:.1f} ms{' (cached)' if cached else ''}")
+
+    if args.json:
+        inp = design_inputs_from_webapp(json.loads(Path(args.json).read_text(encoding="utf-8")).get("inputs") or {})
+        roles = {}
+        for item in args.role:
+            role, _, ref = item.partition("=")
+            role = role.strip().upper()
+            if role not in ROLES:
+                raise SystemExit(f"Unknown role {role!r}; use one of {', '.join(ROLES)}")
+            roles[role] = ref.strip()
+        checks = cross_check(parts, inp, roles, tolerance=args.tolerance)
+        if not checks:
+            print("Nothing to cross-check: map parts with --role (e.g. --role RSENSE=R5)")
+            return 0
+        print()
+        print(format_checks(checks))
+        return 0 if all(c.ok for c in checks) else 2
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
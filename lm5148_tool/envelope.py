@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from lm5148_tool.lm5148_core import DesignInputs, design_inputs_from_webapp, run_design
+
+
+N_VIN_DEFAULT = 256
+N_IOUT_DEFAULT = 32
+IOUT_MIN_FRAC_DEFAULT = 0.1
+
+# Envelope metrics: (key, label, unit). The worst case of each is its maximum.
+ENVELOPE_METRICS: list[tuple[str, str, str]] = [
+    ("delta_il_a", "ΔIL (Eq32)", "A"),
+    ("il_peak_a", "IL peak (Eq32)", "A"),
+    ("vout_ripple_pp_v", "Vout ripple pp (Eq37)", "V"),
+    ("cin_rms_a", "Cin RMS (Eq39)", "A"),
+    ("cin_required_f", "Cin required (Eq40)", "F"),
+]
+
+
+@dataclass(frozen=True)
+class EnvelopeExtreme:
+    metric: str
+    max_value: float
+    max_vin_v: float
+    max_iout_a: float
+    min_value: float
+    min_vin_v: float
+    min_iout_a: float
+    # run_design's single-point value (VIN max for Eq.32, D = 0.5 for Eq.39/40) for comparison.
+    point_value: float
+
+
+@dataclass(frozen=True)
+class Envelope:
+    vin_v: np.ndarray  # (n_vin,)
+    iout_a: np.ndarray  # (n_iout,)
+    l_h: float
+    cout_f: float
+    grids: dict[str, np.ndarray]  # metric -> (n_vin, n_iout)
+    extremes: list[EnvelopeExtreme]
+
+    def at_full_load(self) -> dict[str, np.ndarray]:
+        """Metric curves vs VIN at the highest IOUT (the usual datasheet-style plot)."""
+
+        return {"vin_v": self.vin_v, **{k: g[:, -1] for k, g in self.grids.items()}}
+
+
+def envelope_grids(
+    vin: np.ndarray, iout: np.ndarray, inp: DesignInputs, l_h: float, cout_f: float
+) -> dict[str, np.ndarray]:
+    """Ripple, peak current and input-capacitor metrics over an (n_vin, n_iout) grid in one pass.
+
+    Same equations as run_design, but evaluated at the operating point instead of VIN max / D = 0.5:
+    D = Vout/Vin, ΔIL at each VIN, and Vout ripple from that ΔIL into the design's Cout.
+    """
+
+    v = np.asarray(vin, dtype=np.float64)[:, None]
+    i = np.asarray(iout, dtype=np.float64)[None, :]
+    vout = inp.vout_v
+    fsw = inp.fsw_hz
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        duty = np.clip(vout / v, 0.0, 0.95)
+
+        # Eq.32 with VIN swept
+        delta_il = (vout * (v - vout)) / (v * l_h * fsw)
+        il_pk = i + delta_il / 2.0
+
+        # Eq.37
+        v_c = delta_il / (8.0 * fsw * cout_f)
+        v_esr = delta_il * inp.rout_esr_ohm
+        vout_ripple = np.sqrt(v_c * v_c + v_esr * v_esr)
+
+        # Eq.39 / Eq.40 with the real duty cycle
+        d_factor = duty * (1.0 - duty)
+        cin_rms = i * np.sqrt(d_factor)
+        dv_in = inp.vin_ripple_pp_v
+        dv_esr = cin_rms * inp.rin_esr_ohm
+        dv_cap_allow = np.sqrt(np.maximum(dv_in**2 - dv_esr**2, 0.0))
+        cin_req = np.where(
+            (dv_esr >= dv_in) | (dv_cap_allow <= 0.0),
+            np.inf,
+            i * d_factor / (fsw * dv_cap_allow),
+        )
+
+    shape = (v.shape[0], i.shape[1])
+    return {
+        "delta_il_a": np.broadcast_to(delta_il, shape),
+        "il_peak_a": il_pk,
+        "vout_ripple_pp_v": np.broadcast_to(vout_ripple, shape),
+        "cin_rms_a": cin_rms,
+        "cin_required_f": cin_req,
+    }
+
+
+def _arg_extreme(grid: np.ndarray, largest: bool) -> tuple[int, int]:
+    # NaN never wins; +inf (infeasible Eq.40) is a legitimate maximum.
+    filled = np.where(np.isnan(grid), -np.inf if largest else np.inf, grid)
+    flat = int(np.argmax(filled) if largest else np.argmin(filled))
+    return np.unravel_index(flat, grid.shape)  # type: ignore[return-value]
+
+
+def compute_envelope(
+    inp: DesignInputs,
+    *,
+    n_vin: int = N_VIN_DEFAULT,
+    n_iout: int = N_IOUT_DEFAULT,
+    iout_min_frac: float = IOUT_MIN_FRAC_DEFAULT,
+) -> Envelope:
+    nominal = run_design(inp)
+    # Parts are fixed at the nominal design: L_used (or L required) and the Eq.36 Cout.
+    l_h = inp.l_used_h if inp.l_used_h is not None else nominal.l_required_h
+    if inp.l_used_h is None:
+        nominal = run_design(replace(inp, l_used_h=l_h))
+    cout_f = nominal.cout_load_off_f
+
+    vin = np.linspace(min(inp.vin_min_or_nom_v, inp.vin_max_v), inp.vin_max_v, n_vin)
+    iout = np.linspace(inp.iout_a * iout_min_frac, inp.iout_a, n_iout) if n_iout > 1 else np.array([inp.iout_a])
+    grids = envelope_grids(vin, iout, inp, l_h, cout_f)
+
+    point = {
+        "delta_il_a": nominal.delta_il_vin_max_a,
+        "il_peak_a": nominal.il_peak_vin_max_a,
+        "vout_ripple_pp_v": nominal.vout_ripple_pp_v,
+        "cin_rms_a": nominal.cin_rms_a,
+        "cin_required_f": nominal.cin_required_f,
+    }
+    extremes = []
+    for key, _, _ in ENVELOPE_METRICS:
+        g = grids[key]
+        hi = _arg_extreme(g, largest=True)
+        lo = _arg_extreme(g, largest=False)
+        extremes.append(
+            EnvelopeExtreme(
+                metric=key,
+                max_value=float(g[hi]),
+                max_vin_v=float(vin[hi[0]]),
+                max_iout_a=float(iout[hi[1]]),
+                min_value=float(g[lo]),
+                min_vin_v=float(vin[lo[0]]),
+                min_iout_a=float(iout[lo[1]]),
+                point_value=float(point[key]),
+            )
+        )
+    return Envelope(vin_v=vin, iout_a=iout, l_h=float(l_h), cout_f=float(cout_f), grids=grids, extremes=extremes)
+
+
+def _finite_or_none(v: float) -> Optional[float]:
+    return v if math.isfinite(v) else None
+
+
+def envelope_to_dict(env: Envelope) -> dict:
+    """JSON-friendly summary plus the full-load curves (non-finite values as null)."""
+
+    curves = env.at_full_load()
+    return {
+        "lUsedH": env.l_h,
+        "coutF": env.cout_f,
+        "extremes": [
+            {k: (_finite_or_none(v) if isinstance(v, float) else v) for k, v in vars(e).items()} for e in env.extremes
+        ],
+        "fullLoad": {k: [_finite_or_none(float(x)) for x in arr] for k, arr in curves.items()},
+    }
+
+
+def format_envelope(env: Envelope) -> str:
+    lines = [
+        f"{len(env.vin_v)} VIN x {len(env.iout_a)} IOUT points; L = {env.l_h:.4g} H, Cout = {env.cout_f:.4g} F",
+        f"{'metric':18s} {'max':>11s} {'@VIN':>7s} {'@IOUT':>7s} {'min':>11s} {'@VIN':>7s} {'@IOUT':>7s} {'run_design':>11s}",
+    ]
+    for e in env.extremes:
+        lines.append(
+            f"{e.metric:18s} {e.max_value:11.4g} {e.max_vin_v:7.3g} {e.max_iout_a:7.3g} "
+            f"{e.min_value:11.4g} {e.min_vin_v:7.3g} {e.min_iout_a:7.3g} {e.point_value:11.4g}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Ripple / peak current / Cin envelope over a dense VIN (vin_min..vin_max) x IOUT grid."
+    )
+    parser.add_argument("--json", type=str, required=True, help="lm5148_design.json (webapp/Streamlit export)")
+    parser.add_argument("--n-vin", type=int, default=N_VIN_DEFAULT)
+    parser.add_argument("--n-iout", type=int, default=N_IOUT_DEFAULT)
+    parser.add_argument("--iout-min-frac", type=float, default=IOUT_MIN_FRAC_DEFAULT, help="Lowest IOUT as a fraction of IOUT")
+    parser.add_argument("--out", type=str, default="", help="Optional JSON output path")
+    parser.add_argument("--xlsx", type=str, default="", help="Optional results workbook (with an Envelope sheet)")
+    args = parser.parse_args()
+
+    payload = json.loads(Path(args.json).read_text(encoding="utf-8"))
+    inputs = payload.get("inputs") or {}
+    inp = design_inputs_from_webapp(inputs)
+    env = compute_envelope(inp, n_vin=args.n_vin, n_iout=args.n_iout, iout_min_frac=args.iout_min_frac)
+    print(format_envelope(env))
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(envelope_to_dict(env), indent=2), encoding="utf-8")
+    if args.xlsx:
+        from dataclasses import asdict
+
+        from lm5148_tool.export_results_xlsx import build_results_xlsx_bytes
+
+        data = build_results_xlsx_bytes(inputs=inputs, results=asdict(run_design(inp)), envelope=env)
+        Path(args.xlsx).write_bytes(data)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
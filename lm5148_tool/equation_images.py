@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+try:
+    from lm5148_tool.lm5148_design_tool import CLIP_BELOW_PT
+except ImportError:  # run as a script from inside lm5148_tool/
+    from lm5148_design_tool import CLIP_BELOW_PT
+
+
+# Blank rows taller than this separate the equation from the paragraph above it; lines of
+# body text and the parts of a stacked fraction are closer together (~2.5 pt).
+BLOCK_GAP_PT = 5.0
+PAD_PT = 3.0
+# Pixels darker than this count as ink (anti-aliased edges included).
+INK_THRESHOLD = 200
+CACHE_VERSION = 1
+CACHE_DIR_DEFAULT = Path(tempfile.gettempdir()) / "lm5148_equation_images"
+
+
+@dataclass(frozen=True)
+class ImageTarget:
+    dpi: int
+    colors: int  # palette entries (16 -> 4-bit PNG)
+    grayscale: bool = True
+
+
+# export_to_excel shows images at 0.6x their physical size, i.e. ~58 px per PDF inch at 100 %
+# zoom; 110 DPI keeps them sharp up to ~200 % zoom. Word shows them at full size.
+IMAGE_TARGETS: dict[str, ImageTarget] = {
+    "xlsx": ImageTarget(dpi=110, colors=16),
+    "docx": ImageTarget(dpi=150, colors=16),
+    "print": ImageTarget(dpi=220, colors=64, grayscale=False),
+}
+
+
+def _bands(mask: np.ndarray) -> list[tuple[int, int]]:
+    """[start, stop) runs of True."""
+
+    edges = np.flatnonzero(np.diff(np.r_[0, mask.astype(np.int8), 0]))
+    return list(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+
+def equation_box(gray: np.ndarray, dpi: float, *, label_below_pt: Optional[float] = CLIP_BELOW_PT) -> tuple[int, int, int, int]:
+    """(top, bottom, left, right) of the equation in an `extract_equation_images` clip, padded.
+
+    The equation is the block of ink rows that ends at the label "(n)" (which sits
+    `label_below_pt` above the clip bottom), growing upward until a gap of `BLOCK_GAP_PT`.
+    Without a label position, or if no ink is found there, this is the ink bounding box.
+    """
+
+    px = dpi / 72.0
+    ink = gray < INK_THRESHOLD
+    rows = _bands(ink.any(axis=1))
+    if not rows:
+        return 0, gray.shape[0], 0, gray.shape[1]
+    top, bottom = rows[0][0], rows[-1][1]
+    if label_below_pt is not None:
+        label = gray.shape[0] - int(round(label_below_pt * px))
+        at_label = [i for i, (a, b) in enumerate(rows) if a <= label and b >= label - 2 * px]
+        if at_label:
+            i = at_label[-1]
+            top, bottom = rows[i]
+            while i > 0 and rows[i][0] - rows[i - 1][1] < BLOCK_GAP_PT * px:
+                i -= 1
+                top = rows[i][0]
+    cols = np.flatnonzero(ink[top:bottom].any(axis=0))
+    pad = int(round(PAD_PT * px))
+    return (
+        max(top - pad, 0),
+        min(bottom + pad, gray.shape[0]),
+        max(int(cols[0]) - pad, 0),
+        min(int(cols[-1]) + 1 + pad, gray.shape[1]),
+    )
+
+
+def optimize_png(data: bytes, target: ImageTarget, *, source_dpi: Optional[float] = None) -> bytes:
+    """Tight-crop an equation clip, resample it to `target.dpi` and save it as a small palette PNG."""
+
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(data))
+    dpi = float(source_dpi or img.info.get("dpi", (220, 220))[0])
+    rgb = img.convert("RGB")
+    top, bottom, left, right = equation_box(np.asarray(rgb.convert("L")), dpi)
+    rgb = rgb.crop((left, top, right, bottom))
+    if dpi > target.dpi:
+        scale = target.dpi / dpi
+        rgb = rgb.resize((max(round(rgb.width * scale), 1), max(round(rgb.height * scale), 1)), Image.LANCZOS)
+    out_dpi = min(dpi, target.dpi)
+    small = (rgb.convert("L") if target.grayscale else rgb).quantize(target.colors)
+    buf = io.BytesIO()
+    small.save(buf, format="PNG", optimize=True, dpi=(out_dpi, out_dpi), bits=max(1, (target.colors - 1).bit_length()))
+    return buf.getvalue()
+
+
+def cached_equation_image(src: Path, target: str = "xlsx", *, cache_dir: Optional[Path] = None) -> Path:
+    """Optimized copy of `src` for `target`, reused while the source and the settings are unchanged."""
+
+    tgt = IMAGE_TARGETS[target]
+    data = src.read_bytes()
+    key = hashlib.sha1(data + repr((CACHE_VERSION, tgt, CLIP_BELOW_PT, BLOCK_GAP_PT, PAD_PT)).encode()).hexdigest()[:16]
+    out_dir = cache_dir or CACHE_DIR_DEFAULT
+    out = out_dir / f"{src.stem}_{target}_{key}.png"
+    if not out.exists():
+        out_dir.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(optimize_png(data, tgt))
+        os.replace(tmp, out)
+    return out
+
+
+def prepare_equation_images(
+    images: dict[int, Path], target: str = "xlsx", *, cache_dir: Optional[Path] = None
+) -> dict[int, Path]:
+    return {eq: cached_equation_image(path, target, cache_dir=cache_dir) for eq, path in images.items()}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Tight-crop and compress equation snapshots for a target (prints sizes).")
+    parser.add_argument("images", nargs="+", help="eq_*.png clips from extract_equation_images")
+    parser.add_argument("--target", choices=sorted(IMAGE_TARGETS), default="xlsx")
+    parser.add_argument("--cache-dir", type=str, default="", help=f"Default: {CACHE_DIR_DEFAULT}")
+    args = parser.parse_args()
+
+    cache_dir = Path(args.cache_dir) if args.cache_dir else None
+    before = after = 0
+    t0 = time.perf_counter()
+    for src in map(Path, args.images):
+        out = cached_equation_image(src, args.target, cache_dir=cache_dir)
+        before += src.stat().st_size
+        after += out.stat().st_size
+        print(f"{src.name}: {src.stat().st_size / 1e3:,.0f} kB -> {out.stat().st_size / 1e3:,.1f} kB  {out}")
+    print(f"{len(args.images)} image(s): {before / 1e3:,.0f} kB -> {after / 1e3:,.0f} kB in {time.perf_counter() - t0:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
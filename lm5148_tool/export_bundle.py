@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from lm5148_tool.lm5148_core import DesignInputs, DesignResults, design_inputs_from_webapp, run_design
+from lm5148_tool.populate_quickstart_calculator import TEMPLATE_DEFAULT
+
+
+IMAGES_DIR_DEFAULT = Path(__file__).resolve().parent / "lm5148_equations_images_v3"
+EQUATION_NUMBERS = [31, 32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 43, 44, 45]
+
+
+@dataclass(frozen=True)
+class BundleJob:
+    """Everything an exporter needs, computed once in the parent and pickled to the workers."""
+
+    inputs: DesignInputs
+    payload: dict[str, Any]  # webapp JSON with freshly computed "results"
+    template: Optional[Path] = None
+    equation_images: dict[int, Path] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class ArtifactTiming:
+    name: str
+    seconds: float
+    size_bytes: int
+    error: str = ""
+
+
+def _export_json(job: BundleJob) -> bytes:
+    return json.dumps(job.payload, indent=2).encode("utf-8")
+
+
+def _export_results_xlsx(job: BundleJob) -> bytes:
+    from lm5148_tool.envelope import compute_envelope
+    from lm5148_tool.export_results_xlsx import build_results_xlsx_bytes
+
+    return build_results_xlsx_bytes(
+        inputs=job.payload["inputs"], results=job.payload["results"], envelope=compute_envelope(job.inputs)
+    )
+
+
+def _export_design_xlsx(job: BundleJob) -> bytes:
+    from lm5148_tool.lm5148_design_tool import export_to_excel
+
+    with tempfile.TemporaryDirectory() as td:
+        out = Path(td) / "lm5148_design_export.xlsx"
+        export_to_excel(job.inputs, DesignResults(**job.payload["results"]), out, job.equation_images)
+        return out.read_bytes()
+
+
+def _export_equations_docx(job: BundleJob) -> bytes:
+    from lm5148_tool.export_lm5148_equations_to_word import write_equations_docx
+
+    bio = io.BytesIO()
+    write_equations_docx(bio)
+    return bio.getvalue()
+
+
+def _export_quickstart(job: BundleJob) -> bytes:
+    from lm5148_tool.populate_quickstart_calculator import QuickstartPatcher
+
+    # Same fill as watch mode, so both produce the same workbook.
+    return QuickstartPatcher(job.template).build(job.payload)
+
+
+# Artifact name in the ZIP -> exporter, slowest first so it starts first in the pool.
+# Office files are already deflated, so they are stored as-is.
+EXPORTERS: dict[str, Callable[[BundleJob], bytes]] = {
+    "LM5148_quickstart_filled.xlsm": _export_quickstart,
+    "lm5148_equations_pages_36_39.docx": _export_equations_docx,
+    "lm5148_design_export.xlsx": _export_design_xlsx,
+    "lm5148_results.xlsx": _export_results_xlsx,
+    "lm5148_design.json": _export_json,
+}
+_STORED_SUFFIXES = (".xlsx", ".xlsm", ".docx")
+
+
+def _run(name: str, job: BundleJob) -> tuple[str, bytes, float, str]:
+    t0 = time.perf_counter()
+    try:
+        data, error = EXPORTERS[name](job), ""
+    except Exception as e:  # one failing exporter must not lose the rest of the bundle
+        data, error = b"", f"{type(e).__name__}: {e}"
+    return name, data, time.perf_counter() - t0, error
+
+
+def load_equation_images(*, images_dir: Optional[Path] = None, pdf: Optional[Path] = None) -> dict[int, Path]:
+    """Equation number -> image: freshly extracted from the PDF if given, else the cached directory."""
+
+    images: dict[int, Path] = {}
+    if pdf is not None and pdf.exists():
+        from lm5148_tool.lm5148_design_tool import extract_equation_images
+
+        images = extract_equation_images(pdf, Path(tempfile.mkdtemp(prefix="lm5148_eq_")), equation_numbers=EQUATION_NUMBERS)
+    elif images_dir is not None and images_dir.is_dir():
+        for path in sorted(images_dir.glob("eq_*_p*.png")):
+            images[int(path.name.split("_")[1])] = path
+    return images
+
+
+def make_job(
+    payload: dict[str, Any],
+    *,
+    template: Optional[Path] = TEMPLATE_DEFAULT,
+    images_dir: Optional[Path] = None,
+    pdf: Optional[Path] = None,
+) -> BundleJob:
+    """Run the design once and collect the shared inputs (equation images, template path)."""
+
+    inp = design_inputs_from_webapp(payload.get("inputs") or {})
+    res = run_design(inp)
+    payload = {**payload, "results": asdict(res)}
+
+    images = load_equation_images(images_dir=images_dir, pdf=pdf)
+    return BundleJob(inputs=inp, payload=payload, template=template, equation_images=images)
+
+
+def build_bundle(
+    job: BundleJob,
+    out: Path,
+    *,
+    artifacts: Optional[list[str]] = None,
+    executor: Optional[Executor] = None,
+) -> list[ArtifactTiming]:
+    """Run the exporters concurrently and write each artifact into `out` (ZIP) as soon as it is done.
+
+    Without an executor the exporters run one after another (the baseline the timings compare to).
+    A `manifest.json` with per-artifact timing is added last.
+    """
+
+    names = list(artifacts or EXPORTERS)
+    if job.template is None or not Path(job.template).exists():
+        names = [n for n in names if EXPORTERS[n] is not _export_quickstart]
+    unknown = set(names) - set(EXPORTERS)
+    if unknown:
+        raise KeyError(f"Unknown artifact: {', '.join(sorted(unknown))}")
+
+    timings: list[ArtifactTiming] = []
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+
+        def add(result: tuple[str, bytes, float, str]) -> None:
+            name, data, seconds, error = result
+            if not error:
+                stored = name.endswith(_STORED_SUFFIXES)
+                zf.writestr(name, data, compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED)
+            timings.append(ArtifactTiming(name, seconds, len(data), error))
+
+        if executor is None:
+            for name in names:
+                add(_run(name, job))
+        else:
+            for fut in as_completed([executor.submit(_run, name, job) for name in names]):
+                add(fut.result())
+
+        manifest = {"artifacts": [asdict(t) for t in timings], "inputs": job.payload.get("inputs")}
+        zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+    return timings
+
+
+def format_timings(timings: list[ArtifactTiming], wall_s: float) -> str:
+    lines = [f"{'artifact':36s} {'seconds':>8s} {'size':>10s}"]
+    for t in sorted(timings, key=lambda t: -t.seconds):
+        status = f"  FAILED: {t.error}" if t.error else ""
+        lines.append(f"{t.name:36s} {t.seconds:8.3f} {t.size_bytes:10,d}{status}")
+    total = sum(t.seconds for t in timings)
+    slowest = max((t.seconds for t in timings), default=0.0)
+    lines.append(f"Wall {wall_s:.3f} s (sum of exporters {total:.3f} s, slowest {slowest:.3f} s)")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compute the design once and write every export into one ZIP bundle.")
+    parser.add_argument("--json", type=str, required=True, help="lm5148_design.json (webapp/Streamlit export)")
+    parser.add_argument("--out", type=str, default=str(Path.cwd() / "lm5148_bundle.zip"))
+    parser.add_argument("--template", type=str, default=str(TEMPLATE_DEFAULT), help="TI quickstart .xlsm ('none' skips the fill)")
+    parser.add_argument("--images-dir", type=str, default=str(IMAGES_DIR_DEFAULT), help="Cached eq_<n>_p<page>.png images")
+    parser.add_argument("--pdf", type=str, default="", help="Extract fresh equation images from lm5148.pdf instead")
+    parser.add_argument("--only", action="append", default=[], help=f"Artifact to include (repeatable): {', '.join(EXPORTERS)}")
+    parser.add_argument("--executor", choices=("process", "thread", "serial"), default="process")
+    parser.add_argument("--workers", type=int, default=min(len(EXPORTERS), os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    payload = json.loads(Path(args.json).read_text(encoding="utf-8"))
+    if not isinstance(payload, dict) or "inputs" not in payload:
+        raise SystemExit("JSON must contain an 'inputs' object")
+
+    t0 = time.perf_counter()
+    job = make_job(
+        payload,
+        template=None if args.template == "none" else Path(args.template),
+        images_dir=Path(args.images_dir),
+        pdf=Path(args.pdf) if args.pdf else None,
+    )
+    if args.executor == "serial":
+        timings = build_bundle(job, Path(args.out), artifacts=args.only or None)
+    else:
+        pool_cls = ProcessPoolExecutor if args.executor == "process" else ThreadPoolExecutor
+        with pool_cls(max_workers=args.workers) as pool:
+            timings = build_bundle(job, Path(args.out), artifacts=args.only or None, executor=pool)
+    print(format_timings(timings, time.perf_counter() - t0))
+    print(f"Wrote: {args.out}")
+    return 1 if any(t.error for t in timings) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
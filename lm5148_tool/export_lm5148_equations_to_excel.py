@@ -10,6 +10,11 @@ from openpyxl import Workbook
 from openpyxl.drawing.image import Image as XLImage
 from openpyxl.utils import get_column_letter
 
+try:
+    from lm5148_tool.profiling import profile_session, stage
+except ImportError:  # run as a script from inside lm5148_tool/
+    from profiling import profile_session, stage
+
 
 @dataclass(frozen=True)
 class EquationItem:
@@ -125,9 +130,11 @@ def build_context(blocks_sorted: List[dict], idx: int) -> str:
 
 def render_crop(page: fitz.Page, rect: fitz.Rect, *, zoom: float, out_path: Path) -> None:
     mat = fitz.Matrix(zoom, zoom)
-    pix = page.get_pixmap(matrix=mat, clip=rect, alpha=False)
+    with stage("pdf.render"):
+        pix = page.get_pixmap(matrix=mat, clip=rect, alpha=False)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    pix.save(out_path.as_posix())
+    with stage("pdf.save_png"):
+        pix.save(out_path.as_posix())
 
 
 def dedupe(items: Iterable[Tuple[int, str, Tuple[float, float, float, float]]]) -> List[Tuple[int, str, Tuple[float, float, float, float]]]:
@@ -161,25 +168,26 @@ def write_excel(equations: List[EquationItem], xlsx_path: Path) -> None:
     ws.column_dimensions["E"].width = 24
 
     start_row = 2
-    for i, eq in enumerate(equations, start=start_row):
-        ws.cell(row=i, column=1, value=eq.eq_id)
-        ws.cell(row=i, column=2, value=eq.page)
-        ws.cell(row=i, column=3, value=eq.text)
-        ws.cell(row=i, column=4, value=eq.context)
-
-        # Insert snapshot image
-        try:
-            img = XLImage(eq.image_path)
-            # Fit image roughly into the cell area
-            img.width = 240
-            img.height = int(img.height * (240 / max(1, img.width)))
-            anchor = f"E{i}"
-            ws.add_image(img, anchor)
-            # Increase row height to fit
-            ws.row_dimensions[i].height = max(ws.row_dimensions[i].height or 15, int(img.height * 0.75))
-        except Exception:
-            # If image fails, continue without embedding
-            pass
+    with stage("xlsx.write_rows"):
+        for i, eq in enumerate(equations, start=start_row):
+            ws.cell(row=i, column=1, value=eq.eq_id)
+            ws.cell(row=i, column=2, value=eq.page)
+            ws.cell(row=i, column=3, value=eq.text)
+            ws.cell(row=i, column=4, value=eq.context)
+
+            # Insert snapshot image
+            try:
+                img = XLImage(eq.image_path)
+                # Fit image roughly into the cell area
+                img.width = 240
+                img.height = int(img.height * (240 / max(1, img.width)))
+                anchor = f"E{i}"
+                ws.add_image(img, anchor)
+                # Increase row height to fit
+                ws.row_dimensions[i].height = max(ws.row_dimensions[i].height or 15, int(img.height * 0.75))
+            except Exception:
+                # If image fails, continue without embedding
+                pass
 
     # Freeze header row
     ws.freeze_panes = "A2"
@@ -188,7 +196,75 @@ def write_excel(equations: List[EquationItem], xlsx_path: Path) -> None:
     ws.auto_filter.ref = f"A1:{get_column_letter(ws.max_column)}{ws.max_row}"
 
     xlsx_path.parent.mkdir(parents=True, exist_ok=True)
-    wb.save(xlsx_path.as_posix())
+    with stage("xlsx.save"):
+        wb.save(xlsx_path.as_posix())
+
+
+def extract_equations(
+    pdf_path: Path,
+    images_dir: Path,
+    *,
+    zoom: float,
+    min_len: int,
+    require_equals: bool,
+) -> List[EquationItem]:
+    with stage("pdf.open"):
+        doc = fitz.open(pdf_path.as_posix())
+    with doc:
+        candidates: List[Tuple[int, str, Tuple[float, float, float, float], str]] = []
+
+        for page_index in range(doc.page_count):
+            with stage("pdf.extract_blocks"):
+                page = doc.load_page(page_index)
+                blocks = sorted_blocks_by_position(extract_text_blocks(page))
+
+            with stage("pdf.classify"):
+                for idx, b in enumerate(blocks):
+                    txt = block_text(b)
+                    if not txt:
+                        continue
+                    if not looks_like_equation(txt, min_len=min_len, require_equals=require_equals):
+                        continue
+
+                    bbox = block_bbox(b)
+                    ctx = build_context(blocks, idx)
+                    candidates.append((page_index + 1, txt, bbox, ctx))
+
+        # Deduplicate by (page,text,bbox)
+        deduped_keyed = dedupe((p, t, bb) for (p, t, bb, _ctx) in candidates)
+
+        # Rebuild with context (best-effort: pick first matching context)
+        eq_items: List[EquationItem] = []
+        eq_id = 1
+
+        # Map back contexts
+        ctx_map = {}
+        for p, t, bb, ctx in candidates:
+            key = (p, normalize_equation_text(t), tuple(round(v, 1) for v in bb))
+            ctx_map.setdefault(key, ctx)
+
+        for page_num, text_norm, bbox in deduped_keyed:
+            page = doc.load_page(page_num - 1)
+            rect = fitz.Rect(bbox)
+            img_path = images_dir / f"eq_p{page_num:03d}_{eq_id:04d}.png"
+            render_crop(page, rect, zoom=zoom, out_path=img_path)
+
+            key = (page_num, text_norm, tuple(round(v, 1) for v in bbox))
+            ctx = ctx_map.get(key, "")
+
+            eq_items.append(
+                EquationItem(
+                    eq_id=eq_id,
+                    page=page_num,
+                    text=text_norm,
+                    context=ctx,
+                    bbox=bbox,
+                    image_path=img_path.as_posix(),
+                )
+            )
+            eq_id += 1
+
+    return eq_items
 
 
 def main() -> int:
@@ -232,6 +308,11 @@ def main() -> int:
         default=True,
         help="If set (default), only keep candidates containing '=', '≤', '≥', '≈', or '≠'.",
     )
+    parser.add_argument(
+        "--profile",
+        default="",
+        help="Write per-stage timing/memory as a Chrome-trace JSON to this path.",
+    )
 
     args = parser.parse_args()
 
@@ -242,65 +323,25 @@ def main() -> int:
     images_dir = Path(args.images_dir)
     out_xlsx = Path(args.out)
 
-    doc = fitz.open(pdf_path.as_posix())
-
-    candidates: List[Tuple[int, str, Tuple[float, float, float, float], str]] = []
-
-    for page_index in range(doc.page_count):
-        page = doc.load_page(page_index)
-        blocks = sorted_blocks_by_position(extract_text_blocks(page))
-
-        for idx, b in enumerate(blocks):
-            txt = block_text(b)
-            if not txt:
-                continue
-            if not looks_like_equation(txt, min_len=args.min_len, require_equals=args.require_equals):
-                continue
-
-            bbox = block_bbox(b)
-            ctx = build_context(blocks, idx)
-            candidates.append((page_index + 1, txt, bbox, ctx))
-
-    # Deduplicate by (page,text,bbox)
-    deduped_keyed = dedupe((p, t, bb) for (p, t, bb, _ctx) in candidates)
-
-    # Rebuild with context (best-effort: pick first matching context)
-    eq_items: List[EquationItem] = []
-    eq_id = 1
-
-    # Map back contexts
-    ctx_map = {}
-    for p, t, bb, ctx in candidates:
-        key = (p, normalize_equation_text(t), tuple(round(v, 1) for v in bb))
-        ctx_map.setdefault(key, ctx)
-
-    for page_num, text_norm, bbox in deduped_keyed:
-        page = doc.load_page(page_num - 1)
-        rect = fitz.Rect(bbox)
-        img_path = images_dir / f"eq_p{page_num:03d}_{eq_id:04d}.png"
-        render_crop(page, rect, zoom=args.zoom, out_path=img_path)
-
-        key = (page_num, text_norm, tuple(round(v, 1) for v in bbox))
-        ctx = ctx_map.get(key, "")
-
-        eq_items.append(
-            EquationItem(
-                eq_id=eq_id,
-                page=page_num,
-                text=text_norm,
-                context=ctx,
-                bbox=bbox,
-                image_path=img_path.as_posix(),
-            )
+    profile_path = Path(args.profile) if args.profile else None
+    with profile_session(profile_path) as prof:
+        eq_items = extract_equations(
+            pdf_path,
+            images_dir,
+            zoom=args.zoom,
+            min_len=args.min_len,
+            require_equals=args.require_equals,
         )
-        eq_id += 1
 
-    write_excel(eq_items, out_xlsx)
+        write_excel(eq_items, out_xlsx)
 
     print(f"PDF: {pdf_path}")
     print(f"Equations found: {len(eq_items)}")
     print(f"Excel written: {out_xlsx.resolve()}")
     print(f"Images dir: {images_dir.resolve()}")
+    if prof is not None:
+        print(prof.format_table())
+        print(f"Profile written: {profile_path}")
 
     return 0
 
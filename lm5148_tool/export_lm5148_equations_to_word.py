@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import argparse
 from pathlib import Path
+from typing import BinaryIO, Union
 
 from docx import Document
 from docx.oxml import parse_xml
@@ -9,14 +10,18 @@ from docx.oxml.ns import nsdecls
 from xml.sax.saxutils import escape
 
 
-def add_omml_equation(paragraph, linear: str) -> None:
-    """Insert a Word equation object (OMML) containing the given linear math string."""
-    eq_xml = (
+def omml_xml(linear: str) -> str:
+    """OMML markup of a Word equation object containing the given linear math string."""
+    return (
         f'<m:oMathPara {nsdecls("m")}>'
         f"<m:oMath><m:r><m:t xml:space=\"preserve\">{escape(linear)}</m:t></m:r></m:oMath>"
         f"</m:oMathPara>"
     )
-    paragraph._p.append(parse_xml(eq_xml))
+
+
+def add_omml_equation(paragraph, linear: str) -> None:
+    """Insert a Word equation object (OMML) containing the given linear math string."""
+    paragraph._p.append(parse_xml(omml_xml(linear)))
 
 
 def build_equations() -> list[dict[str, str]]:
@@ -101,18 +106,8 @@ def build_equations() -> list[dict[str, str]]:
     ]
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Export LM5148 datasheet equations (pages 36-39) to a Word .docx using Word equation objects.")
-    parser.add_argument(
-        "--out",
-        type=str,
-        default=str(Path.cwd() / "lm5148_equations_pages_36_39.docx"),
-        help="Output .docx path",
-    )
-    args = parser.parse_args()
-
-    out_path = Path(args.out)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
+def write_equations_docx(out: Union[Path, BinaryIO]) -> None:
+    """Write the equations document to a path or a binary stream (the export bundle uses a BytesIO)."""
 
     doc = Document()
     doc.add_heading("LM5148 Equations (Datasheet pages 36–39)", level=1)
@@ -127,7 +122,22 @@ def main() -> int:
         p = doc.add_paragraph()
         add_omml_equation(p, item["eq"])
 
-    doc.save(out_path)
+    doc.save(str(out) if isinstance(out, Path) else out)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export LM5148 datasheet equations (pages 36-39) to a Word .docx using Word equation objects.")
+    parser.add_argument(
+        "--out",
+        type=str,
+        default=str(Path.cwd() / "lm5148_equations_pages_36_39.docx"),
+        help="Output .docx path",
+    )
+    args = parser.parse_args()
+
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    write_equations_docx(out_path)
     print(f"Wrote: {out_path}")
     return 0
 
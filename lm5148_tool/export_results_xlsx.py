@@ -1,19 +1,26 @@
 from __future__ import annotations
 
 import io
+import math
 from dataclasses import asdict
-from typing import Any
+from typing import TYPE_CHECKING, Any, Optional
 
-import xlsxwriter
+if TYPE_CHECKING:
+    from lm5148_tool.board import BoardReport
+    from lm5148_tool.envelope import Envelope
 
 
-def build_results_xlsx_bytes(*, inputs: dict[str, Any], results: dict[str, Any]) -> bytes:
+def build_results_xlsx_bytes(
+    *, inputs: dict[str, Any], results: dict[str, Any], envelope: Optional["Envelope"] = None
+) -> bytes:
     """Create a simple, standalone .xlsx report as bytes.
 
     This is intentionally lightweight so it can be used from Streamlit (download button)
-    without touching Excel/COM.
+    without touching Excel/COM. With `envelope` (see envelope.py) an "Envelope" sheet is added.
     """
 
+    import xlsxwriter
+
     bio = io.BytesIO()
     wb = xlsxwriter.Workbook(bio, {"in_memory": True})
 
@@ -52,5 +59,119 @@ def build_results_xlsx_bytes(*, inputs: dict[str, Any], results: dict[str, Any])
             ws.write(row, 1, str(v))
         row += 1
 
+    if envelope is not None:
+        _write_envelope_sheet(wb, envelope, header, key_fmt, num_fmt)
+
+    wb.close()
+    return bio.getvalue()
+
+
+def _write_envelope_sheet(wb, env: "Envelope", header, key_fmt, num_fmt) -> None:
+    from lm5148_tool.envelope import ENVELOPE_METRICS
+
+    ws = wb.add_worksheet("Envelope")
+    sci_fmt = wb.add_format({"num_format": "0.000E+00"})
+    ws.set_column(0, 0, 24)
+    ws.set_column(1, 7, 13)
+
+    ws.write_row(0, 0, ["Metric", "Max", "@ VIN [V]", "@ IOUT [A]", "Min", "@ VIN [V]", "@ IOUT [A]", "run_design"], header)
+    labels = {key: f"{label} [{unit}]" for key, label, unit in ENVELOPE_METRICS}
+    for r, e in enumerate(env.extremes, start=1):
+        ws.write(r, 0, labels[e.metric], key_fmt)
+        for c, v in enumerate(
+            [e.max_value, e.max_vin_v, e.max_iout_a, e.min_value, e.min_vin_v, e.min_iout_a, e.point_value], start=1
+        ):
+            # Excel has no inf: an infeasible Eq.40 point is written as text.
+            if math.isfinite(v):
+                ws.write_number(r, c, v, sci_fmt)
+            else:
+                ws.write(r, c, str(v))
+
+    # Full-load curves vs VIN, with one chart per metric.
+    curves = env.at_full_load()
+    top = len(env.extremes) + 3
+    ws.write(top - 1, 0, f"Full load (IOUT = {env.iout_a[-1]:.4g} A)", key_fmt)
+    ws.write(top, 0, "VIN [V]", header)
+    for c, (key, label, unit) in enumerate(ENVELOPE_METRICS, start=1):
+        ws.write(top, c, f"{label} [{unit}]", header)
+    n = len(curves["vin_v"])
+    ws.write_column(top + 1, 0, [float(x) for x in curves["vin_v"]], num_fmt)
+    for c, (key, _, _) in enumerate(ENVELOPE_METRICS, start=1):
+        values = [float(x) if math.isfinite(x) else None for x in curves[key]]
+        for r, v in enumerate(values, start=top + 1):
+            if v is None:
+                ws.write_blank(r, c, None)
+            else:
+                ws.write_number(r, c, v, sci_fmt)
+
+    for k, (key, label, unit) in enumerate(ENVELOPE_METRICS):
+        chart = wb.add_chart({"type": "scatter", "subtype": "straight"})
+        chart.add_series(
+            {
+                "name": label,
+                "categories": ["Envelope", top + 1, 0, top + n, 0],
+                "values": ["Envelope", top + 1, k + 1, top + n, k + 1],
+            }
+        )
+        chart.set_title({"name": f"{label} vs VIN"})
+        chart.set_x_axis({"name": "VIN [V]"})
+        chart.set_y_axis({"name": unit})
+        chart.set_legend({"none": True})
+        ws.insert_chart(1 + 16 * k, 9, chart, {"x_scale": 1.0, "y_scale": 1.0})
+
+
+def build_board_xlsx_bytes(report: "BoardReport") -> bytes:
+    """One workbook for a whole board: bus summary, one row per rail, and fsw collisions."""
+
+    import xlsxwriter
+
+    from lm5148_tool.lm5148_batch import INPUT_FIELDS, RESULT_FIELDS
+
+    bio = io.BytesIO()
+    wb = xlsxwriter.Workbook(bio, {"in_memory": True, "nan_inf_to_errors": True})
+    header = wb.add_format({"bold": True, "bg_color": "#F2F2F2", "border": 1})
+    key_fmt = wb.add_format({"bold": True})
+    sci_fmt = wb.add_format({"num_format": "0.000E+00"})
+
+    ws = wb.add_worksheet("Board")
+    ws.set_column(0, 0, 32)
+    ws.set_column(1, 1, 16)
+    ws.write(0, 0, "Bus", header)
+    ws.write(0, 1, "", header)
+    summary = [
+        ("Rails", len(report.rails)),
+        ("DC input current [A]", report.bus_iin_dc_a),
+        ("Cin RMS, unsynchronized (RSS) [A]", report.bus_cin_rms_rss_a),
+        ("Cin RMS, common SYNC edge [A]", report.bus_cin_rms_in_phase_a),
+        ("Total Cin required (Eq40) [F]", report.total_cin_required_f),
+        ("Total Cout (Eq36) [F]", report.total_cout_f),
+        ("fsw collisions", len(report.collisions)),
+    ]
+    for r, (k, v) in enumerate(summary, start=1):
+        ws.write(r, 0, k, key_fmt)
+        ws.write_number(r, 1, float(v), sci_fmt)
+
+    ws = wb.add_worksheet("Rails")
+    columns = ["name"] + INPUT_FIELDS + RESULT_FIELDS + ["cin_rms_at_duty_a", "iin_dc_a"]
+    ws.write_row(0, 0, columns, header)
+    ws.freeze_panes(1, 1)
+    ws.set_column(0, len(columns) - 1, 14)
+    for r, (rail, res, rms, iin) in enumerate(
+        zip(report.rails, report.results, report.cin_rms_a, report.iin_dc_a), start=1
+    ):
+        ws.write(r, 0, rail.name, key_fmt)
+        values = [getattr(rail.inputs, k) for k in INPUT_FIELDS] + [res[k] for k in RESULT_FIELDS] + [rms, iin]
+        for c, v in enumerate(values, start=1):
+            if v is None:
+                ws.write_blank(r, c, None)
+            else:
+                ws.write_number(r, c, float(v), sci_fmt)
+
+    ws = wb.add_worksheet("Collisions")
+    ws.set_column(0, 4, 16)
+    ws.write_row(0, 0, ["Rail A", "Harmonic A", "Rail B", "Harmonic B", "Beat [Hz]"], header)
+    for r, c in enumerate(report.collisions, start=1):
+        ws.write_row(r, 0, [c.rail_a, c.harmonic_a, c.rail_b, c.harmonic_b, c.beat_hz])
+
     wb.close()
     return bio.getvalue()
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Mapping, Optional, Sequence
+
+import numpy as np
+
+from lm5148_tool.lm5148_batch import INPUT_FIELDS, RESULT_FIELDS, complete_columns, run_design_columns
+from lm5148_tool.lm5148_core import design_inputs_from_webapp
+from lm5148_tool.lm5148_jacobian import jacobian_columns
+from lm5148_tool.results_db import Constraint, parse_constraint, parse_value
+
+
+# Search ranges for the inputs engineers usually leave free (LM5148: 100 kHz - 2.2 MHz).
+FREE_BOUNDS_DEFAULT: dict[str, tuple[float, float]] = {
+    "fsw_hz": (100e3, 2.2e6),
+    "l_used_h": (10e-9, 100e-6),
+    "ripple_frac": (0.05, 1.0),
+    "rcomp_ohm": (100.0, 1e6),
+}
+
+MAX_ITER = 60
+REL_TOL = 1e-10
+
+# Per-row outcome of the solve.
+STATUS_OK = "ok"
+STATUS_ESR_LIMIT = "esr_limit"  # ESR ripple alone reaches the target; no free input can fix it
+STATUS_OUT_OF_RANGE = "out_of_range"  # target not reachable inside the free-input bounds
+STATUS_NOT_CONVERGED = "not_converged"
+
+
+@dataclass
+class InverseSolution:
+    # Free inputs found, one array per free field (NaN where the row is infeasible).
+    inputs: dict[str, np.ndarray]
+    # All results at the solution (run_design_columns output).
+    results: dict[str, np.ndarray]
+    status: np.ndarray
+    # Largest relative target error per row.
+    residual: np.ndarray
+    iterations: int
+    # Extra `<=`/`>=` requirements checked at the solution: constraint text -> pass/fail per row.
+    checks: dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.status)
+
+
+def _esr_limited(cols: Mapping[str, np.ndarray], free: Sequence[str], targets: Mapping[str, np.ndarray]) -> np.ndarray:
+    """Rows where an ESR term alone already reaches a target, whatever the free inputs are."""
+
+    n = len(next(iter(targets.values())))
+    bad = np.zeros(n, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        if "vout_ripple_pp_v" in targets and "ripple_frac" not in free and "iout_a" not in free:
+            # Eq.37: Vripple >= ΔIL * ESR for any Fsw / L / Cout.
+            esr_floor = cols["ripple_frac"] * cols["iout_a"] * cols["rout_esr_ohm"]
+            bad |= targets["vout_ripple_pp_v"] <= esr_floor
+        if "cin_required_f" in targets:
+            # Eq.40 is infinite once ESR ripple exceeds the input ripple spec (independent of Fsw).
+            esr_ripple = cols["iout_a"] * 0.5 * cols["rin_esr_ohm"]
+            bad |= esr_ripple >= cols["vin_ripple_pp_v"]
+    return bad
+
+
+def _solve_bracketed(
+    cols: dict[str, np.ndarray], name: str, result: str, target: np.ndarray, lo: float, hi: float, active: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """One free input, one target: Illinois (regula falsi) in log space, kept inside the bracket."""
+
+    def g(u: np.ndarray) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (run_design_columns({**cols, name: np.exp(u)})[result] - target) / np.abs(target)
+
+    n = len(target)
+    a = np.full(n, np.log(lo))
+    b = np.full(n, np.log(hi))
+    ga, gb = g(a), g(b)
+    bracketed = active & np.isfinite(ga) & np.isfinite(gb) & (np.sign(ga) != np.sign(gb))
+    # A bound already on target counts as a bracket.
+    bracketed |= active & ((ga == 0.0) | (gb == 0.0))
+
+    side = np.zeros(n, dtype=np.int8)
+    u = np.where(np.abs(ga) < np.abs(gb), a, b)
+    it = 0
+    for it in range(1, MAX_ITER + 1):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = np.where(gb != ga, b - gb * (b - a) / (gb - ga), 0.5 * (a + b))
+        u = np.where(np.isfinite(u) & (u > np.minimum(a, b)) & (u < np.maximum(a, b)), u, 0.5 * (a + b))
+        gu = g(u)
+        same_as_a = np.sign(gu) == np.sign(ga)
+        # Illinois: halve the stale endpoint's value when the same side is kept twice.
+        ga_new = np.where(same_as_a, gu, np.where(side == -1, ga * 0.5, ga))
+        gb_new = np.where(same_as_a, np.where(side == 1, gb * 0.5, gb), gu)
+        a = np.where(same_as_a, u, a)
+        b = np.where(same_as_a, b, u)
+        side = np.where(same_as_a, 1, -1).astype(np.int8)
+        ga, gb = ga_new, gb_new
+        if np.all(~bracketed | (np.abs(gu) < REL_TOL) | (np.abs(b - a) < 1e-13)):
+            break
+    return np.exp(u), bracketed, np.abs(g(u)), it
+
+
+def _solve_newton(
+    cols: dict[str, np.ndarray],
+    free: Sequence[str],
+    targets: Mapping[str, np.ndarray],
+    bounds: Mapping[str, tuple[float, float]],
+    active: np.ndarray,
+) -> tuple[dict[str, np.ndarray], np.ndarray, int]:
+    """Square systems: damped Newton in log space with the analytic Jacobian, clamped to the bounds."""
+
+    fi = [INPUT_FIELDS.index(f) for f in free]
+    ri = [RESULT_FIELDS.index(r) for r in targets]
+    t = np.stack(list(targets.values()), axis=-1)
+    lo = np.log([bounds[f][0] for f in free])
+    hi = np.log([bounds[f][1] for f in free])
+    # Start at the geometric middle of each range.
+    u = np.broadcast_to(0.5 * (lo + hi), t.shape[:1] + (len(free),)).copy()
+
+    def evaluate(u: np.ndarray, rows: np.ndarray):
+        # Only the rows still iterating are re-evaluated.
+        trial = {**{k: v[rows] for k, v in cols.items()}, **{f: np.exp(u[:, k]) for k, f in enumerate(free)}}
+        res, jac = jacobian_columns(trial)
+        tr = t[rows]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.stack([res[k] for k in targets], axis=-1)
+            err = (r - tr) / np.abs(tr)
+            # d(err)/d(log x) = J * x / |t|
+            j = jac[:, ri][:, :, fi] * np.exp(u)[:, None, :] / np.abs(tr)[:, :, None]
+        return err, j
+
+    err, j = evaluate(u, np.arange(len(u)))
+    stalled = np.zeros(len(u), dtype=bool)
+    it = 0
+    for it in range(1, MAX_ITER + 1):
+        norm = np.max(np.abs(err), axis=-1)
+        todo = active & ~stalled & ~(norm < REL_TOL)
+        if not np.any(todo):
+            break
+        ok = todo & np.all(np.isfinite(j), axis=(1, 2)) & np.all(np.isfinite(err), axis=-1)
+        stalled |= todo & ~ok
+        rows = np.flatnonzero(ok)
+        if not len(rows):
+            break
+        step = -_batched_step(j[rows], err[rows])
+        # Backtrack per row until the residual drops.
+        scale = 1.0
+        for _ in range(8):
+            trial_u = np.clip(u[rows] + scale * step, lo, hi)
+            trial_err, trial_j = evaluate(trial_u, rows)
+            better = np.max(np.abs(trial_err), axis=-1) < norm[rows]
+            done = rows[better]
+            u[done], err[done], j[done] = trial_u[better], trial_err[better], trial_j[better]
+            rows, step = rows[~better], step[~better]
+            if not len(rows):
+                break
+            scale *= 0.5
+        # No descent even after backtracking: converged as far as the bounds/precision allow.
+        stalled[rows] = True
+    return {f: np.exp(u[:, k]) for k, f in enumerate(free)}, np.max(np.abs(err), axis=-1), it
+
+
+def _batched_step(j: np.ndarray, err: np.ndarray) -> np.ndarray:
+    try:
+        return np.linalg.solve(j, err[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        # Singular rows: least-squares per row.
+        return np.stack([np.linalg.lstsq(jj, ee, rcond=None)[0] for jj, ee in zip(j, err)])
+
+
+def solve_inverse(
+    fixed: Mapping[str, object],
+    free: Sequence[str],
+    targets: Mapping[str, object],
+    *,
+    bounds: Optional[Mapping[str, tuple[float, float]]] = None,
+    checks: Sequence[Constraint] = (),
+) -> InverseSolution:
+    """Find `free` inputs so each target result hits its value, for many target sets at once.
+
+    `fixed` and `targets` map field names to scalars or equal-length arrays (one row per target set);
+    missing inputs take the `DesignInputs()` defaults. `len(free)` must equal `len(targets)`.
+    One free input uses a bracketed root find; several use Newton with the analytic Jacobian.
+    `checks` are extra `<=`/`>=` requirements (e.g. `cout_load_off_f<=44u`) evaluated at the solution.
+    """
+
+    free = list(free)
+    if len(free) != len(targets) or not free:
+        raise ValueError(f"Need as many targets as free inputs (got {len(targets)} target(s), {len(free)} free)")
+    unknown = [f for f in free if f not in INPUT_FIELDS] + [r for r in targets if r not in RESULT_FIELDS]
+    if unknown:
+        raise KeyError(f"Unknown field(s): {', '.join(unknown)}")
+    bounds = {**FREE_BOUNDS_DEFAULT, **(bounds or {})}
+    missing = [f for f in free if f not in bounds]
+    if missing:
+        raise ValueError(f"No search bounds for: {', '.join(missing)}")
+
+    base = complete_columns(fixed)
+    shape = np.broadcast_shapes(*(a.shape for a in base.values()), *(np.shape(v) for v in targets.values()))
+    tgt = {k: np.broadcast_to(np.asarray(v, dtype=np.float64), shape).ravel() for k, v in targets.items()}
+    cols = {k: np.broadcast_to(v, shape).ravel() for k, v in base.items() if k not in free}
+    n = len(next(iter(tgt.values())))
+
+    status = np.full(n, STATUS_OK, dtype="<U16")
+    esr = _esr_limited(complete_columns(cols), free, tgt)
+    status[esr] = STATUS_ESR_LIMIT
+    active = ~esr
+
+    if len(free) == 1:
+        (name,), (result,) = free, list(tgt)
+        x, bracketed, residual, iterations = _solve_bracketed(cols, name, result, tgt[result], *bounds[name], active)
+        status[active & ~bracketed] = STATUS_OUT_OF_RANGE
+        solution = {name: x}
+    else:
+        solution, residual, iterations = _solve_newton(cols, free, tgt, bounds, active)
+        # Newton stalls on a bound when the target is outside the reachable range.
+        on_bound = np.zeros(n, dtype=bool)
+        for f in free:
+            lo, hi = bounds[f]
+            on_bound |= np.isclose(solution[f], lo, rtol=1e-9) | np.isclose(solution[f], hi, rtol=1e-9)
+        stuck = active & ~(residual < 1e-6)
+        status[stuck & on_bound] = STATUS_OUT_OF_RANGE
+        status[stuck & ~on_bound] = STATUS_NOT_CONVERGED
+
+    failed = status != STATUS_OK
+    solution = {k: np.where(failed, np.nan, v) for k, v in solution.items()}
+    res = run_design_columns({**cols, **solution})
+    all_cols = {**complete_columns({**cols, **solution}), **res}
+    checked = {}
+    for c in checks:
+        values = all_cols[c.column]
+        ok = {"<": values < c.value, "<=": values <= c.value, ">": values > c.value, ">=": values >= c.value}.get(c.op)
+        if ok is None:
+            ok = np.isclose(values, c.value) if c.op == "=" else ~np.isclose(values, c.value)
+        checked[f"{c.column}{c.op}{c.value:g}"] = ok & ~failed
+
+    return InverseSolution(
+        inputs=solution,
+        results=res,
+        status=status,
+        residual=np.where(failed, np.nan, residual),
+        iterations=iterations,
+        checks=checked,
+    )
+
+
+def parse_target(text: str) -> tuple[str, np.ndarray]:
+    """`result=value[,value...]` with SI prefixes, e.g. `vout_ripple_pp_v=5m,10m,20m`."""
+
+    name, _, values = text.partition("=")
+    if not values:
+        raise ValueError(f"Target must look like result=value: {text!r}")
+    return name.strip(), np.array([parse_value(v) for v in values.split(",") if v.strip()])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Inverse design: solve free inputs (fsw, L, ripple_frac, rcomp) so results hit targets."
+    )
+    parser.add_argument("--json", type=str, default="", help="lm5148_design.json with the fixed inputs (default: DesignInputs())")
+    parser.add_argument("--free", action="append", required=True, help=f"Free input, one of {', '.join(FREE_BOUNDS_DEFAULT)}")
+    parser.add_argument(
+        "--target",
+        action="append",
+        required=True,
+        help="Target result, e.g. vout_ripple_pp_v=10m; a comma list solves every combination",
+    )
+    parser.add_argument("--bound", action="append", default=[], help="Search range for a free input, e.g. fsw_hz=300k:1.2M")
+    parser.add_argument("--check", action="append", default=[], help="Requirement at the solution, e.g. 'cin_required_f<=40u'")
+    parser.add_argument("--out", type=str, default="", help="Optional JSON output path")
+    args = parser.parse_args()
+
+    fixed: dict[str, object] = {}
+    if args.json:
+        inp = design_inputs_from_webapp(json.loads(Path(args.json).read_text(encoding="utf-8")).get("inputs") or {})
+        fixed = {k: (np.nan if getattr(inp, k) is None else getattr(inp, k)) for k in INPUT_FIELDS}
+
+    parsed = [parse_target(t) for t in args.target]
+    combos = np.array(list(itertools.product(*(v for _, v in parsed))))
+    targets = {name: combos[:, k] for k, (name, _) in enumerate(parsed)}
+    bounds = {}
+    for item in args.bound:
+        name, _, rng = item.partition("=")
+        lo, _, hi = rng.partition(":")
+        bounds[name.strip()] = (parse_value(lo), parse_value(hi))
+    checks = [parse_constraint(c) for c in args.check]
+
+    sol = solve_inverse(fixed, args.free, targets, bounds=bounds, checks=checks)
+
+    header = list(targets) + list(sol.inputs) + ["status"] + list(sol.checks)
+    print("\t".join(header))
+    rows = []
+    for i in range(sol.n_rows):
+        row = {k: float(v[i]) for k, v in targets.items()}
+        row.update({k: float(v[i]) for k, v in sol.inputs.items()})
+        row["status"] = str(sol.status[i])
+        row.update({k: bool(v[i]) for k, v in sol.checks.items()})
+        rows.append(row)
+        print("\t".join(f"{v:.6g}" if isinstance(v, float) else str(v) for v in row.values()))
+    n_ok = int(np.sum(sol.status == STATUS_OK))
+    print(f"{n_ok}/{sol.n_rows} target set(s) solved in {sol.iterations} iteration(s)")
+
+    if args.out:
+        clean = [{k: (None if isinstance(v, float) and not np.isfinite(v) else v) for k, v in r.items()} for r in rows]
+        Path(args.out).write_text(json.dumps(clean, indent=1), encoding="utf-8")
+    return 0 if n_ok == sol.n_rows else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
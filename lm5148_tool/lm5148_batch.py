@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, fields
+from typing import Callable, Iterable, Mapping, Optional
+
+import numpy as np
+
+from lm5148_tool.lm5148_core import DesignInputs, DesignResults
+
+
+# Numeric DesignInputs fields, in dataclass order. `l_used_h=None` ("use L required") and
+# `vin_min_v=None` ("same as VIN nom") are stored as NaN.
+INPUT_FIELDS: list[str] = [f.name for f in fields(DesignInputs) if f.name != "pdf_path"]
+RESULT_FIELDS: list[str] = [f.name for f in fields(DesignResults)]
+
+# One sweep row: every input next to every result, float64 throughout.
+DESIGN_DTYPE = np.dtype([(name, "<f8") for name in INPUT_FIELDS + RESULT_FIELDS])
+# Screening mode: same layout at half the size (see `run_design_records(precision="float32")`).
+DESIGN_DTYPE_F32 = np.dtype([(name, "<f4") for name in INPUT_FIELDS + RESULT_FIELDS])
+RECORD_DTYPES = {"float64": DESIGN_DTYPE, "float32": DESIGN_DTYPE_F32}
+
+# Largest condition number of a cancelling subtraction accepted in float32 (eps 1.2e-7 times
+# this is ~1e-4 relative error); rows above it are recomputed in float64.
+CONDITION_LIMIT = 1e3
+
+_DEFAULTS = DesignInputs()
+
+
+def inputs_to_columns(inputs: Iterable[DesignInputs]) -> dict[str, np.ndarray]:
+    rows = list(inputs)
+    cols: dict[str, np.ndarray] = {}
+    for name in INPUT_FIELDS:
+        values = [getattr(inp, name) for inp in rows]
+        cols[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return cols
+
+
+def complete_columns(cols: Mapping[str, object], dtype: np.dtype = np.float64) -> dict[str, np.ndarray]:
+    """Broadcast partial input columns to a common length, filling missing fields from `DesignInputs()`."""
+
+    unknown = set(cols) - set(INPUT_FIELDS)
+    if unknown:
+        raise KeyError(f"Unknown input field(s): {', '.join(sorted(unknown))}")
+
+    arrays = {name: np.asarray(value, dtype=dtype) for name, value in cols.items()}
+    shape = np.broadcast_shapes(*(a.shape for a in arrays.values())) if arrays else (1,)
+    out: dict[str, np.ndarray] = {}
+    for name in INPUT_FIELDS:
+        if name in arrays:
+            out[name] = np.broadcast_to(arrays[name], shape)
+        else:
+            default = getattr(_DEFAULTS, name)
+            out[name] = np.full(shape, np.nan if default is None else default, dtype=dtype)
+    return out
+
+
+# Each stage computes a few results (and the intermediates later stages use) from the inputs
+# and earlier stages. `run_design_columns` runs them all; `constrained_eval` runs only those a
+# constraint needs, on the rows still alive.
+
+
+def _stage_inductor(v: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    vin_nom, vin_max, vout, fsw = v["vin_nom_v"], v["vin_max_v"], v["vout_v"], v["fsw_hz"]
+    duty_nom = np.clip(vout / vin_nom, 0.0, 0.95)
+
+    # Eq.31
+    delta_il_nom = v["ripple_frac"] * v["iout_a"]
+    l_req = (vout * (vin_nom - vout)) / (vin_nom * fsw * delta_il_nom)
+    l_used = np.where(np.isnan(v["l_used_h"]), l_req, v["l_used_h"])
+
+    # Eq.32
+    delta_il_vin_max = (vout * (vin_max - vout)) / (vin_max * l_used * fsw)
+    return {
+        "duty_nom": duty_nom,
+        "delta_il_nom_a": delta_il_nom,
+        "l_required_h": l_req,
+        "l_used": l_used,
+        "delta_il_vin_max_a": delta_il_vin_max,
+        "il_peak_vin_max_a": v["iout_a"] + delta_il_vin_max / 2.0,
+    }
+
+
+def _stage_sense(v: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    # Eq.34 / Eq.35
+    vcs_th = v["vcs_th_v"]
+    rsense = vcs_th / (v["il_pk_margin"] * v["il_peak_vin_max_a"])
+    il_pk_short = vcs_th / rsense + v["vin_max_v"] * v["t_delay_isns_s"] / v["l_used"]
+    return {"rsense_ohm": rsense, "il_peak_short_a": il_pk_short}
+
+
+def _stage_cout(v: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    # Eq.36 (Cout from eq36 doubles as the effective Cout, as in run_design)
+    overshoot = v["vout_overshoot_v"]
+    cout_load_off = (v["l_used"] * v["iout_a"] ** 2) / (2.0 * v["vout_v"] * overshoot + overshoot**2)
+
+    # Eq.37 / Eq.38
+    delta_il_nom = v["delta_il_nom_a"]
+    v_c = delta_il_nom / (8.0 * v["fsw_hz"] * cout_load_off)
+    v_esr = delta_il_nom * v["rout_esr_ohm"]
+    return {
+        "cout_load_off_f": cout_load_off,
+        "vout_ripple_pp_v": np.sqrt(v_c * v_c + v_esr * v_esr),
+        "ioutcap_rms_a": delta_il_nom / math.sqrt(12.0),
+    }
+
+
+def _stage_cin(v: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    # Eq.39 / Eq.40 at D = 0.5
+    duty = 0.5
+    iout = v["iout_a"]
+    cin_rms = iout * math.sqrt(duty * (1.0 - duty))
+    dv_in = v["vin_ripple_pp_v"]
+    dv_esr = cin_rms * v["rin_esr_ohm"]
+    dv_cap_allow = np.sqrt(np.maximum(dv_in**2 - dv_esr**2, 0.0))
+    cin_req = np.where(
+        (dv_esr >= dv_in) | (dv_cap_allow <= 0.0),
+        np.inf,
+        iout * duty * (1.0 - duty) / (v["fsw_hz"] * dv_cap_allow),
+    )
+    return {"cin_rms_a": cin_rms, "cin_required_f": cin_req}
+
+
+def _stage_rt(v: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    # Eq.41
+    return {"rt_ohm": ((1_000_000.0 / (v["fsw_hz"] / 1_000.0) - 53.0) / 45.0) * 1_000.0}
+
+
+def _stage_rfb(v: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    # Eq.42
+    vout, vref = v["vout_v"], v["vref_v"]
+    return {"rfb_top_ohm": np.where(vout <= vref, 0.0, v["rfb_bottom_ohm"] * (vout / vref - 1.0))}
+
+
+def _stage_comp(v: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    # Eq.44 / Eq.45
+    rcomp = v["rcomp_ohm"]
+    ccomp = 10.0 / (2.0 * np.pi * v["f_c_hz"] * rcomp)
+    chf = 1.0 / (2.0 * np.pi * v["f_esr_zero_hz"] * rcomp) - v["cbw_f"]
+    return {"ccomp_f": ccomp, "chf_f": chf}
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    fn: Callable[[Mapping[str, np.ndarray]], dict[str, np.ndarray]]
+    results: tuple[str, ...]
+    needs: tuple[str, ...] = ()  # earlier stages
+    cost: float = 1.0  # relative work per row (numpy passes)
+
+
+STAGES: list[Stage] = [
+    Stage(
+        "inductor",
+        _stage_inductor,
+        ("duty_nom", "delta_il_nom_a", "l_required_h", "delta_il_vin_max_a", "il_peak_vin_max_a"),
+        cost=14,
+    ),
+    Stage("sense", _stage_sense, ("rsense_ohm", "il_peak_short_a"), ("inductor",), cost=6),
+    Stage("cout", _stage_cout, ("cout_load_off_f", "vout_ripple_pp_v", "ioutcap_rms_a"), ("inductor",), cost=13),
+    Stage("cin", _stage_cin, ("cin_rms_a", "cin_required_f"), cost=12),
+    Stage("rt", _stage_rt, ("rt_ohm",), cost=4),
+    Stage("rfb", _stage_rfb, ("rfb_top_ohm",), cost=4),
+    Stage("comp", _stage_comp, ("ccomp_f", "chf_f"), cost=8),
+]
+STAGE_OF_RESULT: dict[str, Stage] = {name: st for st in STAGES for name in st.results}
+
+
+def run_design_columns(cols: Mapping[str, object], *, dtype: np.dtype = np.float64) -> dict[str, np.ndarray]:
+    """Vectorized `run_design`: same equations, one numpy pass over every design in `cols`.
+
+    `cols` maps DesignInputs field names to scalars or equal-length arrays; missing fields
+    take the `DesignInputs()` defaults. Returns one array per DesignResults field, computed
+    in `dtype` (constants are Python floats so float32 columns stay float32).
+    """
+
+    v: dict[str, np.ndarray] = dict(complete_columns(cols, dtype))
+    shape = v["vout_v"].shape
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for st in STAGES:
+            v.update(st.fn(v))
+    return {name: np.broadcast_to(v[name], shape) for name in RESULT_FIELDS}
+
+
+def ill_conditioned(
+    c: Mapping[str, np.ndarray], res: Mapping[str, np.ndarray], limit: float = CONDITION_LIMIT
+) -> np.ndarray:
+    """Rows whose results float32 cannot be trusted: a subtraction cancels with condition number
+    (|a| + |b|) / |a - b| above `limit` (which also covers the branch edges at a == b), or
+    Eq.45 CHF came out negative."""
+
+    c_rms = res["cin_rms_a"] * c["rin_esr_ohm"]
+    pairs = [
+        (c["vin_nom_v"], c["vout_v"]),  # Eq.31
+        (c["vin_max_v"], c["vout_v"]),  # Eq.32
+        (c["vin_ripple_pp_v"] ** 2, c_rms**2),  # Eq.40 near the ESR limit (Cin -> inf)
+        (1e9 / c["fsw_hz"], 53.0),  # Eq.41
+        (c["vout_v"], c["vref_v"]),  # Eq.42 near VOUT = VREF
+        (res["chf_f"] + c["cbw_f"], c["cbw_f"]),  # Eq.45
+    ]
+    bad = np.zeros(np.shape(res["chf_f"]), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for a, b in pairs:
+            # NaN (0/0) counts as ill-conditioned too.
+            bad |= ~((np.abs(a) + np.abs(b)) <= limit * np.abs(a - b))
+        bad |= res["chf_f"] < 0.0
+    return bad
+
+
+def _run_float32(
+    inputs: Mapping[str, np.ndarray], limit: float
+) -> tuple[dict[str, np.ndarray], dict[str, np.ndarray], np.ndarray]:
+    """Flat float64 `inputs` -> (float32 inputs, results with ill-conditioned rows redone in float64, redo mask)."""
+
+    inputs32 = {name: values.astype(np.float32) for name, values in inputs.items()}
+    results = {name: np.array(values) for name, values in run_design_columns(inputs32, dtype=np.float32).items()}
+    redo = ill_conditioned(inputs32, results, limit)
+    if redo.any():
+        exact = run_design_columns({name: values[redo] for name, values in inputs.items()})
+        for name, values in exact.items():
+            results[name][redo] = values
+    return inputs32, results, redo
+
+
+def run_design_records(
+    cols: Mapping[str, object], *, precision: str = "float64", condition_limit: float = CONDITION_LIMIT
+) -> np.ndarray:
+    """Run a batch and pack inputs + results into one `DESIGN_DTYPE` structured array.
+
+    With `precision="float32"` the batch is computed and stored in float32 (`DESIGN_DTYPE_F32`);
+    rows flagged by `ill_conditioned` are recomputed from the float64 inputs.
+    """
+
+    if precision not in RECORD_DTYPES:
+        raise ValueError(f"Unknown precision {precision!r} (expected {' or '.join(RECORD_DTYPES)})")
+    inputs = {name: values.reshape(-1) for name, values in complete_columns(cols).items()}
+    if precision == "float32":
+        inputs, results, _ = _run_float32(inputs, condition_limit)
+    else:
+        results = run_design_columns(inputs)
+    out = np.empty(len(inputs[INPUT_FIELDS[0]]), dtype=RECORD_DTYPES[precision])
+    for name, values in inputs.items():
+        out[name] = values
+    for name, values in results.items():
+        out[name] = values
+    return out
+
+
+def _max_rel_error(approx: np.ndarray, exact: np.ndarray) -> float:
+    approx = approx.astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        err = np.abs(approx - exact) / np.maximum(np.abs(exact), np.finfo(np.float64).tiny)
+    same = (approx == exact) | (np.isnan(approx) & np.isnan(exact))  # equal infinities, NaN "not applicable"
+    err = np.where(same, 0.0, np.where(np.isnan(err), np.inf, err))
+    return float(err.max()) if err.size else 0.0
+
+
+@dataclass(frozen=True)
+class PrecisionReport:
+    sample_rows: int
+    fallback_rows: int
+    # Result field -> max relative error vs float64: with the fallback, and plain float32 for comparison.
+    max_rel_error: dict[str, float]
+    max_rel_error_raw: dict[str, float]
+
+
+def precision_report(
+    cols: Mapping[str, object],
+    *,
+    sample_rows: Optional[int] = 4096,
+    seed: int = 0,
+    condition_limit: float = CONDITION_LIMIT,
+) -> PrecisionReport:
+    """Validate float32 mode on (a random sample of) the designs in `cols` against float64."""
+
+    inputs = {name: values.reshape(-1) for name, values in complete_columns(cols).items()}
+    n = len(inputs[INPUT_FIELDS[0]])
+    if sample_rows is not None and sample_rows < n:
+        pick = np.sort(np.random.default_rng(seed).choice(n, size=sample_rows, replace=False))
+        inputs = {name: values[pick] for name, values in inputs.items()}
+    exact = run_design_columns(inputs)
+    inputs32, results, redo = _run_float32(inputs, condition_limit)
+    raw = run_design_columns(inputs32, dtype=np.float32)
+    return PrecisionReport(
+        sample_rows=len(inputs[INPUT_FIELDS[0]]),
+        fallback_rows=int(redo.sum()),
+        max_rel_error={name: _max_rel_error(results[name].astype(np.float32), exact[name]) for name in RESULT_FIELDS},
+        max_rel_error_raw={name: _max_rel_error(raw[name], exact[name]) for name in RESULT_FIELDS},
+    )
+
+
+def format_precision_report(report: PrecisionReport) -> str:
+    lines = [
+        f"float32 vs float64 on {report.sample_rows:,} design(s), {report.fallback_rows:,} recomputed in float64",
+        f"{'result':22s} {'max rel err':>12s} {'no fallback':>12s}",
+    ]
+    for name in RESULT_FIELDS:
+        lines.append(f"{name:22s} {report.max_rel_error[name]:12.3g} {report.max_rel_error_raw[name]:12.3g}")
+    return "\n".join(lines)
+
+
+def columns_to_results(res_cols: Mapping[str, np.ndarray]) -> list[DesignResults]:
+    n = len(res_cols[RESULT_FIELDS[0]])
+    as_lists = {name: np.asarray(res_cols[name]).tolist() for name in RESULT_FIELDS}
+    return [DesignResults(**{name: as_lists[name][i] for name in RESULT_FIELDS}) for i in range(n)]
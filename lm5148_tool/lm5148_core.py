@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping, Optional
+
+try:
+    from lm5148_tool.profiling import profiled
+except ImportError:  # run as a script from inside lm5148_tool/
+    from profiling import profiled
+
+
+__all__ = [
+    "VREF_DEFAULT_V",
+    "DesignInputs",
+    "DesignResults",
+    "inductor_ripple",
+    "eq31_l_required",
+    "eq32_il_peak",
+    "eq34_rsense",
+    "eq35_il_peak_short",
+    "eq36_cout_load_off",
+    "eq37_vout_ripple_pp",
+    "eq38_ioutcap_rms",
+    "eq39_cin_rms",
+    "eq40_cin_required",
+    "eq41_rt_ohm_from_fsw",
+    "eq42_feedback_top",
+    "eq44_ccomp",
+    "eq45_chf",
+    "run_design",
+    "run_design_batch",
+    "WEBAPP_INPUT_KEYS",
+    "design_inputs_from_webapp",
+]
+
+
+VREF_DEFAULT_V = 0.8
+
+
+@dataclass(frozen=True)
+class DesignInputs:
+    vin_nom_v: float = 12.0
+    vin_max_v: float = 18.0
+    vout_v: float = 5.0
+    iout_a: float = 8.0
+    fsw_hz: float = 2.1e6
+
+    # Inductor ripple current target as fraction of IOUT (datasheet uses ~30%).
+    ripple_frac: float = 0.30
+
+    # If provided, use this inductance for peak-current / ripple checks.
+    l_used_h: Optional[float] = 0.56e-6
+
+    # Output transient spec for load-off (Vout overshoot allowed).
+    vout_overshoot_v: float = 0.075
+
+    # Capacitor ESR assumptions
+    rout_esr_ohm: float = 1e-3
+    rin_esr_ohm: float = 2e-3
+
+    # Input ripple spec
+    vin_ripple_pp_v: float = 0.120
+
+    # Current limit / timing assumptions
+    vcs_th_v: float = 0.060
+    il_pk_margin: float = 1.25
+    t_delay_isns_s: float = 45e-9
+
+    # Feedback design
+    vref_v: float = VREF_DEFAULT_V
+    rfb_bottom_ohm: float = 10_000.0
+
+    # Compensation starting point (datasheet pages 38-39)
+    f_c_hz: float = 60_000.0
+    rcomp_ohm: float = 10_000.0
+    f_esr_zero_hz: float = 500_000.0
+    cbw_f: float = 0.8e-12
+
+    # Paths
+    pdf_path: Optional[str] = None
+
+    # run_design only uses VIN nom/max (as the datasheet example does); corner/envelope analyses
+    # start at VIN min. None means VIN nom.
+    vin_min_v: Optional[float] = None
+
+    @property
+    def vin_min_or_nom_v(self) -> float:
+        return self.vin_nom_v if self.vin_min_v is None else self.vin_min_v
+
+
+@dataclass(frozen=True)
+class DesignResults:
+    delta_il_nom_a: float
+    l_required_h: float
+
+    delta_il_vin_max_a: float
+    il_peak_vin_max_a: float
+
+    rsense_ohm: float
+    il_peak_short_a: float
+
+    cout_load_off_f: float
+    vout_ripple_pp_v: float
+    ioutcap_rms_a: float
+
+    duty_nom: float
+    cin_rms_a: float
+    cin_required_f: float
+
+    rt_ohm: float
+    rfb_top_ohm: float
+
+    ccomp_f: float
+    chf_f: float
+
+
+def _clamp(x: float, lo: float, hi: float) -> float:
+    return max(lo, min(hi, x))
+
+
+def eq31_l_required(vin_nom_v: float, vout_v: float, fsw_hz: float, delta_il_a: float) -> float:
+    # Reconstructed from datasheet example (page 36, Eq.31):
+    # L = Vout*(Vin-Vout)/(Vin*Fsw*ΔIL)
+    return (vout_v * (vin_nom_v - vout_v)) / (vin_nom_v * fsw_hz * delta_il_a)
+
+
+def inductor_ripple(vin_v: float, vout_v: float, fsw_hz: float, l_h: float) -> float:
+    # ΔIL = Vout*(Vin-Vout)/(Vin*L*Fsw)
+    return (vout_v * (vin_v - vout_v)) / (vin_v * l_h * fsw_hz)
+
+
+def eq32_il_peak(vin_max_v: float, vout_v: float, fsw_hz: float, l_h: float, iout_a: float) -> tuple[float, float]:
+    delta_il = inductor_ripple(vin_max_v, vout_v, fsw_hz, l_h)
+    il_pk = iout_a + (delta_il / 2.0)
+    return delta_il, il_pk
+
+
+def eq34_rsense(vcs_th_v: float, il_pk_a: float, margin: float) -> float:
+    # Rsense = Vcs_th / (margin * IL_pk)
+    return vcs_th_v / (margin * il_pk_a)
+
+
+def eq35_il_peak_short(vin_max_v: float, t_delay_s: float, vcs_th_v: float, rsense_ohm: float, l_h: float) -> float:
+    # IL_pk(sc) ≈ Vcs_th/Rsense + Vin_max * t_delay / L
+    return (vcs_th_v / rsense_ohm) + (vin_max_v * t_delay_s / l_h)
+
+
+def eq36_cout_load_off(l_h: float, iout_a: float, vout_v: float, overshoot_v: float) -> float:
+    # Energy transfer approximation (matches datasheet numeric example):
+    # 1/2 L I^2 = 1/2 C * ((Vout+ΔV)^2 - Vout^2) = 1/2 C * (2 Vout ΔV + ΔV^2)
+    denom = (2.0 * vout_v * overshoot_v) + (overshoot_v**2)
+    return (l_h * (iout_a**2)) / denom
+
+
+def eq37_vout_ripple_pp(delta_il_a: float, fsw_hz: float, cout_eff_f: float, rout_esr_ohm: float) -> float:
+    # Vripple_pp ≈ RSS( ΔIL/(8 Fsw C) , ΔIL * ESR )
+    v_c = delta_il_a / (8.0 * fsw_hz * cout_eff_f)
+    v_esr = delta_il_a * rout_esr_ohm
+    return math.sqrt(v_c * v_c + v_esr * v_esr)
+
+
+def eq38_ioutcap_rms(delta_il_a: float) -> float:
+    return delta_il_a / math.sqrt(12.0)
+
+
+def eq39_cin_rms(iout_a: float, duty: float) -> float:
+    return iout_a * math.sqrt(duty * (1.0 - duty))
+
+
+def eq40_cin_required(iout_a: float, fsw_hz: float, duty: float, dv_in_pp_v: float, rin_esr_ohm: float) -> float:
+    # Reconstructed to match datasheet behavior: compute Cin required so that
+    # total input ripple is within dv_in_pp_v, combining capacitive + ESR ripple in RSS.
+    # For a triangular capacitor current, the charge/discharge contribution is approximated as:
+    # ΔVin_cap ≈ Iout*D*(1-D) / (Fsw * Cin)
+    i_factor = iout_a * duty * (1.0 - duty)
+    i_cin_rms = eq39_cin_rms(iout_a, duty)
+    dv_esr = i_cin_rms * rin_esr_ohm
+
+    # Guard: if ESR ripple alone exceeds spec, capacitance can't fix it.
+    if dv_esr >= dv_in_pp_v:
+        return float("inf")
+
+    dv_cap_allow = math.sqrt(max(dv_in_pp_v**2 - dv_esr**2, 0.0))
+    if dv_cap_allow <= 0:
+        return float("inf")
+
+    return i_factor / (fsw_hz * dv_cap_allow)
+
+
+def eq41_rt_ohm_from_fsw(fsw_hz: float) -> float:
+    # Datasheet Eq.41 reconstructed from constants shown:
+    # Fsw(kHz) = 1e6 / (45*Rt(kΩ) + 53)
+    fsw_khz = fsw_hz / 1_000.0
+    rt_kohm = (1_000_000.0 / fsw_khz - 53.0) / 45.0
+    return rt_kohm * 1_000.0
+
+
+def eq42_feedback_top(vout_v: float, vref_v: float, r_bottom_ohm: float) -> float:
+    # Standard divider: Vout = Vref * (1 + Rtop/Rbottom)
+    if vout_v <= vref_v:
+        return 0.0
+    return r_bottom_ohm * (vout_v / vref_v - 1.0)
+
+
+def eq44_ccomp(f_c_hz: float, rcomp_ohm: float) -> float:
+    # Datasheet (page 38, Eq.44): place compensation zero at f_c/10.
+    # Ccomp = 10 / (2π f_c Rcomp)
+    return 10.0 / (2.0 * math.pi * f_c_hz * rcomp_ohm)
+
+
+def eq45_chf(f_esr_zero_hz: float, rcomp_ohm: float, cbw_f: float) -> float:
+    # Datasheet (page 39, Eq.45): CHF = 1/(2π f_ESR Rcomp) - Cbw
+    return (1.0 / (2.0 * math.pi * f_esr_zero_hz * rcomp_ohm)) - cbw_f
+
+
+@profiled("design.run_design")
+def run_design(inp: DesignInputs) -> DesignResults:
+    duty_nom = _clamp(inp.vout_v / inp.vin_nom_v, 0.0, 0.95)
+
+    delta_il_nom = inp.ripple_frac * inp.iout_a
+    l_req = eq31_l_required(inp.vin_nom_v, inp.vout_v, inp.fsw_hz, delta_il_nom)
+
+    l_used = inp.l_used_h if inp.l_used_h is not None else l_req
+    delta_il_vin_max, il_pk_vin_max = eq32_il_peak(inp.vin_max_v, inp.vout_v, inp.fsw_hz, l_used, inp.iout_a)
+
+    rsense = eq34_rsense(inp.vcs_th_v, il_pk_vin_max, inp.il_pk_margin)
+    il_pk_short = eq35_il_peak_short(inp.vin_max_v, inp.t_delay_isns_s, inp.vcs_th_v, rsense, l_used)
+
+    cout_load_off = eq36_cout_load_off(l_used, inp.iout_a, inp.vout_v, inp.vout_overshoot_v)
+
+    # If user didn't provide an effective output capacitance, use Cout from eq36 as a baseline.
+    cout_eff = cout_load_off
+    vout_ripple = eq37_vout_ripple_pp(delta_il_nom, inp.fsw_hz, cout_eff, inp.rout_esr_ohm)
+    ioutcap_rms = eq38_ioutcap_rms(delta_il_nom)
+
+    cin_rms = eq39_cin_rms(inp.iout_a, 0.5)
+    cin_req = eq40_cin_required(inp.iout_a, inp.fsw_hz, 0.5, inp.vin_ripple_pp_v, inp.rin_esr_ohm)
+
+    rt_ohm = eq41_rt_ohm_from_fsw(inp.fsw_hz)
+    rfb_top = eq42_feedback_top(inp.vout_v, inp.vref_v, inp.rfb_bottom_ohm)
+
+    ccomp = eq44_ccomp(inp.f_c_hz, inp.rcomp_ohm)
+    chf = eq45_chf(inp.f_esr_zero_hz, inp.rcomp_ohm, inp.cbw_f)
+
+    return DesignResults(
+        delta_il_nom_a=delta_il_nom,
+        l_required_h=l_req,
+        delta_il_vin_max_a=delta_il_vin_max,
+        il_peak_vin_max_a=il_pk_vin_max,
+        rsense_ohm=rsense,
+        il_peak_short_a=il_pk_short,
+        cout_load_off_f=cout_load_off,
+        vout_ripple_pp_v=vout_ripple,
+        ioutcap_rms_a=ioutcap_rms,
+        duty_nom=duty_nom,
+        cin_rms_a=cin_rms,
+        cin_required_f=cin_req,
+        rt_ohm=rt_ohm,
+        rfb_top_ohm=rfb_top,
+        ccomp_f=ccomp,
+        chf_f=chf,
+    )
+
+
+def run_design_batch(inputs: Iterable[DesignInputs]) -> list[DesignResults]:
+    return [run_design(inp) for inp in inputs]
+
+
+# camelCase keys of the webapp / lm5148_design.json "inputs" object -> DesignInputs fields.
+# Webapp-only keys (gm, coutEff, duty, rsForEq33, UVLO helpers, ...) are ignored.
+WEBAPP_INPUT_KEYS: dict[str, str] = {
+    "vinMin": "vin_min_v",
+    "vinNom": "vin_nom_v",
+    "vinMax": "vin_max_v",
+    "vout": "vout_v",
+    "iout": "iout_a",
+    "fsw": "fsw_hz",
+    "rippleFrac": "ripple_frac",
+    "lUsed": "l_used_h",
+    "voutOvershoot": "vout_overshoot_v",
+    "routEsr": "rout_esr_ohm",
+    "rinEsr": "rin_esr_ohm",
+    "vinRippleSpec": "vin_ripple_pp_v",
+    "vcsTh": "vcs_th_v",
+    "ilPkMargin": "il_pk_margin",
+    "tDelay": "t_delay_isns_s",
+    "vref": "vref_v",
+    "rfbBot": "rfb_bottom_ohm",
+    "fc": "f_c_hz",
+    "rcomp": "rcomp_ohm",
+    "fesr": "f_esr_zero_hz",
+    "cbw": "cbw_f",
+}
+
+
+def design_inputs_from_webapp(inputs: Mapping[str, Any]) -> DesignInputs:
+    """Map a webapp-format `inputs` object to DesignInputs; missing keys keep the defaults."""
+
+    if not isinstance(inputs, Mapping):
+        raise ValueError("'inputs' must be a JSON object")
+
+    kwargs: dict[str, Optional[float]] = {}
+    for key, field_name in WEBAPP_INPUT_KEYS.items():
+        if key not in inputs:
+            continue
+        value = inputs[key]
+        if type(value) is float or type(value) is int:
+            # Fast path for the common case; NDJSON batches call this once per line.
+            try:
+                number = float(value)
+            except OverflowError:  # a JSON integer too large for a float
+                raise ValueError(f"'{key}' is out of range") from None
+            if not math.isfinite(number):  # 1e999, NaN and Infinity all parse as JSON
+                raise ValueError(f"'{key}' must be a finite number")
+            kwargs[field_name] = number
+            continue
+        if value is None and field_name == "l_used_h":
+            kwargs[field_name] = None
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            raise ValueError(f"'{key}' must be a number")
+        try:
+            number = float(value)
+        except (ValueError, OverflowError):
+            raise ValueError(f"'{key}' must be a number") from None
+        if not math.isfinite(number):
+            raise ValueError(f"'{key}' must be a finite number")
+        kwargs[field_name] = number
+
+    # The webapp can lock L_used to L_required (Eq.31); run_design does that when l_used_h is None.
+    if inputs.get("lockLUsedToLreq") is True:
+        kwargs["l_used_h"] = None
+
+    return DesignInputs(**kwargs)
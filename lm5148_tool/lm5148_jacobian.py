@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Mapping
+
+import numpy as np
+
+from lm5148_tool.lm5148_batch import INPUT_FIELDS, RESULT_FIELDS, complete_columns, run_design_columns
+from lm5148_tool.lm5148_core import design_inputs_from_webapp
+
+
+# Partial derivatives of one quantity: {input field: d(quantity)/d(input)}, arrays broadcast per design.
+Grad = dict[str, np.ndarray]
+
+
+def _combine(*terms: tuple[np.ndarray, Grad]) -> Grad:
+    """Chain rule: sum of coefficient * gradient over the terms."""
+
+    out: Grad = {}
+    for coef, grad in terms:
+        for name, d in grad.items():
+            out[name] = out[name] + coef * d if name in out else coef * d
+    return out
+
+
+def _where(mask: np.ndarray, a: Grad, b: Grad) -> Grad:
+    zero = np.zeros_like(mask, dtype=np.float64)
+    return {name: np.where(mask, a.get(name, zero), b.get(name, zero)) for name in set(a) | set(b)}
+
+
+def jacobian_columns(cols: Mapping[str, object]) -> tuple[dict[str, np.ndarray], np.ndarray]:
+    """Results plus the full Jacobian d(DesignResults)/d(DesignInputs) for every design in `cols`.
+
+    Closed-form derivatives of the same equations as `run_design_columns`, chained per design.
+    Returns `(results, jac)` with `jac.shape == (n_designs, len(RESULT_FIELDS), len(INPUT_FIELDS))`.
+    Inputs a result does not use get 0 (including `l_used_h` when it is NaN, i.e. "use L required");
+    results that are non-finite (infeasible Eq.40) get NaN derivatives.
+    """
+
+    c = complete_columns(cols)
+    res = run_design_columns(c)
+    n = np.broadcast_shapes(*(a.shape for a in c.values()))
+    one = np.ones(n)
+
+    def x(name: str) -> Grad:
+        return {name: one}
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        vin_nom, vin_max, vout, iout, fsw = (c[k] for k in ("vin_nom_v", "vin_max_v", "vout_v", "iout_a", "fsw_hz"))
+        g: dict[str, Grad] = {}
+
+        ratio = vout / vin_nom
+        inside = (ratio > 0.0) & (ratio < 0.95)
+        g["duty_nom"] = _where(inside, _combine((1.0 / vin_nom, x("vout_v")), (-ratio / vin_nom, x("vin_nom_v"))), {})
+
+        # Eq.31
+        delta_il_nom = res["delta_il_nom_a"]
+        g["delta_il_nom_a"] = _combine((iout, x("ripple_frac")), (c["ripple_frac"], x("iout_a")))
+        l_req = res["l_required_h"]
+        g["l_required_h"] = _combine(
+            (l_req * (1.0 / vout - 1.0 / (vin_nom - vout)), x("vout_v")),
+            (l_req * (1.0 / (vin_nom - vout) - 1.0 / vin_nom), x("vin_nom_v")),
+            (-l_req / fsw, x("fsw_hz")),
+            (-l_req / delta_il_nom, g["delta_il_nom_a"]),
+        )
+        use_req = np.isnan(c["l_used_h"])
+        l_used = np.where(use_req, l_req, c["l_used_h"])
+        g_l = _where(use_req, g["l_required_h"], x("l_used_h"))
+
+        # Eq.32
+        d_max = res["delta_il_vin_max_a"]
+        g["delta_il_vin_max_a"] = _combine(
+            (d_max * (1.0 / vout - 1.0 / (vin_max - vout)), x("vout_v")),
+            (d_max * (1.0 / (vin_max - vout) - 1.0 / vin_max), x("vin_max_v")),
+            (-d_max / fsw, x("fsw_hz")),
+            (-d_max / l_used, g_l),
+        )
+        il_pk = res["il_peak_vin_max_a"]
+        g["il_peak_vin_max_a"] = _combine((one, x("iout_a")), (0.5 * one, g["delta_il_vin_max_a"]))
+
+        # Eq.34 / Eq.35
+        vcs_th, margin, t_delay = c["vcs_th_v"], c["il_pk_margin"], c["t_delay_isns_s"]
+        rsense = res["rsense_ohm"]
+        g["rsense_ohm"] = _combine(
+            (rsense / vcs_th, x("vcs_th_v")), (-rsense / margin, x("il_pk_margin")), (-rsense / il_pk, g["il_peak_vin_max_a"])
+        )
+        i_lim = vcs_th / rsense
+        g["il_peak_short_a"] = _combine(
+            (i_lim / vcs_th, x("vcs_th_v")),
+            (-i_lim / rsense, g["rsense_ohm"]),
+            (t_delay / l_used, x("vin_max_v")),
+            (vin_max / l_used, x("t_delay_isns_s")),
+            (-vin_max * t_delay / l_used**2, g_l),
+        )
+
+        # Eq.36
+        overshoot = c["vout_overshoot_v"]
+        cout = res["cout_load_off_f"]
+        den = 2.0 * vout * overshoot + overshoot**2
+        g["cout_load_off_f"] = _combine(
+            (cout / l_used, g_l),
+            (2.0 * cout / iout, x("iout_a")),
+            (-cout * 2.0 * overshoot / den, x("vout_v")),
+            (-cout * (2.0 * vout + 2.0 * overshoot) / den, x("vout_overshoot_v")),
+        )
+
+        # Eq.37 / Eq.38
+        esr = c["rout_esr_ohm"]
+        v_c = delta_il_nom / (8.0 * fsw * cout)
+        v_esr = delta_il_nom * esr
+        ripple = res["vout_ripple_pp_v"]
+        g_vc = _combine((v_c / delta_il_nom, g["delta_il_nom_a"]), (-v_c / fsw, x("fsw_hz")), (-v_c / cout, g["cout_load_off_f"]))
+        g_ve = _combine((esr, g["delta_il_nom_a"]), (delta_il_nom, x("rout_esr_ohm")))
+        g["vout_ripple_pp_v"] = _combine((v_c / ripple, g_vc), (v_esr / ripple, g_ve))
+        g["ioutcap_rms_a"] = _combine((one / np.sqrt(12.0), g["delta_il_nom_a"]))
+
+        # Eq.39 / Eq.40 at D = 0.5
+        duty = 0.5
+        cin_rms = res["cin_rms_a"]
+        g["cin_rms_a"] = _combine((np.sqrt(duty * (1.0 - duty)) * one, x("iout_a")))
+        dv_in, rin_esr = c["vin_ripple_pp_v"], c["rin_esr_ohm"]
+        dv_esr = cin_rms * rin_esr
+        allow = np.sqrt(np.maximum(dv_in**2 - dv_esr**2, 0.0))
+        g_esr = _combine((rin_esr, g["cin_rms_a"]), (cin_rms, x("rin_esr_ohm")))
+        g_allow = _combine((dv_in / allow, x("vin_ripple_pp_v")), (-dv_esr / allow, g_esr))
+        cin_req = res["cin_required_f"]
+        g["cin_required_f"] = _combine(
+            (cin_req / iout, x("iout_a")), (-cin_req / fsw, x("fsw_hz")), (-cin_req / allow, g_allow)
+        )
+
+        # Eq.41 / Eq.42
+        g["rt_ohm"] = _combine((-1e12 / (45.0 * fsw**2), x("fsw_hz")))
+        vref, rfb_bottom = c["vref_v"], c["rfb_bottom_ohm"]
+        g["rfb_top_ohm"] = _where(
+            vout > vref,
+            _combine(
+                (vout / vref - 1.0, x("rfb_bottom_ohm")),
+                (rfb_bottom / vref, x("vout_v")),
+                (-rfb_bottom * vout / vref**2, x("vref_v")),
+            ),
+            {},
+        )
+
+        # Eq.44 / Eq.45
+        rcomp = c["rcomp_ohm"]
+        ccomp = res["ccomp_f"]
+        g["ccomp_f"] = _combine((-ccomp / c["f_c_hz"], x("f_c_hz")), (-ccomp / rcomp, x("rcomp_ohm")))
+        h = 1.0 / (2.0 * np.pi * c["f_esr_zero_hz"] * rcomp)
+        g["chf_f"] = _combine((-h / c["f_esr_zero_hz"], x("f_esr_zero_hz")), (-h / rcomp, x("rcomp_ohm")), (-one, x("cbw_f")))
+
+    jac = np.zeros(n + (len(RESULT_FIELDS), len(INPUT_FIELDS)))
+    col = {name: j for j, name in enumerate(INPUT_FIELDS)}
+    for i, result in enumerate(RESULT_FIELDS):
+        for name, d in g[result].items():
+            jac[..., i, col[name]] = d
+        jac[..., i, :] = np.where(np.isfinite(res[result])[..., None], jac[..., i, :], np.nan)
+    return res, jac
+
+
+def elasticities(cols: Mapping[str, object]) -> tuple[dict[str, np.ndarray], np.ndarray]:
+    """Normalized sensitivities (x / y) * dy/dx: % change of each result per % change of each input."""
+
+    c = complete_columns(cols)
+    res, jac = jacobian_columns(c)
+    x = np.stack([c[name] for name in INPUT_FIELDS], axis=-1)[..., None, :]
+    y = np.stack([res[name] for name in RESULT_FIELDS], axis=-1)[..., :, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        el = jac * x / y
+    # Unused inputs (NaN l_used_h) contribute nothing rather than NaN.
+    return res, np.where(jac == 0.0, 0.0, el)
+
+
+def linear_tolerance(cols: Mapping[str, object], tolerances: Mapping[str, float]) -> dict[str, np.ndarray]:
+    """First-order relative spread of each result (RSS) for relative input tolerances {field: ±fraction}."""
+
+    unknown = set(tolerances) - set(INPUT_FIELDS)
+    if unknown:
+        raise KeyError(f"Unknown input field(s): {', '.join(sorted(unknown))}")
+    _, el = elasticities(cols)
+    tol = np.array([tolerances.get(name, 0.0) for name in INPUT_FIELDS])
+    spread = np.sqrt(np.sum((el * tol) ** 2, axis=-1))
+    return {name: spread[..., i] for i, name in enumerate(RESULT_FIELDS)}
+
+
+def format_sensitivity_table(el: np.ndarray, *, top: int = 4) -> str:
+    """Top inputs per result for one design (`el` shaped (n_results, n_inputs))."""
+
+    lines = [f"{'result':20s}  most sensitive inputs (elasticity, % per %)"]
+    for i, result in enumerate(RESULT_FIELDS):
+        row = np.nan_to_num(el[i])
+        order = [j for j in np.argsort(-np.abs(row)) if row[j] != 0.0][:top]
+        cells = ", ".join(f"{INPUT_FIELDS[j]} {row[j]:+.3g}" for j in order) or "-"
+        lines.append(f"{result:20s}  {cells}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Analytic sensitivities of run_design results to every input.")
+    parser.add_argument("--json", type=str, required=True, help="lm5148_design.json (webapp/Streamlit export)")
+    parser.add_argument("--top", type=int, default=4, help="Inputs listed per result")
+    parser.add_argument(
+        "--tol", action="append", default=[], help="Relative tolerance for a first-order spread, e.g. fsw_hz=0.05"
+    )
+    parser.add_argument("--out", type=str, default="", help="Optional JSON with the full Jacobian")
+    args = parser.parse_args()
+
+    payload = json.loads(Path(args.json).read_text(encoding="utf-8"))
+    inp = design_inputs_from_webapp(payload.get("inputs") or {})
+    cols = {name: getattr(inp, name) if getattr(inp, name) is not None else np.nan for name in INPUT_FIELDS}
+    cols = {k: np.array([v], dtype=np.float64) for k, v in cols.items()}
+
+    res, jac = jacobian_columns(cols)
+    _, el = elasticities(cols)
+    print(format_sensitivity_table(el[0], top=args.top))
+
+    if args.tol:
+        tolerances = {}
+        for item in args.tol:
+            name, _, value = item.partition("=")
+            tolerances[name.strip()] = float(value)
+        spread = linear_tolerance(cols, tolerances)
+        print("\nFirst-order spread (RSS):")
+        for name in RESULT_FIELDS:
+            s = float(spread[name][0])
+            if s > 0:
+                print(f"  {name:20s} ±{s:.2%}")
+
+    if args.out:
+        data = {
+            "inputs": INPUT_FIELDS,
+            "results": RESULT_FIELDS,
+            "jacobian": [[v if np.isfinite(v) else None for v in row] for row in jac[0].tolist()],
+        }
+        Path(args.out).write_text(json.dumps(data, indent=1), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
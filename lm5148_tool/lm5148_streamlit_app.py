@@ -7,13 +7,14 @@ from pathlib import Path
 
 import streamlit as st
 
+from lm5148_tool import profiling
+from lm5148_tool.envelope import ENVELOPE_METRICS, compute_envelope
 from lm5148_tool.export_results_xlsx import build_results_xlsx_bytes
-from lm5148_tool.lm5148_design_tool import (
+from lm5148_tool.lm5148_core import (
     DesignInputs,
     run_design,
     eq31_l_required,
 )
-from lm5148_tool.quickstart_excel_com import fill_quickstart_excel
 
 
 def _default_template_path() -> Path:
@@ -42,9 +43,17 @@ with st.sidebar:
     st.subheader("Options")
     template_path = st.text_input("TI quickstart template (.xlsm)", value=str(_default_template_path()))
     excel_visible = st.checkbox("Show Excel while exporting", value=False)
+    profile_stages = st.checkbox("Profile stages (timing + memory)", value=False)
+
+# Profiling state is per script thread, so this only affects the current session. A rerun that
+# interrupted a profiled run leaves its profiler on; switch it off once profiling is unticked.
+prof = profiling.enable() if profile_stages else None
+if prof is None:
+    profiling.disable()
 
 # Minimal set of inputs for the existing Python design flow
 inp = DesignInputs(
+    vin_min_v=vin_min,
     vin_nom_v=vin_nom,
     vin_max_v=vin_max,
     vout_v=vout,
@@ -52,7 +61,11 @@ inp = DesignInputs(
     fsw_hz=fsw_hz,
 )
 
-res = run_design(inp)
+with profiling.stage("app.run_design"):
+    res = run_design(inp)
+
+with profiling.stage("app.envelope"):
+    env = compute_envelope(inp)
 
 # Build a payload compatible with the existing webapp exporter
 payload = {
@@ -96,7 +109,8 @@ with colB:
         use_container_width=True,
     )
 
-    xlsx_bytes = build_results_xlsx_bytes(inputs=payload["inputs"], results=payload["results"])
+    with profiling.stage("app.results_xlsx"):
+        xlsx_bytes = build_results_xlsx_bytes(inputs=payload["inputs"], results=payload["results"], envelope=env)
     st.download_button(
         "Download results.xlsx (standalone)",
         data=xlsx_bytes,
@@ -108,6 +122,9 @@ with colB:
     st.markdown("**TI Quickstart exports (Excel required on Windows)**")
     if st.button("Build filled quickstart .xlsm/.xlsx", use_container_width=True):
         try:
+            # Deferred: the COM exporter is only needed when this button is pressed.
+            from lm5148_tool.quickstart_excel_com import fill_quickstart_excel
+
             with tempfile.TemporaryDirectory() as td:
                 td_path = Path(td)
                 json_path = td_path / "lm5148_design.json"
@@ -116,13 +133,14 @@ with colB:
                 out_xlsm = td_path / "LM5148_quickstart_filled.xlsm"
                 out_xlsx = td_path / "LM5148_quickstart_filled.xlsx"
 
-                fill_quickstart_excel(
-                    json_path=json_path,
-                    template_path=Path(template_path),
-                    out_xlsm=out_xlsm,
-                    out_xlsx=out_xlsx,
-                    visible=excel_visible,
-                )
+                with profiling.stage("app.quickstart_excel"):
+                    fill_quickstart_excel(
+                        json_path=json_path,
+                        template_path=Path(template_path),
+                        out_xlsm=out_xlsm,
+                        out_xlsx=out_xlsx,
+                        visible=excel_visible,
+                    )
 
                 st.success("Built quickstart exports.")
                 st.download_button(
@@ -142,9 +160,134 @@ with colB:
         except Exception as e:
             st.error(str(e))
 
+st.subheader("VIN / IOUT envelope")
+st.caption(
+    f"{len(env.vin_v)} VIN points from VIN min to VIN max x {len(env.iout_a)} IOUT points, "
+    f"L = {env.l_h:.3g} H and Cout = {env.cout_f:.3g} F fixed at the nominal design."
+)
+labels = {key: f"{label} [{unit}]" for key, label, unit in ENVELOPE_METRICS}
+st.dataframe(
+    [
+        {
+            "metric": labels[e.metric],
+            "max": e.max_value,
+            "VIN @ max": e.max_vin_v,
+            "IOUT @ max": e.max_iout_a,
+            "min": e.min_value,
+            "VIN @ min": e.min_vin_v,
+            "IOUT @ min": e.min_iout_a,
+            "run_design": e.point_value,
+        }
+        for e in env.extremes
+    ],
+    use_container_width=True,
+)
+curves = env.at_full_load()
+chart_cols = st.columns(len(ENVELOPE_METRICS))
+for col, (key, label, unit) in zip(chart_cols, ENVELOPE_METRICS):
+    col.caption(f"{label} [{unit}] vs VIN (full load)")
+    col.line_chart({"VIN [V]": curves["vin_v"], label: curves[key]}, x="VIN [V]", y=label)
+
+with st.expander("Load-step transient (averaged current-mode model)"):
+    from lm5148_tool.lm5148_batch import inputs_to_columns
+    from lm5148_tool.load_transient import simulate_load_steps
+
+    step_a = st.number_input("Load step [A]", value=float(iout), step=0.5)
+    with profiling.stage("app.load_transient"):
+        tr = simulate_load_steps(inputs_to_columns([inp]), step_up_a=step_a, step_down_a=step_a)
+    if not tr.stable[0]:
+        st.warning("Closed loop is unstable with the default RCOMP and Eq.44/45 CCOMP/CHF.")
+    else:
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Undershoot (load on)", f"{tr.undershoot_v[0] * 1e3:.1f} mV")
+        m2.metric(
+            "Overshoot (load off)",
+            f"{tr.overshoot_v[0] * 1e3:.1f} mV",
+            f"spec {inp.vout_overshoot_v * 1e3:.0f} mV",
+            delta_color="off",
+        )
+        m3.metric("Settling (±0.5%)", f"{tr.settling_s[0] * 1e6:.1f} µs")
+        st.line_chart(
+            {"t [µs]": tr.time_s[0] * 1e6, "VOUT load on [V]": vout + tr.unit_response_v[0] * step_a},
+            x="t [µs]",
+            y="VOUT load on [V]",
+        )
+
+with st.expander("Stability map (RCOMP x COUT,eff)"):
+    import altair as alt
+    import numpy as np
+
+    from lm5148_tool.stability_map import stability_map
+
+    s1, s2 = st.columns(2)
+    rc_lo, rc_hi = s1.slider("RCOMP range [kΩ]", 0.5, 200.0, (1.0, 100.0))
+    co_lo, co_hi = s2.slider("COUT,eff range [µF]", 5.0, 1000.0, (10.0, 400.0))
+    with profiling.stage("app.stability_map"):
+        smap = stability_map(
+            inp,
+            {"rcomp_ohm": np.geomspace(rc_lo * 1e3, rc_hi * 1e3, 40), "cout_f": np.geomspace(co_lo * 1e-6, co_hi * 1e-6, 30)},
+        )
+    rc_mesh, co_mesh = np.meshgrid(smap.axes["rcomp_ohm"], smap.axes["cout_f"], indexing="ij")
+    cells = {
+        "RCOMP [kΩ]": np.round(rc_mesh.ravel() / 1e3, 3),
+        "COUT [µF]": np.round(co_mesh.ravel() * 1e6, 2),
+        "PM [deg]": smap.phase_margin_deg.reshape(rc_mesh.shape).ravel(),
+        "fc [kHz]": smap.crossover_hz.reshape(rc_mesh.shape).ravel() / 1e3,
+    }
+    heat = (
+        alt.Chart(alt.Data(values=[dict(zip(cells, row)) for row in zip(*(v.tolist() for v in cells.values()))]))
+        .mark_rect()
+        .encode(
+            x=alt.X("RCOMP [kΩ]:O", axis=alt.Axis(labelOverlap=True)),
+            y=alt.Y("COUT [µF]:O", sort="descending", axis=alt.Axis(labelOverlap=True)),
+            color=alt.Color("PM [deg]:Q", scale=alt.Scale(scheme="redyellowgreen", domain=[0, 90])),
+            tooltip=["RCOMP [kΩ]:O", "COUT [µF]:O", "PM [deg]:Q", "fc [kHz]:Q"],
+        )
+    )
+    st.altair_chart(heat, use_container_width=True)
+
+with st.expander("Worst-case corners (VIN min/nom/max, tolerances, Vcs_th over temperature)"):
+    from lm5148_tool.worst_case import CornerSpec, worst_case
+
+    t1, t2, t3 = st.columns(3)
+    l_tol = t1.number_input("L tolerance [±%]", value=20.0, step=5.0) / 100.0
+    fsw_tol = t2.number_input("FSW tolerance [±%]", value=5.0, step=1.0) / 100.0
+    vcs_tol = t3.number_input("Vcs_th tolerance [±%]", value=10.0, step=1.0) / 100.0
+    try:
+        with profiling.stage("app.worst_case"):
+            wc = worst_case(inp, CornerSpec(l_tol=l_tol, fsw_tol=fsw_tol, vcs_th_tol=vcs_tol))
+    except ValueError as e:
+        st.error(str(e))
+    else:
+        st.caption(f"Evaluated {wc.corners_evaluated} of {wc.corners_total} corners (monotonic pruning).")
+        st.dataframe(
+            [
+                {
+                    "result": r.result,
+                    "nominal": r.nominal,
+                    "worst": r.worst,
+                    "limiting corner": ", ".join(f"{k}={v}" for k, v in r.corner.items() if v != "nom"),
+                }
+                for r in wc.rows
+            ],
+            use_container_width=True,
+        )
+
 st.divider()
 st.subheader("Notes")
 st.write(
     "This Streamlit app is meant to unify exports. It currently focuses on the same core inputs the TI quickstart sheet accepts "
     "(VIN/VOUT/IOUT/FSW). The static web calculator remains the most detailed step-by-step view."
 )
+
+if prof is not None:
+    profiling.disable()
+    st.divider()
+    st.subheader("Stage timings (this run)")
+    st.dataframe(prof.summary(), use_container_width=True)
+    st.download_button(
+        "Download profile (Chrome trace JSON)",
+        data=json.dumps(prof.to_chrome_trace(), indent=1).encode("utf-8"),
+        file_name="lm5148_profile.json",
+        mime="application/json",
+    )
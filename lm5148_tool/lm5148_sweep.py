@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+from lm5148_tool.constrained_eval import ConstrainedEvaluator, format_constraint_stats
+from lm5148_tool.lm5148_batch import (
+    INPUT_FIELDS,
+    RECORD_DTYPES,
+    PrecisionReport,
+    format_precision_report,
+    precision_report,
+    run_design_records,
+)
+from lm5148_tool.results_db import Constraint, parse_constraint
+from lm5148_tool.results_store import ResultsStore
+from lm5148_tool.shards import Shard, fingerprint, parse_shard, write_manifest
+
+
+CHUNK_ROWS_DEFAULT = 262_144
+PRECISION_FILE = "precision.json"
+VALIDATION_ROWS_DEFAULT = 4096
+
+
+@dataclass(frozen=True)
+class SweepSpec:
+    # Swept inputs, in nesting order (last one varies fastest).
+    grids: dict[str, tuple[float, ...]]
+    # Inputs held fixed for the whole sweep; everything else uses DesignInputs() defaults.
+    fixed: dict[str, float] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        unknown = (set(self.grids) | set(self.fixed)) - set(INPUT_FIELDS)
+        if unknown:
+            raise KeyError(f"Unknown input field(s): {', '.join(sorted(unknown))}")
+        overlap = set(self.grids) & set(self.fixed)
+        if overlap:
+            raise ValueError(f"Field(s) both swept and fixed: {', '.join(sorted(overlap))}")
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return tuple(len(v) for v in self.grids.values())
+
+    @property
+    def n_points(self) -> int:
+        return int(np.prod(self.shape, dtype=np.int64)) if self.grids else 1
+
+
+def parse_grid(text: str) -> tuple[str, tuple[float, ...]]:
+    """`name=start:stop:count` (linear), `name=start:stop:count:log` or `name=v1,v2,...`."""
+
+    name, _, spec = text.partition("=")
+    name = name.strip()
+    if not spec:
+        raise ValueError(f"Grid must look like name=values: {text!r}")
+    if ":" in spec:
+        parts = spec.split(":")
+        start, stop, count = float(parts[0]), float(parts[1]), int(parts[2])
+        if len(parts) > 3 and parts[3] == "log":
+            values = np.geomspace(start, stop, count)
+        else:
+            values = np.linspace(start, stop, count)
+    else:
+        values = np.array([float(v) for v in spec.split(",") if v.strip()])
+    return name, tuple(float(v) for v in values)
+
+
+def point_columns(spec: SweepSpec, start: int, stop: int) -> dict[str, np.ndarray]:
+    """Input columns for sweep points [start, stop) of the cartesian product."""
+
+    return _columns_at(spec, np.arange(start, stop, dtype=np.int64))
+
+
+def _columns_at(spec: SweepSpec, idx: np.ndarray) -> dict[str, np.ndarray]:
+    cols: dict[str, np.ndarray] = {}
+    if spec.grids:
+        multi = np.unravel_index(idx, spec.shape)
+        for (name, values), sub in zip(spec.grids.items(), multi):
+            cols[name] = np.asarray(values, dtype=np.float64)[sub]
+    for name, value in spec.fixed.items():
+        cols[name] = np.full(len(idx), value, dtype=np.float64)
+    return cols
+
+
+def spec_fingerprint(spec: SweepSpec, precision: str = "float64", constraints: Sequence[Constraint] = ()) -> str:
+    return fingerprint(
+        {
+            "grids": spec.grids,
+            "fixed": spec.fixed,
+            "n_points": spec.n_points,
+            "precision": precision,
+            "constraints": [[c.column, c.op, c.value] for c in constraints],
+        }
+    )
+
+
+def iter_sweep_chunks(
+    spec: SweepSpec,
+    chunk_rows: int = CHUNK_ROWS_DEFAULT,
+    *,
+    start: int = 0,
+    stop: Optional[int] = None,
+    precision: str = "float64",
+    evaluator: Optional[ConstrainedEvaluator] = None,
+) -> Iterator[np.ndarray]:
+    """Record chunks of points [start, stop); with `evaluator`, only the rows passing its constraints."""
+
+    stop = spec.n_points if stop is None else stop
+    for lo in range(start, stop, chunk_rows):
+        cols = point_columns(spec, lo, min(lo + chunk_rows, stop))
+        if evaluator is not None:
+            records, _ = evaluator.evaluate(cols, precision=precision)
+            if len(records):
+                yield records
+        else:
+            yield run_design_records(cols, precision=precision)
+
+
+def validate_precision(
+    spec: SweepSpec, *, start: int = 0, stop: Optional[int] = None, sample_rows: int = VALIDATION_ROWS_DEFAULT, seed: int = 0
+) -> PrecisionReport:
+    """float32 vs float64 on a random sample of sweep points [start, stop)."""
+
+    stop = spec.n_points if stop is None else stop
+    rng = np.random.default_rng(seed)
+    n = stop - start
+    idx = np.arange(start, stop) if n <= sample_rows else start + np.sort(rng.choice(n, size=sample_rows, replace=False))
+    return precision_report(_columns_at(spec, idx.astype(np.int64)), sample_rows=None)
+
+
+def load_precision_report(store_dir: Path) -> Optional[PrecisionReport]:
+    """The float32 validation report of a store (None for float64 stores)."""
+
+    path = Path(store_dir) / PRECISION_FILE
+    if not path.exists():
+        return None
+    data = json.loads(path.read_text(encoding="utf-8"))
+    errors = {key: {k: math.inf if v is None else v for k, v in data[key].items()} for key in ("max_rel_error", "max_rel_error_raw")}
+    return PrecisionReport(sample_rows=data["sample_rows"], fallback_rows=data["fallback_rows"], **errors)
+
+
+def run_sweep(
+    spec: SweepSpec,
+    out_dir: Path,
+    *,
+    chunk_rows: int = CHUNK_ROWS_DEFAULT,
+    shard: Optional[Shard] = None,
+    precision: str = "float64",
+    evaluator: Optional[ConstrainedEvaluator] = None,
+) -> ResultsStore:
+    """Evaluate the sweep (or one shard's contiguous block of it) into a results store.
+
+    With `evaluator` only the designs passing its constraints are stored (see `constrained_eval`).
+
+    A shard writes `shard.json` only after its last chunk, so `shards.merge_stores` can tell a
+    finished shard from one that is still running or died. A float32 store also gets
+    `precision.json`, the validation report of its points against float64.
+    """
+
+    start, stop = shard.range(spec.n_points) if shard is not None else (0, spec.n_points)
+    store = ResultsStore.create(out_dir, RECORD_DTYPES[precision])
+    for records in iter_sweep_chunks(spec, chunk_rows, start=start, stop=stop, precision=precision, evaluator=evaluator):
+        store.append(records)
+    if precision != "float64":
+        report = asdict(validate_precision(spec, start=start, stop=stop))
+        for key in ("max_rel_error", "max_rel_error_raw"):
+            report[key] = {k: v if math.isfinite(v) else None for k, v in report[key].items()}
+        (out_dir / PRECISION_FILE).write_text(json.dumps({"precision": precision, **report}, indent=1), encoding="utf-8")
+    if shard is not None:
+        write_manifest(
+            out_dir,
+            shard,
+            kind="sweep",
+            work=spec_fingerprint(spec, precision, evaluator.constraints if evaluator is not None else ()),
+            n_points=spec.n_points,
+            start=start,
+            stop=stop,
+            rows=len(store),
+        )
+    return store
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Cartesian sweep of DesignInputs fields through the vectorized run_design into a results store."
+    )
+    parser.add_argument(
+        "--grid",
+        action="append",
+        default=[],
+        help="Swept input, e.g. fsw_hz=300e3:2.2e6:50, l_used_h=1e-7:1e-5:40:log or ripple_frac=0.2,0.3,0.4",
+    )
+    parser.add_argument("--set", action="append", default=[], help="Fixed input override, e.g. vout_v=3.3")
+    parser.add_argument("--out", type=str, required=True, help="Output results store directory (must not exist)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS_DEFAULT)
+    parser.add_argument("--shard", type=str, default="", help="Evaluate only shard i/N (a contiguous block of points), e.g. 2/4")
+    parser.add_argument(
+        "--precision",
+        choices=tuple(RECORD_DTYPES),
+        default="float64",
+        help="float32 halves the store; ill-conditioned rows are still computed in float64",
+    )
+    parser.add_argument(
+        "--require",
+        action="append",
+        default=[],
+        help="Store only designs meeting this constraint, e.g. 'rsense_ohm>=2m' or 'il_peak_short_a<=15' (repeatable)",
+    )
+    args = parser.parse_args()
+
+    grids = dict(parse_grid(g) for g in args.grid)
+    fixed = {}
+    for item in args.set:
+        name, _, value = item.partition("=")
+        fixed[name.strip()] = float(value)
+    spec = SweepSpec(grids=grids, fixed=fixed)
+
+    t0 = time.perf_counter()
+    shard = parse_shard(args.shard) if args.shard else None
+    evaluator = ConstrainedEvaluator([parse_constraint(c) for c in args.require]) if args.require else None
+    store = run_sweep(
+        spec, Path(args.out), chunk_rows=args.chunk_rows, shard=shard, precision=args.precision, evaluator=evaluator
+    )
+    dt = time.perf_counter() - t0
+    print(f"Wrote {len(store):,} designs in {store.n_chunks} chunk(s) to {store.root} ({dt:.2f} s)")
+    if evaluator is not None:
+        print(format_constraint_stats(evaluator))
+    if args.precision != "float64":
+        print(format_precision_report(load_precision_report(store.root)))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
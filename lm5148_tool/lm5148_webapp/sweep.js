@@ -0,0 +1,413 @@
+// Design-space sweep (fsw × ripple × L) evaluated off the main thread.
+//
+// The worker runs the same eq31–eq45 functions as app.js: their source is copied into a Blob
+// worker, so there is one copy of the equations and nothing extra to load (a Blob worker also
+// starts from file://, where `new Worker('x.js')` is refused). If a worker cannot be created the
+// sweep runs on the main thread in small chunks that yield between each other, so typing never
+// waits for it either way.
+
+const SWEEP_STORAGE_KEY = 'lm5148_webapp_sweep_v1';
+
+const SWEEP_DEFAULTS = {
+  sweepFswMin: 300e3,
+  sweepFswMax: 2.2e6,
+  sweepFswN: 60,
+  sweepRippleMin: 0.2,
+  sweepRippleMax: 0.4,
+  sweepRippleN: 5,
+  // lockL: L follows Eq.31 at every point; otherwise L is swept (log spaced).
+  sweepLockL: true,
+  sweepLMin: 0.22e-6,
+  sweepLMax: 4.7e-6,
+  sweepLN: 20,
+  sweepX: 'fsw',
+  sweepY: 'ilPkSc_A',
+  sweepLogY: false,
+};
+
+// Per-point outputs (Float64Array each), named like app.js `lastResults`.
+const SWEEP_RESULTS = [
+  { key: 'lReq_H', label: 'L required (Eq.31)', unit: 'H' },
+  { key: 'lUsed_H', label: 'L used', unit: 'H' },
+  { key: 'deltaIlMax_A', label: 'ΔIL at VIN max (Eq.32)', unit: 'A' },
+  { key: 'ilPkMax_A', label: 'IL,pk at VIN max (Eq.32)', unit: 'A' },
+  { key: 'rsense_Ohm', label: 'RS (Eq.34)', unit: 'Ω' },
+  { key: 'ilPkSc_A', label: 'IL,pk short circuit (Eq.35)', unit: 'A' },
+  { key: 'coutMin_F', label: 'COUT min (Eq.36)', unit: 'F' },
+  { key: 'voutRipple_Vpp', label: 'VOUT ripple (Eq.37)', unit: 'V' },
+  { key: 'cinReq_F', label: 'CIN required (Eq.40)', unit: 'F' },
+  { key: 'rt_Ohm', label: 'RT (Eq.41)', unit: 'Ω' },
+  { key: 'rcomp_Ohm', label: 'RCOMP (Eq.43)', unit: 'Ω' },
+  { key: 'ccomp_F', label: 'CCOMP (Eq.44)', unit: 'F' },
+  { key: 'chf_F', label: 'CHF (Eq.45)', unit: 'F' },
+];
+
+const SWEEP_AXES = {
+  fsw: { label: 'FSW', unit: 'Hz', log: true },
+  ripple: { label: 'Ripple fraction', unit: '', log: false },
+  lUsed: { label: 'L used', unit: 'H', log: true },
+};
+
+const SWEEP_MAX_POINTS = 250_000;
+// Main-thread fallback: points per slice before yielding back to the event loop.
+const SWEEP_FALLBACK_SLICE = 4000;
+
+// Equations from app.js that the kernel calls, shipped to the worker by source.
+const SWEEP_EQUATIONS = [
+  rippleDeltaIl,
+  eq31_L,
+  deltaIl,
+  eq32_ilPk,
+  eq34_rsense,
+  eq35_ilPkSc,
+  eq36_coutMin,
+  eq37_voutRipple,
+  eq39_icinRms,
+  eq40_cinRequired,
+  eq41_rtOhm,
+  eq42_rtop,
+  eq43_rcomp,
+  eq44_ccomp,
+  eq45_chf,
+];
+
+function sweepAlloc(n, keys) {
+  const out = {};
+  for (const key of keys) out[key] = new Float64Array(n);
+  return out;
+}
+
+// Evaluate points [start, stop) of the grid into `out`. Point i = (iF·nR + iR)·nL + iL.
+function sweepRange(job, out, start, stop) {
+  const st = job.state;
+  const nR = job.ripple.length;
+  const nL = job.lockL ? 1 : job.lUsed.length;
+  for (let i = start; i < stop; i++) {
+    const iL = i % nL;
+    const iR = Math.floor(i / nL) % nR;
+    const iF = Math.floor(i / (nL * nR));
+    const fsw = job.fsw[iF];
+    const dIlNom = rippleDeltaIl(st.iout, job.ripple[iR]);
+    const lReq = eq31_L(st.vinNom, st.vout, fsw, dIlNom);
+    const L = job.lockL ? lReq : job.lUsed[iL];
+    const dIlMax = deltaIl(st.vinMax, st.vout, fsw, L);
+    const ilPkMax = eq32_ilPk(st.iout, dIlMax);
+    const rsense = eq34_rsense(st.vcsTh, st.ilPkMargin, ilPkMax);
+    const rcomp = eq43_rcomp(st.vout, rsense, st.gm, st.fc, st.coutEff, st.vref);
+    out.lReq_H[i] = lReq;
+    out.lUsed_H[i] = L;
+    out.deltaIlMax_A[i] = dIlMax;
+    out.ilPkMax_A[i] = ilPkMax;
+    out.rsense_Ohm[i] = rsense;
+    out.ilPkSc_A[i] = eq35_ilPkSc(st.vcsTh, rsense, st.vinMax, st.tDelay, L);
+    out.coutMin_F[i] = eq36_coutMin(L, st.iout, st.vout, st.voutOvershoot);
+    out.voutRipple_Vpp[i] = eq37_voutRipple(dIlNom, fsw, st.coutEff, st.routEsr);
+    out.cinReq_F[i] = eq40_cinRequired(st.iout, st.duty, fsw, st.vinRippleSpec, st.rinEsr).cin;
+    out.rt_Ohm[i] = eq41_rtOhm(fsw);
+    out.rcomp_Ohm[i] = rcomp;
+    out.ccomp_F[i] = eq44_ccomp(st.fc, rcomp);
+    out.chf_F[i] = eq45_chf(st.fesr, rcomp, st.cbw);
+  }
+}
+
+function sweepWorkerMain() {
+  self.onmessage = (event) => {
+    const job = event.data;
+    const t0 = performance.now();
+    const out = sweepAlloc(job.n, job.keys);
+    sweepRange(job, out, 0, job.n);
+    const buffers = Object.values(out).map((a) => a.buffer);
+    // Transfer, not copy: the buffers move to the main thread without serialisation.
+    self.postMessage({ id: job.id, out, ms: performance.now() - t0 }, buffers);
+  };
+}
+
+function sweepWorkerSource() {
+  const fns = [...SWEEP_EQUATIONS, sweepAlloc, sweepRange, sweepWorkerMain];
+  return `'use strict';\n${fns.map((f) => f.toString()).join('\n\n')}\nsweepWorkerMain();\n`;
+}
+
+const sweep = {
+  worker: null,
+  workerUrl: null,
+  mode: '',
+  busyId: 0, // id of the job in flight (0: idle)
+  pending: null, // that job
+  nextId: 1,
+  timer: null,
+  last: null, // { job, out, ms }
+};
+
+function sweepCreateWorker() {
+  if (sweep.worker || sweep.mode === 'main thread') return sweep.worker;
+  try {
+    if (!sweep.workerUrl) {
+      sweep.workerUrl = URL.createObjectURL(new Blob([sweepWorkerSource()], { type: 'text/javascript' }));
+    }
+    sweep.worker = new Worker(sweep.workerUrl);
+    sweep.worker.onmessage = (event) => sweepDone(event.data.id, event.data.out, event.data.ms);
+    sweep.worker.onerror = (event) => {
+      // A worker that fails to start (CSP, sandboxed preview) hands over to the fallback.
+      event.preventDefault?.();
+      sweepUseMainThread();
+    };
+    sweep.mode = 'Web Worker';
+  } catch {
+    sweepUseMainThread();
+  }
+  return sweep.worker;
+}
+
+function sweepUseMainThread() {
+  if (sweep.worker) sweep.worker.terminate();
+  sweep.worker = null;
+  sweep.mode = 'main thread';
+  if (sweep.busyId && sweep.pending) sweepRunChunked(sweep.pending);
+}
+
+function sweepGeom(lo, hi, n) {
+  const a = new Float64Array(n);
+  for (let i = 0; i < n; i++) a[i] = n === 1 ? lo : lo * (hi / lo) ** (i / (n - 1));
+  return a;
+}
+
+function sweepLin(lo, hi, n) {
+  const a = new Float64Array(n);
+  for (let i = 0; i < n; i++) a[i] = n === 1 ? lo : lo + (hi - lo) * (i / (n - 1));
+  return a;
+}
+
+function readSweepSettings() {
+  const s = { ...SWEEP_DEFAULTS };
+  for (const key of Object.keys(SWEEP_DEFAULTS)) {
+    const el = $(key);
+    if (!el) continue;
+    if (el.type === 'checkbox') s[key] = !!el.checked;
+    else if (el.tagName === 'SELECT') s[key] = el.value;
+    else s[key] = safeNumber(el.value);
+  }
+  return s;
+}
+
+function loadSweepSettings() {
+  try {
+    return { ...SWEEP_DEFAULTS, ...JSON.parse(localStorage.getItem(SWEEP_STORAGE_KEY) || '{}') };
+  } catch {
+    return { ...SWEEP_DEFAULTS };
+  }
+}
+
+function writeSweepSettings(s) {
+  for (const key of Object.keys(SWEEP_DEFAULTS)) {
+    const el = $(key);
+    if (!el) continue;
+    if (el.type === 'checkbox') el.checked = !!s[key];
+    else el.value = s[key];
+  }
+}
+
+function buildSweepJob(st, s) {
+  const count = (n) => Math.max(1, Math.min(2000, Math.round(n) || 1));
+  const job = {
+    id: sweep.nextId++,
+    state: st,
+    fsw: sweepGeom(s.sweepFswMin, s.sweepFswMax, count(s.sweepFswN)),
+    ripple: sweepLin(s.sweepRippleMin, s.sweepRippleMax, count(s.sweepRippleN)),
+    lockL: !!s.sweepLockL,
+    lUsed: sweepGeom(s.sweepLMin, s.sweepLMax, s.sweepLockL ? 1 : count(s.sweepLN)),
+    keys: SWEEP_RESULTS.map((r) => r.key),
+  };
+  job.n = job.fsw.length * job.ripple.length * (job.lockL ? 1 : job.lUsed.length);
+  return job;
+}
+
+function sweepRunChunked(job) {
+  const t0 = performance.now();
+  const out = sweepAlloc(job.n, job.keys);
+  let start = 0;
+  const step = () => {
+    if (sweep.busyId !== job.id) return; // superseded by a newer job
+    const stop = Math.min(start + SWEEP_FALLBACK_SLICE, job.n);
+    sweepRange(job, out, start, stop);
+    start = stop;
+    if (start < job.n) setTimeout(step, 0);
+    else sweepDone(job.id, out, performance.now() - t0);
+  };
+  setTimeout(step, 0);
+}
+
+function runSweep() {
+  const s = readSweepSettings();
+  localStorage.setItem(SWEEP_STORAGE_KEY, JSON.stringify(s));
+  for (const key of ['sweepLMin', 'sweepLMax', 'sweepLN']) {
+    const el = $(key);
+    if (el) el.disabled = !!s.sweepLockL;
+  }
+  const job = buildSweepJob(readInputs(), s);
+  if (job.n > SWEEP_MAX_POINTS) {
+    setText('sweepStatus', `${job.n.toLocaleString()} points requested; limit is ${SWEEP_MAX_POINTS.toLocaleString()}.`);
+    return;
+  }
+  if (sweep.busyId && sweep.worker) {
+    // The worker is mid-job and cannot be interrupted: replace it instead of queueing behind it.
+    sweep.worker.terminate();
+    sweep.worker = null;
+  }
+  sweep.busyId = job.id;
+  sweep.pending = job;
+  setText('sweepStatus', `Evaluating ${job.n.toLocaleString()} points…`);
+  const worker = sweepCreateWorker();
+  if (worker) {
+    // The job (inputs + axes) is small and copied; the axes stay here for plotting.
+    worker.postMessage(job);
+  } else {
+    sweepRunChunked(job);
+  }
+}
+
+function scheduleSweep(delayMs = 120) {
+  clearTimeout(sweep.timer);
+  sweep.timer = setTimeout(runSweep, delayMs);
+}
+
+function sweepDone(id, out, ms) {
+  if (id !== sweep.busyId) return;
+  sweep.busyId = 0;
+  sweep.last = { job: sweep.pending, out, ms };
+  sweep.pending = null;
+  drawSweep();
+}
+
+function sweepXValues(job, out, axis) {
+  const n = job.n;
+  const nR = job.ripple.length;
+  const nL = job.lockL ? 1 : job.lUsed.length;
+  if (axis === 'lUsed') return out.lUsed_H;
+  const x = new Float64Array(n);
+  for (let i = 0; i < n; i++) {
+    x[i] = axis === 'fsw' ? job.fsw[Math.floor(i / (nL * nR))] : job.ripple[Math.floor(i / nL) % nR];
+  }
+  return x;
+}
+
+function drawSweep() {
+  const canvas = $('sweepCanvas');
+  if (!canvas || !sweep.last) return;
+  const { job, out, ms } = sweep.last;
+  const s = readSweepSettings();
+  const axis = SWEEP_AXES[s.sweepX] ?? SWEEP_AXES.fsw;
+  const res = SWEEP_RESULTS.find((r) => r.key === s.sweepY) ?? SWEEP_RESULTS[0];
+  const xs = sweepXValues(job, out, s.sweepX);
+  const ys = out[res.key];
+  const logX = axis.log;
+  const logY = !!s.sweepLogY;
+  const tx = (v) => (logX ? Math.log10(v) : v);
+  const ty = (v) => (logY ? Math.log10(v) : v);
+
+  let x0 = Infinity, x1 = -Infinity, y0 = Infinity, y1 = -Infinity;
+  let shown = 0;
+  for (let i = 0; i < job.n; i++) {
+    const a = tx(xs[i]), b = ty(ys[i]);
+    if (!Number.isFinite(a) || !Number.isFinite(b)) continue;
+    shown++;
+    if (a < x0) x0 = a;
+    if (a > x1) x1 = a;
+    if (b < y0) y0 = b;
+    if (b > y1) y1 = b;
+  }
+
+  const dpr = window.devicePixelRatio || 1;
+  const cssW = canvas.clientWidth || 900;
+  const cssH = canvas.clientHeight || 360;
+  canvas.width = Math.round(cssW * dpr);
+  canvas.height = Math.round(cssH * dpr);
+  const ctx = canvas.getContext('2d');
+  ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+  ctx.clearRect(0, 0, cssW, cssH);
+
+  const pad = { l: 70, r: 14, t: 12, b: 36 };
+  const w = cssW - pad.l - pad.r;
+  const h = cssH - pad.t - pad.b;
+  ctx.strokeStyle = 'rgba(148,163,184,0.35)';
+  ctx.strokeRect(pad.l, pad.t, w, h);
+  ctx.fillStyle = '#94a3b8';
+  ctx.font = '12px system-ui, sans-serif';
+
+  if (!shown) {
+    ctx.fillText('No finite values to plot.', pad.l + 10, pad.t + 20);
+  } else {
+    if (x1 === x0) { x0 -= 0.5; x1 += 0.5; }
+    if (y1 === y0) { y0 -= 0.5; y1 += 0.5; }
+    const px = (a) => pad.l + ((a - x0) / (x1 - x0)) * w;
+    const py = (b) => pad.t + h - ((b - y0) / (y1 - y0)) * h;
+    const unTx = (a) => (logX ? 10 ** a : a);
+    const unTy = (b) => (logY ? 10 ** b : b);
+    for (let k = 0; k <= 4; k++) {
+      const a = x0 + ((x1 - x0) * k) / 4;
+      const b = y0 + ((y1 - y0) * k) / 4;
+      ctx.fillText(fmtEng(unTx(a), axis.unit), px(a) - 20, pad.t + h + 16);
+      ctx.fillText(fmtEng(unTy(b), res.unit), 4, py(b) + 4);
+    }
+    ctx.fillText(`${axis.label}${logX ? ' (log)' : ''}`, pad.l + w / 2 - 40, pad.t + h + 32);
+
+    // Colour by the ripple fraction index so each ripple setting reads as its own curve.
+    const nR = job.ripple.length;
+    const nL = job.lockL ? 1 : job.lUsed.length;
+    const size = job.n > 20_000 ? 1.5 : 2.5;
+    for (let i = 0; i < job.n; i++) {
+      const a = tx(xs[i]), b = ty(ys[i]);
+      if (!Number.isFinite(a) || !Number.isFinite(b)) continue;
+      const iR = Math.floor(i / nL) % nR;
+      ctx.fillStyle = `hsl(${nR > 1 ? 200 - (160 * iR) / (nR - 1) : 200}, 80%, 62%)`;
+      ctx.fillRect(px(a) - size / 2, py(b) - size / 2, size, size);
+    }
+
+    // Current design from the main calculator.
+    const st = readInputs();
+    const cur = res.key === 'lUsed_H' ? st.lUsed : lastResults?.[res.key];
+    const curX = s.sweepX === 'fsw' ? st.fsw : s.sweepX === 'ripple' ? st.rippleFrac : st.lUsed;
+    if (Number.isFinite(tx(curX)) && Number.isFinite(ty(cur))) {
+      ctx.strokeStyle = '#f8fafc';
+      ctx.lineWidth = 2;
+      ctx.beginPath();
+      ctx.arc(px(tx(curX)), py(ty(cur)), 6, 0, 2 * Math.PI);
+      ctx.stroke();
+    }
+  }
+
+  setText(
+    'sweepStatus',
+    `${job.n.toLocaleString()} points (${shown.toLocaleString()} finite) in ${ms.toFixed(1)} ms on the ${sweep.mode}. ` +
+    `${res.label} vs ${axis.label}; colour = ripple fraction ${fmtShort(job.ripple[0])}…${fmtShort(job.ripple[job.ripple.length - 1])}; ○ = current design.`
+  );
+}
+
+function initSweep() {
+  const yEl = $('sweepY');
+  if (!yEl) return;
+  for (const r of SWEEP_RESULTS) {
+    const opt = document.createElement('option');
+    opt.value = r.key;
+    opt.textContent = r.label;
+    yEl.appendChild(opt);
+  }
+  writeSweepSettings(loadSweepSettings());
+
+  // Any calculator input re-runs the sweep (debounced) after app.js has recalculated.
+  for (const key of Object.keys(DEFAULTS)) $(key)?.addEventListener('input', () => scheduleSweep());
+  $('btnReset')?.addEventListener('click', () => scheduleSweep(0));
+  for (const key of ['sweepFswMin', 'sweepFswMax', 'sweepFswN', 'sweepRippleMin', 'sweepRippleMax', 'sweepRippleN', 'sweepLockL', 'sweepLMin', 'sweepLMax', 'sweepLN']) {
+    $(key)?.addEventListener('input', () => scheduleSweep());
+  }
+  // Changing what is plotted needs no recomputation.
+  for (const key of ['sweepX', 'sweepY', 'sweepLogY']) {
+    $(key)?.addEventListener('input', () => {
+      localStorage.setItem(SWEEP_STORAGE_KEY, JSON.stringify(readSweepSettings()));
+      drawSweep();
+    });
+  }
+  window.addEventListener('resize', () => drawSweep());
+  scheduleSweep(0);
+}
+
+document.addEventListener('DOMContentLoaded', initSweep);
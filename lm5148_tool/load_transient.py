@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Mapping, Optional
+
+import numpy as np
+
+from lm5148_tool.lm5148_batch import complete_columns, inputs_to_columns, run_design_columns
+from lm5148_tool.lm5148_core import design_inputs_from_webapp
+
+
+# LM5148 error amplifier transconductance and current-sense gain (the Eq.43 constants).
+GM_EA_S = 1.2e-3
+A_CS = 10.0
+# Peak current-mode sampling double pole at fsw/2; Q ≈ 2/π with the internal slope compensation.
+CURRENT_LOOP_Q = 2.0 / math.pi
+
+N_STEPS_DEFAULT = 4000
+# Simulated time in crossover periods (1/f_c), long enough for the integrator to settle.
+SIM_PERIODS_DEFAULT = 20.0
+SETTLE_BAND_DEFAULT = 0.005  # ±0.5% of VOUT
+
+# State order: inductor current, its derivative, Cout voltage, Ccomp voltage, COMP node.
+STATE_NAMES = ("i_l", "di_l", "v_cout", "v_ccomp", "v_comp")
+
+
+@dataclass
+class StateSpace:
+    """Averaged small-signal model per design: x' = A x + B i_load, v_out = C x + D i_load."""
+
+    a: np.ndarray  # (n, 5, 5)
+    b: np.ndarray  # (n, 5)
+    c: np.ndarray  # (n, 5)
+    d: np.ndarray  # (n,)
+
+
+@dataclass
+class Discretized:
+    # Zero-order-hold matrices, precomputed once per design: x[k+1] = phi x[k] + gamma u[k].
+    phi: np.ndarray  # (n, 5, 5)
+    gamma: np.ndarray  # (n, 5)
+    dt_s: np.ndarray  # (n,)
+
+
+@dataclass
+class TransientResult:
+    step_up_a: np.ndarray
+    step_down_a: np.ndarray
+    undershoot_v: np.ndarray  # load step up
+    overshoot_v: np.ndarray  # load step down
+    settling_s: np.ndarray
+    # False when a closed-loop pole is in the right half-plane (metrics are then inf).
+    stable: np.ndarray
+    overshoot_spec_v: np.ndarray  # vout_overshoot_v (Eq.36 sizing target)
+    time_s: np.ndarray  # (n, steps)
+    # ΔVout per ampere of load step (the model is linear); scale by -step for a waveform.
+    unit_response_v: np.ndarray  # (n, steps)
+
+    @property
+    def meets_overshoot_spec(self) -> np.ndarray:
+        return self.overshoot_v <= self.overshoot_spec_v
+
+
+def build_state_space(c: Mapping[str, np.ndarray], res: Mapping[str, np.ndarray], cout_f: np.ndarray) -> StateSpace:
+    """Plant (current loop + Cout/ESR), type-II compensator (RCOMP, CCOMP, CHF + Cbw) and divider."""
+
+    n = len(cout_f)
+    rs = res["rsense_ohm"]
+    rc = c["rcomp_ohm"]
+    cc = res["ccomp_f"]
+    # Eq.45 subtracts the internal Cbw; the COMP node sees CHF + Cbw (CHF cannot go negative).
+    chf = np.maximum(res["chf_f"], 0.0) + c["cbw_f"]
+    esr = c["rout_esr_ohm"]
+    k_fb = np.minimum(c["vref_v"] / c["vout_v"], 1.0)
+    wn = np.pi * c["fsw_hz"]
+    gm_k = GM_EA_S * k_fb
+
+    a = np.zeros((n, 5, 5))
+    b = np.zeros((n, 5))
+    # Inductor current follows COMP / (A_CS * RS) through the sampling double pole.
+    a[:, 0, 1] = 1.0
+    a[:, 1, 0] = -(wn**2)
+    a[:, 1, 1] = -wn / CURRENT_LOOP_Q
+    a[:, 1, 4] = wn**2 / (A_CS * rs)
+    # Cout: (i_L - i_load) / Cout
+    a[:, 2, 0] = 1.0 / cout_f
+    b[:, 2] = -1.0 / cout_f
+    # Ccomp charged through RCOMP from the COMP node.
+    a[:, 3, 3] = -1.0 / (rc * cc)
+    a[:, 3, 4] = 1.0 / (rc * cc)
+    # COMP node: gm * (-k * v_out) minus the RCOMP branch current, into CHF + Cbw.
+    # v_out = v_cout + ESR * (i_L - i_load)
+    a[:, 4, 0] = -gm_k * esr / chf
+    a[:, 4, 2] = -gm_k / chf
+    a[:, 4, 3] = 1.0 / (rc * chf)
+    a[:, 4, 4] = -1.0 / (rc * chf)
+    b[:, 4] = gm_k * esr / chf
+
+    cm = np.zeros((n, 5))
+    cm[:, 0] = esr
+    cm[:, 2] = 1.0
+    return StateSpace(a=a, b=b, c=cm, d=-esr)
+
+
+def expm_batched(m: np.ndarray) -> np.ndarray:
+    """Matrix exponential of a stack of matrices (scaling and squaring with a Taylor series)."""
+
+    norm = np.max(np.sum(np.abs(m), axis=-2), axis=-1)
+    squarings = np.maximum(0, np.ceil(np.log2(np.maximum(norm, 1e-300))).astype(int) + 1)
+    scaled = m / (2.0 ** squarings)[:, None, None]
+    eye = np.broadcast_to(np.eye(m.shape[-1]), m.shape)
+    out = eye.copy()
+    term = eye.copy()
+    # ||scaled|| <= 1/2, so 18 terms are far below float64 rounding.
+    for k in range(1, 19):
+        term = term @ scaled / k
+        out = out + term
+    for i in range(int(squarings.max(initial=0))):
+        sq = out @ out
+        out = np.where((i < squarings)[:, None, None], sq, out)
+    return out
+
+
+def discretize(ss: StateSpace, dt_s: np.ndarray) -> Discretized:
+    """Exact ZOH discretization via the exponential of the augmented [[A, B], [0, 0]] matrix."""
+
+    n, s = ss.a.shape[:2]
+    aug = np.zeros((n, s + 1, s + 1))
+    aug[:, :s, :s] = ss.a
+    aug[:, :s, s] = ss.b
+    e = expm_batched(aug * dt_s[:, None, None])
+    return Discretized(phi=e[:, :s, :s], gamma=e[:, :s, s], dt_s=dt_s)
+
+
+def step_response(ss: StateSpace, disc: Discretized, n_steps: int) -> np.ndarray:
+    """ΔVout for a 1 A load step at t = 0, all designs stepped together: (n, n_steps + 1)."""
+
+    n = len(disc.dt_s)
+    x = np.zeros((n, ss.a.shape[1]))
+    out = np.empty((n, n_steps + 1))
+    out[:, 0] = ss.d
+    phi_t = np.ascontiguousarray(np.swapaxes(disc.phi, 1, 2))
+    for k in range(1, n_steps + 1):
+        x = np.einsum("ni,nij->nj", x, phi_t) + disc.gamma
+        out[:, k] = np.einsum("ni,ni->n", ss.c, x) + ss.d
+    return out
+
+
+def simulate_load_steps(
+    cols: Mapping[str, object],
+    *,
+    step_up_a: Optional[object] = None,
+    step_down_a: Optional[object] = None,
+    cout_f: Optional[object] = None,
+    n_steps: int = N_STEPS_DEFAULT,
+    sim_periods: float = SIM_PERIODS_DEFAULT,
+    settle_band: float = SETTLE_BAND_DEFAULT,
+) -> TransientResult:
+    """Load-step undershoot, load-off overshoot and settling time for every design in `cols`.
+
+    `cols` is the `run_design_columns` input mapping. Steps default to the full IOUT (the Eq.36
+    load-off case); Cout defaults to the Eq.36 value, as `run_design` uses for COUT,eff.
+    CCOMP/CHF come from Eq.44/45 for each design's RCOMP. The model is linear, so one unit step
+    response per design is scaled to both step directions.
+    """
+
+    c = complete_columns(cols)
+    c = {k: np.atleast_1d(v) for k, v in c.items()}
+    n = np.broadcast_shapes(*(v.shape for v in c.values()))[0]
+    c = {k: np.broadcast_to(v, (n,)) for k, v in c.items()}
+    res = {k: np.broadcast_to(v, (n,)) for k, v in run_design_columns(c).items()}
+    cout = np.broadcast_to(np.asarray(res["cout_load_off_f"] if cout_f is None else cout_f, dtype=np.float64), (n,))
+    up = np.broadcast_to(np.asarray(c["iout_a"] if step_up_a is None else step_up_a, dtype=np.float64), (n,))
+    down = np.broadcast_to(np.asarray(c["iout_a"] if step_down_a is None else step_down_a, dtype=np.float64), (n,))
+
+    ss = build_state_space(c, res, cout)
+    dt = sim_periods / c["f_c_hz"] / n_steps
+    disc = discretize(ss, dt)
+    unit = step_response(ss, disc, n_steps)
+    t = dt[:, None] * np.arange(n_steps + 1)[None, :]
+
+    with np.errstate(invalid="ignore"):
+        stable = np.all(np.linalg.eigvals(ss.a).real < 0.0, axis=1) & np.all(np.isfinite(unit), axis=1)
+    unit = np.where(stable[:, None], unit, np.nan)
+
+    # Load step up pulls VOUT down; load step down (load-off) pushes it up.
+    peak = np.where(stable, np.maximum(-np.min(unit, axis=1), 0.0), np.inf)
+    undershoot = peak * up
+    overshoot = peak * down
+    band = settle_band * c["vout_v"]
+    worst = np.maximum(up, down)
+    outside = np.abs(unit) * worst[:, None] > band[:, None]
+    last = np.where(outside.any(axis=1), n_steps - np.argmax(outside[:, ::-1], axis=1), 0)
+    settling = np.where((last >= n_steps) | ~stable, np.inf, last * dt)
+
+    return TransientResult(
+        step_up_a=up,
+        step_down_a=down,
+        undershoot_v=undershoot,
+        overshoot_v=overshoot,
+        settling_s=settling,
+        stable=stable,
+        overshoot_spec_v=c["vout_overshoot_v"],
+        time_s=t,
+        unit_response_v=unit,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Load-step transient from an averaged current-mode model with the Eq.44/45 compensation."
+    )
+    parser.add_argument("--json", type=str, required=True, help="lm5148_design.json (webapp/Streamlit export)")
+    parser.add_argument("--step", type=float, default=None, help="Load step [A] (default: IOUT)")
+    parser.add_argument("--cout", type=float, default=None, help="Effective Cout [F] (default: Eq.36)")
+    parser.add_argument("--steps", type=int, default=N_STEPS_DEFAULT)
+    parser.add_argument("--csv", type=str, default="", help="Optional waveform CSV (time, Vout for load-on and load-off)")
+    args = parser.parse_args()
+
+    inp = design_inputs_from_webapp(json.loads(Path(args.json).read_text(encoding="utf-8")).get("inputs") or {})
+    tr = simulate_load_steps(inputs_to_columns([inp]), step_up_a=args.step, step_down_a=args.step, cout_f=args.cout, n_steps=args.steps)
+
+    if not tr.stable[0]:
+        print("Closed loop is unstable with these compensation values (right half-plane pole)")
+        return 2
+    spec = float(tr.overshoot_spec_v[0])
+    print(f"Load step          {tr.step_up_a[0]:.3g} A")
+    print(f"Undershoot (on)    {tr.undershoot_v[0] * 1e3:.2f} mV")
+    print(f"Overshoot (off)    {tr.overshoot_v[0] * 1e3:.2f} mV  (vout_overshoot_v = {spec * 1e3:.1f} mV, "
+          f"{'meets' if tr.meets_overshoot_spec[0] else 'exceeds'} spec)")
+    print(f"Settling (±{SETTLE_BAND_DEFAULT:.1%})  {tr.settling_s[0] * 1e6:.1f} µs")
+
+    if args.csv:
+        vout = inp.vout_v
+        lines = ["time_s,vout_load_on_v,vout_load_off_v"]
+        for t, u in zip(tr.time_s[0], tr.unit_response_v[0]):
+            lines.append(f"{t:.9g},{vout + u * tr.step_up_a[0]:.9g},{vout - u * tr.step_down_a[0]:.9g}")
+        Path(args.csv).write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
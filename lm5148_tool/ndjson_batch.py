@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import IO, Iterator, Optional, TextIO
+
+import numpy as np
+
+from lm5148_tool.lm5148_batch import RESULT_FIELDS, inputs_to_columns, run_design_columns
+from lm5148_tool.lm5148_core import DesignInputs, design_inputs_from_webapp
+from lm5148_tool.shards import Shard, file_fingerprint, parse_shard, write_manifest
+
+
+CHUNK_LINES_DEFAULT = 8192
+# Raw text kept in error records, so one huge broken line cannot bloat the error file.
+ERROR_TEXT_LIMIT = 200
+
+
+@dataclass
+class BatchSummary:
+    lines: int = 0
+    designs: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    # Non-blank input lines, including those left to other shards.
+    total_lines: int = 0
+
+
+def parse_payload_line(text: str) -> tuple[DesignInputs, Optional[dict]]:
+    """One NDJSON line (a webapp-format payload with an `inputs` object) -> (DesignInputs, meta)."""
+
+    if not text.isascii():
+        try:
+            text.encode("utf-8")
+        except UnicodeEncodeError:
+            # Input is read with surrogateescape, so undecodable bytes show up here rather than aborting the run.
+            raise ValueError("Line is not valid UTF-8") from None
+    try:
+        payload = json.loads(text)
+    except RecursionError:
+        raise ValueError("Line is nested too deeply") from None
+    if not isinstance(payload, dict) or "inputs" not in payload:
+        raise ValueError("Line must be a JSON object with an 'inputs' object")
+    meta = payload.get("meta")
+    return design_inputs_from_webapp(payload["inputs"]), meta if isinstance(meta, dict) else None
+
+
+def _numbered_lines(fh: TextIO, summary: BatchSummary, shard: Optional[Shard] = None) -> Iterator[tuple[int, str]]:
+    for lineno, line in enumerate(fh, start=1):
+        if line.strip():
+            summary.total_lines += 1
+            if shard is None or shard.owns_line(lineno):
+                yield lineno, line
+
+
+def process_stream(
+    src: TextIO,
+    out: IO[str],
+    errors: IO[str],
+    *,
+    chunk_lines: int = CHUNK_LINES_DEFAULT,
+    shard: Optional[Shard] = None,
+) -> BatchSummary:
+    """Stream payload lines from `src`, evaluate them `chunk_lines` at a time, write one result per line.
+
+    Memory stays bounded by the chunk size. Each result line is
+    `{"line": n, "results": {...}}` (plus `meta` when the payload had one); non-finite values are
+    written as null. Lines that fail to parse or validate go to `errors` as
+    `{"line": n, "error": "...", "text": "..."}` and processing continues.
+
+    With `shard`, only the lines that shard owns (round-robin by line number) are evaluated;
+    line numbers stay global so `shards.merge_ndjson` can interleave the shards again.
+    """
+
+    summary = BatchSummary()
+    t0 = time.perf_counter()
+    lines = _numbered_lines(src, summary, shard)
+    while True:
+        chunk = list(islice(lines, chunk_lines))
+        if not chunk:
+            break
+        summary.lines += len(chunk)
+
+        ok_lines: list[int] = []
+        metas: list[Optional[dict]] = []
+        designs: list[DesignInputs] = []
+        for lineno, text in chunk:
+            try:
+                design, meta = parse_payload_line(text)
+            except (ValueError, TypeError, OverflowError) as e:
+                summary.errors += 1
+                raw = text.rstrip("\r\n")[:ERROR_TEXT_LIMIT]
+                raw = raw.encode("utf-8", "surrogateescape").decode("utf-8", "replace")
+                record = {"line": lineno, "error": str(e), "text": raw}
+                errors.write(json.dumps(record, ensure_ascii=False) + "\n")
+                continue
+            ok_lines.append(lineno)
+            metas.append(meta)
+            designs.append(design)
+
+        if not designs:
+            continue
+        res = run_design_columns(inputs_to_columns(designs))
+        table = np.column_stack([res[name] for name in RESULT_FIELDS])
+        table = np.where(np.isfinite(table), table, np.nan)
+
+        buf = []
+        for lineno, meta, row in zip(ok_lines, metas, table.tolist()):
+            record: dict = {"line": lineno}
+            if meta is not None:
+                record["meta"] = meta
+            record["results"] = {k: (None if v != v else v) for k, v in zip(RESULT_FIELDS, row)}
+            buf.append(json.dumps(record, separators=(",", ":")))
+        out.write("\n".join(buf) + "\n")
+        summary.designs += len(designs)
+
+    summary.seconds = time.perf_counter() - t0
+    return summary
+
+
+def process_file(
+    in_path: Path,
+    out_path: Path,
+    errors_path: Path,
+    *,
+    chunk_lines: int = CHUNK_LINES_DEFAULT,
+    shard: Optional[Shard] = None,
+) -> BatchSummary:
+    if shard is not None and "-" in (str(in_path), str(out_path)):
+        raise ValueError("Sharded runs need real input and output files (not '-')")
+    with contextlib.ExitStack() as stack:
+        if str(in_path) == "-":
+            src = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="surrogateescape")
+        else:
+            src = stack.enter_context(open(in_path, encoding="utf-8", errors="surrogateescape"))
+        if str(out_path) == "-":
+            out = sys.stdout
+        else:
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            out = stack.enter_context(open(out_path, "w", encoding="utf-8"))
+        errors_path.parent.mkdir(parents=True, exist_ok=True)
+        errors = stack.enter_context(open(errors_path, "w", encoding="utf-8"))
+        summary = process_stream(src, out, errors, chunk_lines=chunk_lines, shard=shard)
+    if shard is not None:
+        write_manifest(
+            out_path,
+            shard,
+            kind="ndjson",
+            work=file_fingerprint(in_path),
+            total_lines=summary.total_lines,
+            lines=summary.lines,
+            designs=summary.designs,
+            errors=summary.errors,
+            errors_file=errors_path.name,
+        )
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Stream an NDJSON file of lm5148_design.json payloads through run_design into NDJSON results."
+    )
+    parser.add_argument("--in", dest="in_path", required=True, help="Input .ndjson ('-' for stdin)")
+    parser.add_argument("--out", required=True, help="Output results .ndjson ('-' for stdout)")
+    parser.add_argument("--errors", default="", help="Error .ndjson (default: <out>.errors.ndjson)")
+    parser.add_argument("--chunk-lines", type=int, default=CHUNK_LINES_DEFAULT)
+    parser.add_argument("--shard", type=str, default="", help="Evaluate only shard i/N of the lines (round-robin), e.g. 2/4")
+    args = parser.parse_args()
+
+    out_path = Path(args.out)
+    if args.errors:
+        errors_path = Path(args.errors)
+    elif args.out == "-":
+        errors_path = Path("errors.ndjson")
+    else:
+        errors_path = out_path.with_name(out_path.stem + ".errors.ndjson")
+
+    shard = parse_shard(args.shard) if args.shard else None
+    summary = process_file(Path(args.in_path), out_path, errors_path, chunk_lines=args.chunk_lines, shard=shard)
+    rate = summary.designs / summary.seconds if summary.seconds > 0 else 0.0
+    print(
+        f"{summary.designs:,} design(s) from {summary.lines:,} line(s) in {summary.seconds:.2f} s "
+        f"({rate:,.0f}/s); {summary.errors:,} error(s) -> {errors_path}",
+        file=sys.stderr,
+    )
+    return 0 if summary.errors == 0 else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+import altair as alt
+import numpy as np
+import streamlit as st
+
+from lm5148_tool.results_store import SCHEMA_FILE, ResultsStore
+from lm5148_tool.sweep_plot import (
+    DENSITY_BINS_DEFAULT,
+    SERIES_POINTS_DEFAULT,
+    Density,
+    column_range,
+    density,
+    series,
+    snap_window,
+    widen_range,
+)
+
+
+st.set_page_config(page_title="LM5148 sweep results", layout="wide")
+st.title("Sweep results")
+st.caption(
+    "Plots a results store from lm5148_sweep without sending every row to the browser: scatter data is binned into a "
+    "density image and series are reduced to a min/max envelope + LTTB, server-side, cached per zoom level."
+)
+
+
+def _stamp(store_dir: str) -> int:
+    # schema.json is rewritten on every append, so its mtime invalidates the caches of a growing store.
+    return (Path(store_dir) / SCHEMA_FILE).stat().st_mtime_ns
+
+
+@st.cache_resource(max_entries=8)
+def _store(store_dir: str, stamp: int) -> ResultsStore:
+    return ResultsStore.open(Path(store_dir))
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _range(store_dir: str, stamp: int, column: str, log: bool) -> tuple[float, float]:
+    # Constant columns (most swept inputs) get a non-empty range, or st.slider refuses min == max.
+    return widen_range(*column_range(_store(store_dir, stamp), column, log=log), log=log)
+
+
+# Keyed on the snapped window: every pan/zoom inside the same tiles of a level is a cache hit.
+@st.cache_data(max_entries=64, show_spinner="Binning...")
+def _density(
+    store_dir: str, stamp: int, x: str, y: str, xw: tuple[float, float], yw: tuple[float, float], log_x: bool, log_y: bool
+) -> Density:
+    return density(_store(store_dir, stamp), x, y, x_range=xw, y_range=yw, bins=DENSITY_BINS_DEFAULT, log_x=log_x, log_y=log_y)
+
+
+@st.cache_data(max_entries=64, show_spinner="Downsampling...")
+def _series(
+    store_dir: str, stamp: int, x: str, y: str, xw: tuple[float, float], n_points: int, log_x: bool
+) -> tuple[np.ndarray, np.ndarray]:
+    return series(_store(store_dir, stamp), x, y, x_range=xw, n_points=n_points, log_x=log_x)
+
+
+def _zoom_slider(label: str, full: tuple[float, float], log: bool, key: str) -> tuple[float, float]:
+    """Range slider over the column (in decades on a log axis)."""
+
+    if log:
+        lo, hi = math.log10(full[0]), math.log10(full[1])
+        a, b = st.slider(f"{label} [log10]", lo, hi, (lo, hi), step=(hi - lo) / 200 or 1.0, key=key)
+        return 10.0**a, 10.0**b
+    step = (full[1] - full[0]) / 200 or 1.0
+    return st.slider(label, full[0], full[1], (full[0], full[1]), step=step, key=key)
+
+
+def _axis_scale(window: tuple[float, float], log: bool) -> alt.Scale:
+    return alt.Scale(type="log" if log else "linear", domain=list(window), zero=False)
+
+
+store_dir = st.text_input("Results store directory", value="", placeholder="runs/sweep1")
+if not store_dir or not (Path(store_dir) / SCHEMA_FILE).exists():
+    st.info("Enter a results store written by `python -m lm5148_tool.lm5148_sweep ... --out <dir>`.")
+    st.stop()
+
+stamp = _stamp(store_dir)
+store = _store(store_dir, stamp)
+columns = store.columns
+c1, c2, c3 = st.columns([2, 2, 3])
+x_col = c1.selectbox("x", columns, index=columns.index("fsw_hz") if "fsw_hz" in columns else 0)
+y_col = c2.selectbox("y", columns, index=columns.index("il_peak_short_a") if "il_peak_short_a" in columns else 1)
+mode = c3.radio("View", ["Density (every point)", "Envelope (min/max + LTTB)"], horizontal=True)
+o1, o2, o3 = st.columns(3)
+log_x = o1.checkbox("log x")
+log_y = o2.checkbox("log y")
+n_points = o3.number_input("Envelope points", 100, 20_000, SERIES_POINTS_DEFAULT, step=500)
+
+try:
+    x_full = _range(store_dir, stamp, x_col, log_x)
+    y_full = _range(store_dir, stamp, y_col, log_y)
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
+
+z1, z2 = st.columns(2)
+with z1:
+    x_view = _zoom_slider(f"Zoom {x_col}", x_full, log_x, key=f"zx_{x_col}_{log_x}")
+with z2:
+    y_view = _zoom_slider(f"Zoom {y_col}", y_full, log_y, key=f"zy_{y_col}_{log_y}")
+x_win = snap_window(*x_view, x_full, log=log_x)
+y_win = snap_window(*y_view, y_full, log=log_y)
+
+if mode.startswith("Density"):
+    dens = _density(store_dir, stamp, x_col, y_col, (x_win.lo, x_win.hi), (y_win.lo, y_win.hi), log_x, log_y)
+    ix, iy = np.nonzero(dens.counts)
+    cells = {
+        "x0": dens.x_edges[ix],
+        "x1": dens.x_edges[ix + 1],
+        "y0": dens.y_edges[iy],
+        "y1": dens.y_edges[iy + 1],
+        "designs": dens.counts[ix, iy],
+    }
+    chart = (
+        alt.Chart(alt.Data(values=[dict(zip(cells, row)) for row in zip(*(v.tolist() for v in cells.values()))]))
+        .mark_rect(clip=True)
+        .encode(
+            x=alt.X("x0:Q", title=x_col, scale=_axis_scale(x_view, log_x)),
+            x2="x1:Q",
+            y=alt.Y("y0:Q", title=y_col, scale=_axis_scale(y_view, log_y)),
+            y2="y1:Q",
+            color=alt.Color("designs:Q", scale=alt.Scale(type="log", scheme="viridis")),
+            tooltip=["x0:Q", "x1:Q", "y0:Q", "y1:Q", "designs:Q"],
+        )
+    )
+    drawn = f"{len(ix):,} bins holding {dens.n_points:,} designs"
+else:
+    xs, ys = _series(store_dir, stamp, x_col, y_col, (x_win.lo, x_win.hi), int(n_points), log_x)
+    chart = (
+        alt.Chart(alt.Data(values=[{"x": a, "y": b} for a, b in zip(xs.tolist(), ys.tolist())]))
+        .mark_line(clip=True, point=alt.OverlayMarkDef(size=8))
+        .encode(
+            x=alt.X("x:Q", title=x_col, scale=_axis_scale(x_view, log_x)),
+            y=alt.Y("y:Q", title=y_col, scale=_axis_scale(y_view, log_y)),
+            tooltip=["x:Q", "y:Q"],
+        )
+    )
+    drawn = f"{len(xs):,} points (min/max per x bucket, then LTTB)"
+
+st.altair_chart(chart.properties(height=520), use_container_width=True)
+st.caption(
+    f"{len(store):,} rows in {store.n_chunks} chunk(s). Drawn: {drawn}. "
+    f"Aggregated window: zoom level {x_win.level} × {y_win.level} "
+    f"({x_col} {x_win.lo:.4g}…{x_win.hi:.4g}, {y_col} {y_win.lo:.4g}…{y_win.hi:.4g})."
+)
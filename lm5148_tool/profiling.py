@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# tracemalloc slows allocation-heavy stages (openpyxl loads) several-fold; set to "0" for clean timings.
+PROFILE_MEMORY_ENV = "LM5148_PROFILE_MEMORY"
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+    # Peak traced Python memory while the stage was open (0 when memory tracking is off).
+    peak_mem_bytes: int = 0
+
+
+class _NullStage:
+    """Shared no-op context manager returned by `stage()` while profiling is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: object) -> bool:
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("_prof", "_name", "_t0")
+
+    def __init__(self, prof: "Profiler", name: str) -> None:
+        self._prof = prof
+        self._name = name
+        self._t0 = 0.0
+
+    def __enter__(self) -> None:
+        self._prof._enter_memory()
+        self._t0 = time.perf_counter()
+
+    def __exit__(self, *exc: object) -> bool:
+        t1 = time.perf_counter()
+        self._prof._record(self._name, self._t0, t1, self._prof._exit_memory())
+        return False
+
+
+class Profiler:
+    """Collects per-stage wall time, call counts and (optionally) peak traced memory.
+
+    Stages nest; each stage's peak memory includes its children. Memory tracking uses
+    `tracemalloc`, which is process-wide, so peaks are approximate when stages run on
+    several threads at once.
+    """
+
+    def __init__(self, *, track_memory: bool = True) -> None:
+        self.track_memory = track_memory
+        self.stats: dict[str, StageStats] = {}
+        self.events: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._t_origin = time.perf_counter()
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self) -> None:
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def _mem_stack(self) -> list[int]:
+        stack = getattr(self._local, "mem_stack", None)
+        if stack is None:
+            stack = self._local.mem_stack = []
+        return stack
+
+    def _enter_memory(self) -> None:
+        if not self.track_memory:
+            return
+        stack = self._mem_stack()
+        _current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            # Fold the parent's peak so far into its frame before resetting the counter.
+            stack[-1] = max(stack[-1], peak)
+        stack.append(0)
+        tracemalloc.reset_peak()
+
+    def _exit_memory(self) -> int:
+        if not self.track_memory:
+            return 0
+        stack = self._mem_stack()
+        _current, peak = tracemalloc.get_traced_memory()
+        stage_peak = max(stack.pop(), peak) if stack else peak
+        if stack:
+            stack[-1] = max(stack[-1], stage_peak)
+        return stage_peak
+
+    def _record(self, name: str, t0: float, t1: float, peak_mem: int) -> None:
+        dur = t1 - t0
+        with self._lock:
+            st = self.stats.get(name)
+            if st is None:
+                st = self.stats[name] = StageStats()
+            st.calls += 1
+            st.total_s += dur
+            st.max_s = max(st.max_s, dur)
+            st.peak_mem_bytes = max(st.peak_mem_bytes, peak_mem)
+            self.events.append(
+                {
+                    "name": name,
+                    "ts_us": (t0 - self._t_origin) * 1e6,
+                    "dur_us": dur * 1e6,
+                    "tid": threading.get_ident(),
+                    "peak_mem_bytes": peak_mem,
+                }
+            )
+
+    def summary(self) -> list[dict[str, Any]]:
+        rows = [
+            {
+                "stage": name,
+                "calls": st.calls,
+                "total_s": st.total_s,
+                "mean_s": st.total_s / st.calls,
+                "max_s": st.max_s,
+                "peak_mem_bytes": st.peak_mem_bytes,
+            }
+            for name, st in self.stats.items()
+        ]
+        rows.sort(key=lambda r: r["total_s"], reverse=True)
+        return rows
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """Chrome trace-event JSON (chrome://tracing, Perfetto) with the stage summary attached."""
+
+        pid = os.getpid()
+        trace_events = [
+            {
+                "name": ev["name"],
+                "cat": "lm5148",
+                "ph": "X",
+                "ts": ev["ts_us"],
+                "dur": ev["dur_us"],
+                "pid": pid,
+                "tid": ev["tid"],
+                "args": {"peak_mem_bytes": ev["peak_mem_bytes"]},
+            }
+            for ev in self.events
+        ]
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms", "stages": self.summary()}
+
+    def write(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_chrome_trace(), indent=1), encoding="utf-8")
+
+    def format_table(self) -> str:
+        lines = [f"{'stage':34s} {'calls':>7s} {'total ms':>10s} {'max ms':>9s} {'peak MiB':>9s}"]
+        for r in self.summary():
+            lines.append(
+                f"{r['stage']:34s} {r['calls']:7d} {r['total_s'] * 1e3:10.2f} {r['max_s'] * 1e3:9.2f} "
+                f"{r['peak_mem_bytes'] / 2**20:9.2f}"
+            )
+        return "\n".join(lines)
+
+
+# Per thread (and asyncio task): Streamlit runs each session's script on its own thread, so one
+# session enabling or disabling profiling does not affect the others.
+_active: contextvars.ContextVar[Optional[Profiler]] = contextvars.ContextVar("lm5148_profiler", default=None)
+
+
+def stage(name: str):
+    """Context manager timing one stage; a shared no-op while profiling is disabled."""
+
+    prof = _active.get()
+    if prof is None:
+        return _NULL_STAGE
+    return prof.stage(name)
+
+
+def profiled(name: str) -> Callable[[F], F]:
+    """Decorator form of `stage()`."""
+
+    def deco(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            prof = _active.get()
+            if prof is None:
+                return fn(*args, **kwargs)
+            with prof.stage(name):
+                return fn(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return deco
+
+
+def active_profiler() -> Optional[Profiler]:
+    return _active.get()
+
+
+def _track_memory_default() -> bool:
+    return os.environ.get(PROFILE_MEMORY_ENV, "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def enable(*, track_memory: Optional[bool] = None) -> Profiler:
+    prof = _active.get()
+    if prof is not None:
+        return prof
+    if track_memory is None:
+        track_memory = _track_memory_default()
+    prof = Profiler(track_memory=track_memory)
+    prof.start()
+    _active.set(prof)
+    return prof
+
+
+def disable() -> Optional[Profiler]:
+    prof = _active.get()
+    _active.set(None)
+    if prof is not None:
+        prof.stop()
+    return prof
+
+
+@contextmanager
+def profile_session(out_path: Optional[Path], *, track_memory: Optional[bool] = None) -> Iterator[Optional[Profiler]]:
+    """Enable profiling for the block when `out_path` is set; write the trace file on exit.
+
+    With `out_path=None` this yields None and leaves profiling disabled, so CLIs can wrap
+    their whole body unconditionally.
+    """
+
+    if out_path is None:
+        yield None
+        return
+
+    prof = enable(track_memory=track_memory)
+    try:
+        yield prof
+    finally:
+        disable()
+        prof.write(out_path)
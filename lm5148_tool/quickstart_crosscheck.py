@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from lm5148_tool.lm5148_batch import complete_columns, run_design_columns
+from lm5148_tool.populate_quickstart_calculator import sheet_xml_part
+
+
+TEMPLATE_DEFAULT = Path(__file__).resolve().parents[1] / "training" / "LM5148_LM25148_quickstart_calculator_A4.xlsm"
+SHEET = "Design Regulator"
+
+# Quickstart cells, found by their row label (column D, or column A for the compensation table).
+# key -> (label prefix, label column, value column, row offset from the label).
+# The feedback rows have formula labels that go blank in some VOUT modes, so they hang off the row above.
+CELL_LABELS: dict[str, tuple[str, str, str, int]] = {
+    "vin_min": ("Input Voltage – Min", "D", "E", 0),
+    "vin_nom": ("Input Voltage – Nom", "D", "E", 0),
+    "vin_max": ("Input Voltage – Max", "D", "E", 0),
+    "vout": ("Output Voltage, VOUT", "D", "E", 0),
+    "iout": ("Full Load Output Current", "D", "E", 0),
+    "fsw_khz": ("Switching Frequency", "D", "E", 0),
+    "rt_kohm": ("Frequency Set Resistor", "D", "E", 0),
+    "rs_rec_mohm": ("Recommended Shunt Resistance", "D", "E", 0),
+    "l_uh": ("Inductance, LO", "D", "E", 0),
+    "dil_pct": ("DIL as a % at VIN(nom)", "D", "E", 0),
+    "cout_min_uf": ("Minimum Output Capacitance", "D", "E", 0),
+    "cout_esr_mohm": ("Output Capacitor ESR", "D", "E", 0),
+    "cout_rms_a": ("Output Capacitor RMS Current", "D", "E", 0),
+    "vin_ripple_mv": ("Input Voltage Ripple Spec", "D", "E", 0),
+    "cin_min_uf": ("Minimum Input Capacitance", "D", "E", 0),
+    "cin_esr_mohm": ("Input Capacitor ESR", "D", "E", 0),
+    "cin_rms_a": ("Input Capacitor RMS Current", "D", "E", 0),
+    "f_esr_khz": ("ESR Zero Frequency", "D", "E", 0),
+    "f_c_khz": ("Desired Crossover Frequency", "D", "E", 0),
+    "rfb_top_kohm": ("Desired Crossover Frequency", "D", "E", 2),
+    "rfb_bot_kohm": ("Desired Crossover Frequency", "D", "E", 3),
+    "vout_set": ("Desired Crossover Frequency", "D", "E", 4),
+    "rcomp_kohm": ("RC1", "A", "B", 0),
+    "ccomp_nf": ("CC1", "A", "B", 0),
+    "chf_pf": ("CC2", "A", "B", 0),
+}
+
+# Equation -> (run_design result, quickstart key, quickstart unit scale to SI).
+# RFB is compared as the upper resistor Eq.42 gives for TI's lower one.
+EQUATIONS: dict[str, tuple[str, str, float]] = {
+    "eq34_rsense": ("rsense_ohm", "rs_rec_mohm", 1e-3),
+    "eq36_cout": ("cout_load_off_f", "cout_min_uf", 1e-6),
+    "eq38_ioutcap_rms": ("ioutcap_rms_a", "cout_rms_a", 1.0),
+    "eq39_cin_rms": ("cin_rms_a", "cin_rms_a", 1.0),
+    "eq40_cin_required": ("cin_required_f", "cin_min_uf", 1e-6),
+    "eq41_rt": ("rt_ohm", "rt_kohm", 1e3),
+    "eq42_rfb_top": ("rfb_top_ohm", "rfb_top_kohm", 1e3),
+    "eq44_ccomp": ("ccomp_f", "ccomp_nf", 1e-9),
+    "eq45_chf": ("chf_f", "chf_pf", 1e-12),
+}
+
+# Workbook cell -> run_design input (with unit scale), so both sides see the same design.
+INPUT_CELLS: dict[str, tuple[str, float]] = {
+    "vin_min_v": ("vin_min", 1.0),
+    "vin_nom_v": ("vin_nom", 1.0),
+    "vin_max_v": ("vin_max", 1.0),
+    "vout_v": ("vout", 1.0),
+    "iout_a": ("iout", 1.0),
+    "fsw_hz": ("fsw_khz", 1e3),
+    "l_used_h": ("l_uh", 1e-6),
+    "rout_esr_ohm": ("cout_esr_mohm", 1e-3),
+    "rin_esr_ohm": ("cin_esr_mohm", 1e-3),
+    "vin_ripple_pp_v": ("vin_ripple_mv", 1e-3),
+    "f_c_hz": ("f_c_khz", 1e3),
+    "f_esr_zero_hz": ("f_esr_khz", 1e3),
+    "rcomp_ohm": ("rcomp_kohm", 1e3),
+    "rfb_bottom_ohm": ("rfb_bot_kohm", 1e3),
+}
+
+TOLERANCE_DEFAULT = 0.02
+CHUNK_DEFAULT = 16
+
+
+_NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_TAG_ROW = f"{{{_NS_MAIN}}}row"
+_TAG_C = f"{{{_NS_MAIN}}}c"
+_TAG_V = f"{{{_NS_MAIN}}}v"
+
+
+def _col_index(col: str) -> int:
+    return ord(col) - ord("A")
+
+
+def resolve_cell_map(template: Path) -> dict[str, str]:
+    """Key -> cell address, found once per template by scanning the row labels (read-only, values only)."""
+
+    import openpyxl
+
+    wb = openpyxl.load_workbook(template, read_only=True, data_only=True)
+    try:
+        ws = wb[SHEET]
+        out: dict[str, str] = {}
+        for r, row in enumerate(ws.iter_rows(min_row=1, max_row=120, max_col=6, values_only=True), start=1):
+            for key, (label, label_col, value_col, offset) in CELL_LABELS.items():
+                text = row[_col_index(label_col)] if len(row) > _col_index(label_col) else None
+                if key not in out and isinstance(text, str) and text.strip().startswith(label):
+                    out[key] = f"{value_col}{r + offset}"
+    finally:
+        wb.close()
+    missing = sorted(set(CELL_LABELS) - set(out))
+    if missing:
+        raise ValueError(f"{template}: labels not found for {', '.join(missing)}")
+    return out
+
+
+def read_cells(path: Path, cell_map: dict[str, str]) -> dict[str, Optional[float]]:
+    """Cached numeric values of the mapped cells.
+
+    Streams the one sheet part and stops after the last mapped row; styles, shared strings,
+    drawings and the other sheets (most of a quickstart file) are never parsed.
+    """
+
+    wanted = {addr: key for key, addr in cell_map.items()}
+    last_row = max(int(re.sub(r"[A-Z]", "", a)) for a in wanted)
+    out: dict[str, Optional[float]] = dict.fromkeys(cell_map)
+    with zipfile.ZipFile(path) as zf, zf.open(sheet_xml_part(zf, SHEET)) as fh:
+        for _, el in ET.iterparse(fh, events=("end",)):
+            if el.tag == _TAG_C:
+                key = wanted.get(el.get("r"))
+                # Numbers only: t="s"/"str"/"b"/"e" are labels, text results, booleans and errors.
+                if key is not None and el.get("t", "n") == "n":
+                    v = el.find(_TAG_V)
+                    if v is not None and v.text:
+                        out[key] = float(v.text)
+            elif el.tag == _TAG_ROW:
+                if int(el.get("r", 0)) >= last_row:
+                    break
+                el.clear()
+    return out
+
+
+def _read_chunk(args: tuple[list[str], dict[str, str]]) -> list[tuple[str, Optional[dict], str]]:
+    paths, cell_map = args
+    out = []
+    for p in paths:
+        try:
+            out.append((p, read_cells(Path(p), cell_map), ""))
+        except Exception as e:  # a broken workbook is reported, not fatal
+            out.append((p, None, f"{type(e).__name__}: {e}"))
+    return out
+
+
+@dataclass
+class CrossValidation:
+    paths: list[str]
+    errors: dict[str, str]  # unreadable workbooks
+    # Per equation: quickstart value, run_design value and relative error (NaN when a cell is empty).
+    quickstart: dict[str, np.ndarray]
+    computed: dict[str, np.ndarray]
+    rel_error: dict[str, np.ndarray]
+
+
+def cross_validate(
+    paths: list[Path], *, template: Path = TEMPLATE_DEFAULT, workers: int = 0, chunk: int = CHUNK_DEFAULT
+) -> CrossValidation:
+    cell_map = resolve_cell_map(template)
+    names = [str(p) for p in paths]
+    jobs = [(names[i : i + chunk], cell_map) for i in range(0, len(names), chunk)]
+    if workers > 0 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_read_chunk, jobs))
+    else:
+        parts = [_read_chunk(j) for j in jobs]
+    rows = [r for part in parts for r in part]
+    errors = {p: err for p, cells, err in rows if cells is None}
+    ok = [(p, cells) for p, cells, _ in rows if cells is not None]
+
+    def column(key: str) -> np.ndarray:
+        return np.array([np.nan if c[key] is None else c[key] for _, c in ok], dtype=np.float64)
+
+    # Inputs come from each workbook itself; the ripple target is TI's ΔIL at VIN(nom).
+    cols = {field: column(key) * scale for field, (key, scale) in INPUT_CELLS.items()}
+    cols["ripple_frac"] = column("dil_pct") / 100.0
+    c = complete_columns(cols)
+    res = run_design_columns(c)
+
+    # The divider only sets VOUT when TI's "Actual Output Voltage Setpoint" matches VOUT (VOUT_setting = 1).
+    divider_mode = np.abs(column("vout_set") - c["vout_v"]) <= 0.01 * c["vout_v"]
+
+    quickstart, computed, rel = {}, {}, {}
+    for eq, (result, key, scale) in EQUATIONS.items():
+        q = column(key) * scale
+        if eq == "eq42_rfb_top":
+            q = np.where(divider_mode, q, np.nan)
+        ours = np.broadcast_to(np.asarray(res[result], dtype=np.float64), q.shape)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rel[eq] = np.where(np.isfinite(ours) & (q != 0.0), (ours - q) / np.abs(q), np.nan)
+        quickstart[eq], computed[eq] = q, ours
+    return CrossValidation([p for p, _ in ok], errors, quickstart, computed, rel)
+
+
+def discrepancy_table(cv: CrossValidation, *, tolerance: float = TOLERANCE_DEFAULT) -> list[dict]:
+    out = []
+    for eq, rel in cv.rel_error.items():
+        valid = np.isfinite(rel)
+        a = np.abs(rel[valid])
+        worst = int(np.flatnonzero(valid)[np.argmax(a)]) if a.size else None
+        out.append({
+            "equation": eq,
+            "designs": int(valid.sum()),
+            "over_tolerance": int(np.sum(a > tolerance)),
+            "median_abs_rel": float(np.median(a)) if a.size else math.nan,
+            "max_abs_rel": float(a.max()) if a.size else math.nan,
+            "worst": cv.paths[worst] if worst is not None else "",
+        })
+    return out
+
+
+def format_table(rows: list[dict], *, tolerance: float) -> str:
+    lines = [f"{'equation':20s} {'designs':>7s} {f'>{tolerance:.0%}':>6s} {'median':>9s} {'max':>9s}  worst"]
+    for r in rows:
+        lines.append(
+            f"{r['equation']:20s} {r['designs']:7d} {r['over_tolerance']:6d} "
+            f"{r['median_abs_rel']:9.2%} {r['max_abs_rel']:9.2%}  {Path(r['worst']).name if r['worst'] else '-'}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare run_design against the cached results of Excel-recalculated TI quickstart workbooks."
+    )
+    parser.add_argument("paths", nargs="+", help="Workbooks (.xlsm/.xlsx) or directories to scan")
+    parser.add_argument("--template", type=str, default=str(TEMPLATE_DEFAULT), help="Template the cell map is resolved from")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (0 = in process)")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE_DEFAULT)
+    parser.add_argument("--csv", type=str, default="", help="Per-workbook, per-equation CSV output")
+    parser.add_argument("--out", type=str, default="", help="JSON discrepancy table output")
+    args = parser.parse_args()
+
+    paths: list[Path] = []
+    for p in map(Path, args.paths):
+        if p.is_dir():
+            paths.extend(sorted(q for q in p.rglob("*") if q.suffix.lower() in (".xlsx", ".xlsm") and not q.name.startswith("~$")))
+        else:
+            paths.append(p)
+
+    t0 = time.perf_counter()
+    cv = cross_validate(paths, template=Path(args.template), workers=args.workers)
+    dt = time.perf_counter() - t0
+    table = discrepancy_table(cv, tolerance=args.tolerance)
+    print(format_table(table, tolerance=args.tolerance))
+    print(f"{len(cv.paths)} workbook(s) in {dt:.2f} s")
+    for p, err in cv.errors.items():
+        print(f"Skipped {p}: {err}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as fh:
+            w = csv.writer(fh)
+            w.writerow(["workbook", "equation", "quickstart", "run_design", "rel_error"])
+            for eq in EQUATIONS:
+                for i, p in enumerate(cv.paths):
+                    w.writerow([p, eq, cv.quickstart[eq][i], cv.computed[eq][i], cv.rel_error[eq][i]])
+    if args.out:
+        clean = [{k: (None if isinstance(v, float) and not math.isfinite(v) else v) for k, v in r.items()} for r in table]
+        Path(args.out).write_text(json.dumps({"tolerance": args.tolerance, "equations": clean}, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import argparse
+import re
+import sqlite3
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+from lm5148_tool.lm5148_core import DesignInputs, DesignResults
+
+
+# Kept in sync with lm5148_batch.INPUT_FIELDS / RESULT_FIELDS without importing numpy here.
+INPUT_COLUMNS: list[str] = [k for k in asdict(DesignInputs()) if k != "pdf_path"]
+RESULT_COLUMNS: list[str] = list(DesignResults.__dataclass_fields__)
+ALL_COLUMNS: list[str] = INPUT_COLUMNS + RESULT_COLUMNS
+
+# Result columns that sweep queries filter or sort on.
+INDEXED_COLUMNS: list[str] = [
+    "rsense_ohm",
+    "il_peak_vin_max_a",
+    "il_peak_short_a",
+    "cout_load_off_f",
+    "vout_ripple_pp_v",
+    "cin_required_f",
+    "l_required_h",
+]
+
+BULK_ROWS = 50_000
+
+_OPS = {"<": "<", "<=": "<=", ">": ">", ">=": ">=", "=": "=", "==": "=", "!=": "!="}
+_SI_PREFIX = {"p": 1e-12, "n": 1e-9, "u": 1e-6, "µ": 1e-6, "m": 1e-3, "k": 1e3, "M": 1e6, "G": 1e9}
+_CONSTRAINT_RE = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_]*)\s*(<=|>=|==|!=|<|>|=)\s*(.+?)\s*$")
+_VALUE_RE = re.compile(r"^([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([pnuµmkMG]?)\s*[A-Za-zΩ]*$")
+
+
+@dataclass(frozen=True)
+class Constraint:
+    column: str
+    op: str
+    value: float
+
+
+def parse_value(text: str) -> float:
+    """Number with an optional SI prefix and unit: `2m`, `2 mΩ`, `40u`, `40µF`, `1.5e-3`."""
+
+    m = _VALUE_RE.match(text.strip())
+    if not m:
+        raise ValueError(f"Cannot parse value: {text!r}")
+    return float(m.group(1)) * _SI_PREFIX.get(m.group(2), 1.0)
+
+
+def parse_constraint(text: str) -> Constraint:
+    m = _CONSTRAINT_RE.match(text)
+    if not m:
+        raise ValueError(f"Constraint must look like 'column<value': {text!r}")
+    column, op, value = m.groups()
+    if column not in ALL_COLUMNS:
+        raise ValueError(f"Unknown column: {column}")
+    return Constraint(column, _OPS[op], parse_value(value))
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA cache_size=-262144")  # 256 MiB page cache
+    conn.execute("PRAGMA temp_store=MEMORY")
+    cols = ", ".join(f"{c} REAL" for c in ALL_COLUMNS)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS designs (id INTEGER PRIMARY KEY, {cols})")
+    return conn
+
+
+def create_indexes(conn: sqlite3.Connection) -> None:
+    # Built after bulk loads: one sorted index build is much cheaper than maintaining it per insert.
+    with conn:
+        for col in INDEXED_COLUMNS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_designs_{col} ON designs ({col})")
+        conn.execute("ANALYZE")
+
+
+def drop_indexes(conn: sqlite3.Connection) -> None:
+    with conn:
+        for col in INDEXED_COLUMNS:
+            conn.execute(f"DROP INDEX IF EXISTS idx_designs_{col}")
+
+
+def _insert_rows(conn: sqlite3.Connection, rows: Iterable[Sequence[Optional[float]]]) -> int:
+    sql = f"INSERT INTO designs ({', '.join(ALL_COLUMNS)}) VALUES ({', '.join('?' * len(ALL_COLUMNS))})"
+    conn.execute("PRAGMA synchronous=OFF")
+    total = 0
+    batch: list[Sequence[Optional[float]]] = []
+    try:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BULK_ROWS:
+                with conn:
+                    conn.executemany(sql, batch)
+                total += len(batch)
+                batch.clear()
+        if batch:
+            with conn:
+                conn.executemany(sql, batch)
+            total += len(batch)
+    finally:
+        conn.execute("PRAGMA synchronous=NORMAL")
+    return total
+
+
+def insert_designs(
+    conn: sqlite3.Connection, inputs: Iterable[DesignInputs], results: Iterable[DesignResults]
+) -> int:
+    """Insert `run_design` / `run_design_batch` outputs next to their inputs."""
+
+    def rows():
+        for inp, res in zip(inputs, results):
+            yield [getattr(inp, c) for c in INPUT_COLUMNS] + [getattr(res, c) for c in RESULT_COLUMNS]
+
+    return _insert_rows(conn, rows())
+
+
+def insert_records(conn: sqlite3.Connection, records) -> int:
+    """Insert a `lm5148_batch.DESIGN_DTYPE` structured array (sweep chunk or store chunk)."""
+
+    import numpy as np
+
+    total = 0
+    for start in range(0, len(records), BULK_ROWS):
+        part = records[start : start + BULK_ROWS]
+        table = np.column_stack([np.asarray(part[c], dtype=np.float64) for c in ALL_COLUMNS])
+        # SQLite binds NaN (e.g. l_used_h "use L required") as NULL.
+        total += _insert_rows(conn, table.tolist())
+    return total
+
+
+def ingest_store(conn: sqlite3.Connection, store_dir: Path) -> int:
+    from lm5148_tool.results_store import ResultsStore
+
+    store = ResultsStore.open(store_dir)
+    drop_indexes(conn)
+    total = 0
+    for chunk in store.iter_chunks():
+        total += insert_records(conn, chunk)
+    create_indexes(conn)
+    return total
+
+
+def build_query(
+    constraints: Sequence[Constraint],
+    *,
+    columns: Optional[Sequence[str]] = None,
+    order_by: Optional[str] = None,
+    descending: bool = False,
+    limit: Optional[int] = None,
+) -> tuple[str, list[float]]:
+    # Column names come from the fixed schema whitelist; values are always bound parameters.
+    select = list(columns) if columns else ["id"] + ALL_COLUMNS
+    for name in select + ([order_by] if order_by else []):
+        if name != "id" and name not in ALL_COLUMNS:
+            raise ValueError(f"Unknown column: {name}")
+    sql = f"SELECT {', '.join(select)} FROM designs"
+    params: list[float] = []
+    if constraints:
+        sql += " WHERE " + " AND ".join(f"{c.column} {c.op} ?" for c in constraints)
+        params = [c.value for c in constraints]
+    if order_by:
+        sql += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return sql, params
+
+
+def query(
+    conn: sqlite3.Connection,
+    constraints: Sequence[Constraint],
+    *,
+    columns: Optional[Sequence[str]] = None,
+    order_by: Optional[str] = None,
+    descending: bool = False,
+    limit: Optional[int] = 100,
+) -> tuple[list[str], list[tuple]]:
+    sql, params = build_query(constraints, columns=columns, order_by=order_by, descending=descending, limit=limit)
+    cur = conn.execute(sql, params)
+    names = [d[0] for d in cur.description]
+    return names, cur.fetchall()
+
+
+def count(conn: sqlite3.Connection, constraints: Sequence[Constraint]) -> int:
+    sql = "SELECT COUNT(*) FROM designs"
+    if constraints:
+        sql += " WHERE " + " AND ".join(f"{c.column} {c.op} ?" for c in constraints)
+    return int(conn.execute(sql, [c.value for c in constraints]).fetchone()[0])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local SQLite database of LM5148 sweep results with constraint queries.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_ing = sub.add_parser("ingest", help="Bulk-load a results store (from lm5148_sweep) into the database")
+    p_ing.add_argument("--db", required=True)
+    p_ing.add_argument("--store", required=True, help="Results store directory")
+
+    p_q = sub.add_parser("query", help="Filter designs, e.g. --where 'rsense_ohm>2m' --where 'cin_required_f<40u'")
+    p_q.add_argument("--db", required=True)
+    p_q.add_argument("--where", action="append", default=[], help="column<op>value, SI prefixes allowed")
+    p_q.add_argument("--columns", default="", help="Comma-separated output columns (default: all)")
+    p_q.add_argument("--order-by", default="")
+    p_q.add_argument("--desc", action="store_true")
+    p_q.add_argument("--limit", type=int, default=20)
+    p_q.add_argument("--count", action="store_true", help="Also report the total number of matches")
+
+    args = parser.parse_args()
+
+    conn = connect(Path(args.db))
+    try:
+        if args.cmd == "ingest":
+            t0 = time.perf_counter()
+            n = ingest_store(conn, Path(args.store))
+            print(f"Inserted {n:,} rows in {time.perf_counter() - t0:.1f} s")
+            return 0
+
+        constraints = [parse_constraint(w) for w in args.where]
+        columns = [c.strip() for c in args.columns.split(",") if c.strip()] or None
+        t0 = time.perf_counter()
+        names, rows = query(
+            conn,
+            constraints,
+            columns=columns,
+            order_by=args.order_by or None,
+            descending=args.desc,
+            limit=args.limit,
+        )
+        dt = time.perf_counter() - t0
+        print("\t".join(names))
+        for row in rows:
+            # sqlite returns REAL columns as float; the INTEGER id prints in full.
+            print("\t".join("" if v is None else f"{v:.6g}" if isinstance(v, float) else str(v) for v in row))
+        summary = f"{len(rows)} row(s) in {dt * 1e3:.1f} ms"
+        if args.count:
+            summary += f"; {count(conn, constraints):,} match(es) in total"
+        print(summary)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
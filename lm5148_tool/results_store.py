@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+from lm5148_tool.lm5148_batch import DESIGN_DTYPE
+
+
+STORE_FORMAT = "lm5148-results-store"
+STORE_VERSION = 1
+SCHEMA_FILE = "schema.json"
+
+
+def _dtype_to_json(dtype: np.dtype) -> list[list[str]]:
+    return [[name, dtype.fields[name][0].str] for name in dtype.names]
+
+
+def _dtype_from_json(spec: list[list[str]]) -> np.dtype:
+    return np.dtype([(name, code) for name, code in spec])
+
+
+def _write_json_atomic(path: Path, data: dict) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class ResultsStore:
+    """Append-only sweep results: one fixed-dtype `.npy` chunk per append, opened memory-mapped.
+
+    Layout of a store directory:
+
+    - `schema.json`: format/version, the structured dtype and the chunk list (file + row count)
+    - `chunk_000000.npy`, `chunk_000001.npy`, ...: structured arrays (standard `.npy` header)
+
+    Opening only reads `schema.json`; chunks are memory-mapped on first access. Appends write a
+    new chunk file and then swap in the updated schema, so existing chunks are never rewritten
+    and readers never see a half-written chunk.
+    """
+
+    def __init__(self, root: Path, dtype: np.dtype, chunks: list[dict], *, writable: bool) -> None:
+        self.root = root
+        self.dtype = dtype
+        self._chunks = chunks
+        self._maps: dict[int, np.ndarray] = {}
+        self._writable = writable
+
+    @classmethod
+    def create(cls, root: Path, dtype: np.dtype = DESIGN_DTYPE, *, exist_ok: bool = False) -> "ResultsStore":
+        root = Path(root)
+        if (root / SCHEMA_FILE).exists():
+            if not exist_ok:
+                raise FileExistsError(f"Results store already exists: {root}")
+            store = cls.open(root, writable=True)
+            if store.dtype != dtype:
+                raise ValueError(f"Existing store at {root} has a different schema")
+            return store
+        root.mkdir(parents=True, exist_ok=True)
+        store = cls(root, np.dtype(dtype), [], writable=True)
+        store._write_schema()
+        return store
+
+    @classmethod
+    def open(cls, root: Path, *, writable: bool = False) -> "ResultsStore":
+        root = Path(root)
+        schema = json.loads((root / SCHEMA_FILE).read_text(encoding="utf-8"))
+        if schema.get("format") != STORE_FORMAT:
+            raise ValueError(f"Not a results store: {root}")
+        if int(schema.get("version", 0)) > STORE_VERSION:
+            raise ValueError(f"Results store version {schema['version']} is newer than supported ({STORE_VERSION})")
+        return cls(root, _dtype_from_json(schema["dtype"]), list(schema["chunks"]), writable=writable)
+
+    def _write_schema(self) -> None:
+        _write_json_atomic(
+            self.root / SCHEMA_FILE,
+            {
+                "format": STORE_FORMAT,
+                "version": STORE_VERSION,
+                "dtype": _dtype_to_json(self.dtype),
+                "rows": len(self),
+                "chunks": self._chunks,
+            },
+        )
+
+    def __len__(self) -> int:
+        return sum(int(c["rows"]) for c in self._chunks)
+
+    @property
+    def n_chunks(self) -> int:
+        return len(self._chunks)
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.dtype.names)
+
+    def append(self, rows: np.ndarray) -> int:
+        """Persist `rows` as a new chunk; returns the chunk index."""
+
+        if not self._writable:
+            raise PermissionError("Results store was opened read-only")
+        if rows.dtype != self.dtype:
+            raise ValueError("Row dtype does not match the store schema")
+        idx = len(self._chunks)
+        name = f"chunk_{idx:06d}.npy"
+        tmp = self.root / (name + ".tmp")
+        with open(tmp, "wb") as fh:
+            np.save(fh, np.ascontiguousarray(rows), allow_pickle=False)
+        os.replace(tmp, self.root / name)
+        self._chunks.append({"file": name, "rows": int(len(rows))})
+        self._write_schema()
+        return idx
+
+    def chunk(self, idx: int) -> np.ndarray:
+        """Memory-mapped, read-only structured array for chunk `idx`."""
+
+        arr = self._maps.get(idx)
+        if arr is None:
+            arr = np.load(self.root / self._chunks[idx]["file"], mmap_mode="r", allow_pickle=False)
+            self._maps[idx] = arr
+        return arr
+
+    def iter_chunks(self) -> Iterator[np.ndarray]:
+        for idx in range(len(self._chunks)):
+            yield self.chunk(idx)
+
+    def column(self, name: str, chunk: Optional[int] = None) -> np.ndarray:
+        """Column `name`. With `chunk` set this is a zero-copy (strided) view into the mapping;
+        without it the chunks are concatenated into a new array."""
+
+        if chunk is not None:
+            return self.chunk(chunk)[name]
+        parts = [c[name] for c in self.iter_chunks()]
+        if not parts:
+            return np.empty(0, dtype=self.dtype.fields[name][0])
+        return np.concatenate(parts)
+
+    def iter_column(self, name: str) -> Iterator[np.ndarray]:
+        for arr in self.iter_chunks():
+            yield arr[name]
+
+    def rows(self, start: int, stop: int) -> np.ndarray:
+        """Global row range [start, stop); zero-copy when it falls inside a single chunk."""
+
+        parts = []
+        offset = 0
+        for idx, meta in enumerate(self._chunks):
+            n = int(meta["rows"])
+            lo, hi = max(start - offset, 0), min(stop - offset, n)
+            if lo < hi:
+                parts.append(self.chunk(idx)[lo:hi])
+            offset += n
+            if offset >= stop:
+                break
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return np.empty(0, dtype=self.dtype)
+        return np.concatenate(parts)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Inspect an LM5148 sweep results store.")
+    parser.add_argument("store", type=str, help="Results store directory")
+    parser.add_argument("--head", type=int, default=5, help="Print the first N rows")
+    parser.add_argument("--columns", type=str, default="", help="Comma-separated columns to print")
+    args = parser.parse_args()
+
+    store = ResultsStore.open(Path(args.store))
+    print(f"{store.root}: {len(store):,} rows in {store.n_chunks} chunk(s), {len(store.columns)} columns")
+    if args.head > 0 and len(store):
+        cols = [c.strip() for c in args.columns.split(",") if c.strip()] or store.columns
+        head = store.rows(0, args.head)
+        print("\t".join(cols))
+        for row in head:
+            print("\t".join(f"{row[c]:.6g}" for c in cols))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+from lm5148_tool.results_store import SCHEMA_FILE, ResultsStore
+
+
+# Sidecar written next to (or inside) every shard output once the shard has finished.
+SHARD_MANIFEST = "shard.json"
+MANIFEST_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Shard `index` of `count`, 1-based on the command line (`--shard 2/4`), 0-based here."""
+
+    index: int
+    count: int
+
+    def __post_init__(self) -> None:
+        if self.count < 1 or not 0 <= self.index < self.count:
+            raise ValueError(f"Invalid shard {self.index + 1}/{self.count}")
+
+    def __str__(self) -> str:
+        return f"{self.index + 1}/{self.count}"
+
+    def range(self, n_points: int) -> tuple[int, int]:
+        """Contiguous block [start, stop) of `n_points`; blocks of all shards tile 0..n_points in order."""
+
+        return n_points * self.index // self.count, n_points * (self.index + 1) // self.count
+
+    def owns_line(self, lineno: int) -> bool:
+        """Round-robin over input line numbers (a stream's length is not known up front)."""
+
+        return (lineno - 1) % self.count == self.index
+
+
+def parse_shard(text: str) -> Shard:
+    i, _, n = text.partition("/")
+    try:
+        return Shard(int(i) - 1, int(n))
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N with 1 <= i <= N: {text!r}") from None
+
+
+def fingerprint(data: Any) -> str:
+    """Identity of the work being sharded (sweep spec or input file), so shards of different runs never merge."""
+
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def file_fingerprint(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def manifest_path(output: Path) -> Path:
+    """Store shards keep the manifest inside the directory, NDJSON shards as `<out>.shard.json`."""
+
+    return output / SHARD_MANIFEST if output.is_dir() else output.with_name(output.name + ".shard.json")
+
+
+def write_manifest(output: Path, shard: Shard, *, kind: str, work: str, **extra: Any) -> None:
+    data = {"version": MANIFEST_VERSION, "kind": kind, "work": work, "index": shard.index, "count": shard.count, **extra}
+    path = manifest_path(output)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _load_manifests(outputs: list[Path]) -> list[tuple[Path, dict]]:
+    found = []
+    for out in outputs:
+        path = manifest_path(out)
+        if not path.exists():
+            raise ValueError(f"{out}: no {path.name} (shard missing or not finished)")
+        found.append((out, json.loads(path.read_text(encoding="utf-8"))))
+    return found
+
+
+def check_complete(manifests: list[tuple[Path, dict]]) -> list[tuple[Path, dict]]:
+    """Shards ordered by index, after checking they cover the same work exactly once."""
+
+    if not manifests:
+        raise ValueError("No shards given")
+    first = manifests[0][1]
+    for out, m in manifests:
+        for key in ("kind", "work", "count"):
+            if m.get(key) != first.get(key):
+                raise ValueError(f"{out}: {key} differs from {manifests[0][0]} (shards of different runs?)")
+    by_index: dict[int, tuple[Path, dict]] = {}
+    for out, m in manifests:
+        if m["index"] in by_index:
+            raise ValueError(f"Shard {m['index'] + 1}/{m['count']} given twice: {by_index[m['index']][0]} and {out}")
+        by_index[m["index"]] = (out, m)
+    missing = [str(i + 1) for i in range(first["count"]) if i not in by_index]
+    if missing:
+        raise ValueError(f"Missing shard(s) {', '.join(missing)} of {first['count']}")
+    return [by_index[i] for i in range(first["count"])]
+
+
+def merge_stores(shard_dirs: list[Path], out: Path) -> ResultsStore:
+    """Concatenate sweep shard stores in shard order, i.e. in sweep point order."""
+
+    if out.exists():
+        raise ValueError(f"{out} already exists (merge into a new directory)")
+    shards = check_complete(_load_manifests(shard_dirs))
+    if shards[0][1]["kind"] != "sweep":
+        raise ValueError("Not sweep shards")
+    n_points = shards[0][1]["n_points"]
+    expected = 0
+    for root, m in shards:
+        store = ResultsStore.open(root)
+        # Constrained sweeps store only the passing points; the manifest records how many.
+        if m["start"] != expected or len(store) != m.get("rows", m["stop"] - m["start"]):
+            raise ValueError(f"{root}: rows {m['start']}..{m['stop']} incomplete ({len(store):,} rows written)")
+        expected = m["stop"]
+    if expected != n_points:
+        raise ValueError(f"Shards cover {expected:,} of {n_points:,} points")
+
+    from lm5148_tool.lm5148_sweep import PRECISION_FILE
+
+    precision = _merge_precision([root / PRECISION_FILE for root, _ in shards])
+    merged = ResultsStore.create(out, ResultsStore.open(shards[0][0]).dtype)
+    for root, _ in shards:
+        for chunk in ResultsStore.open(root).iter_chunks():
+            merged.append(chunk)
+    if precision is not None:
+        (out / PRECISION_FILE).write_text(json.dumps(precision, indent=1), encoding="utf-8")
+    return merged
+
+
+def _merge_precision(paths: list[Path]) -> dict[str, Any] | None:
+    """Combine the shards' float32 validation reports: summed row counts, per-result max errors."""
+
+    reports = [json.loads(p.read_text(encoding="utf-8")) for p in paths if p.exists()]
+    if not reports:
+        return None
+    if len(reports) != len(paths):
+        raise ValueError(f"Only {len(reports)} of {len(paths)} shards have {paths[0].name}")
+    merged: dict[str, Any] = {
+        "precision": reports[0]["precision"],
+        "sample_rows": sum(r["sample_rows"] for r in reports),
+        "fallback_rows": sum(r["fallback_rows"] for r in reports),
+    }
+    for key in ("max_rel_error", "max_rel_error_raw"):
+        # null is an infinite (or undefined) error and dominates.
+        merged[key] = {
+            name: None if any(r[key][name] is None for r in reports) else max(r[key][name] for r in reports)
+            for name in reports[0][key]
+        }
+    return merged
+
+
+def _records(path: Path) -> Iterator[tuple[int, str]]:
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)["line"], line if line.endswith("\n") else line + "\n"
+
+
+def merge_ndjson(shard_files: list[Path], out: Path) -> int:
+    """K-way merge of NDJSON result shards (and their error files) by input line number."""
+
+    shards = check_complete(_load_manifests(shard_files))
+    if shards[0][1]["kind"] != "ndjson":
+        raise ValueError("Not NDJSON batch shards")
+    total = 0
+    for path, m in shards:
+        if m["designs"] + m["errors"] != m["lines"]:
+            raise ValueError(f"{path}: {m['lines']:,} lines assigned but {m['designs'] + m['errors']:,} accounted for")
+        total += m["lines"]
+    if total != shards[0][1]["total_lines"]:
+        raise ValueError(f"Shards cover {total:,} of {shards[0][1]['total_lines']:,} input lines")
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    _merge_by_line([p for p, _ in shards], out)
+    # Error files are recorded by name, next to their results shard.
+    _merge_by_line([p.with_name(m["errors_file"]) for p, m in shards], out.with_name(out.stem + ".errors.ndjson"))
+    return total
+
+
+def _merge_by_line(paths: list[Path], target: Path) -> None:
+    with open(target, "w", encoding="utf-8") as fh:
+        for _, line in heapq.merge(*(_records(p) for p in paths if p.exists()), key=lambda r: r[0]):
+            fh.write(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Merge sweep / NDJSON batch shards into one dataset, checking completeness.")
+    parser.add_argument("shards", nargs="+", help="Shard outputs: results store directories or NDJSON result files")
+    parser.add_argument("--out", type=str, required=True, help="Merged store directory or .ndjson file")
+    args = parser.parse_args()
+
+    paths = [Path(p) for p in args.shards]
+    try:
+        if all((p / SCHEMA_FILE).exists() for p in paths):
+            merged = merge_stores(paths, Path(args.out))
+            print(f"Merged {len(paths)} shard(s): {len(merged):,} rows -> {merged.root}")
+        else:
+            lines = merge_ndjson(paths, Path(args.out))
+            print(f"Merged {len(paths)} shard(s): {lines:,} input line(s) -> {args.out}")
+    except ValueError as e:
+        print(f"Merge refused: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from lm5148_tool.lm5148_core import DesignInputs, design_inputs_from_webapp, run_design
+from lm5148_tool.load_transient import A_CS, CURRENT_LOOP_Q, GM_EA_S
+
+
+# Map axes, in nesting order (last varies fastest).
+AXES = ("rcomp_ohm", "f_c_hz", "cout_f", "esr_ohm")
+
+N_FREQ_DEFAULT = 1200
+CHUNK_POINTS_DEFAULT = 4096
+
+
+@dataclass(frozen=True)
+class FrequencyGrid:
+    """Everything that depends only on frequency and the fixed power stage, computed once."""
+
+    f_hz: np.ndarray
+    s: np.ndarray  # j*2*pi*f
+    # Sampled current loop He(s) / (A_CS * RS) and the divider/gm factor.
+    modulator: np.ndarray
+    modulator_phase: np.ndarray  # unwrapped, radians
+    gain_const: float  # gm * Vref / Vout
+    cbw_f: float
+    f_esr_zero_hz: float
+
+
+@dataclass
+class StabilityMap:
+    axes: dict[str, np.ndarray]
+    crossover_hz: np.ndarray  # shape = grid shape; NaN when |T| never crosses 1 in the band
+    phase_margin_deg: np.ndarray
+    gain_margin_db: np.ndarray  # inf when the phase never reaches -180° above crossover
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.phase_margin_deg.shape
+
+
+def frequency_grid(inp: DesignInputs, *, n_freq: int = N_FREQ_DEFAULT) -> FrequencyGrid:
+    res = run_design(inp)
+    # Up to the switching frequency: the averaged model is meaningless above it.
+    f = np.geomspace(10.0, inp.fsw_hz, n_freq)
+    s = 2j * np.pi * f
+    wn = np.pi * inp.fsw_hz
+    he = 1.0 / (1.0 + s / (wn * CURRENT_LOOP_Q) + (s / wn) ** 2)
+    k_fb = min(inp.vref_v / inp.vout_v, 1.0)
+    return FrequencyGrid(
+        f_hz=f,
+        s=s,
+        modulator=he / (A_CS * res.rsense_ohm),
+        modulator_phase=np.unwrap(np.angle(he)),
+        gain_const=GM_EA_S * k_fb,
+        cbw_f=inp.cbw_f,
+        f_esr_zero_hz=inp.f_esr_zero_hz,
+    )
+
+
+def _margins_chunk(grid: FrequencyGrid, rcomp: np.ndarray, f_c: np.ndarray, cout: np.ndarray, esr: np.ndarray):
+    """Loop gain T = gm·k·Zcomp·He/(A_CS·RS)·Zout for a chunk of points (points x frequencies)."""
+
+    s = grid.s[None, :]
+    rc = rcomp[:, None]
+    # Eq.44 / Eq.45 for each RCOMP (and f_c); the COMP node sees CHF + Cbw.
+    ccomp = 10.0 / (2.0 * np.pi * f_c * rcomp)
+    chf = np.maximum(1.0 / (2.0 * np.pi * grid.f_esr_zero_hz * rcomp) - grid.cbw_f, 0.0) + grid.cbw_f
+    z_series = rc + 1.0 / (s * ccomp[:, None])
+    z_hf = 1.0 / (s * chf[:, None])
+    z_comp = z_series * z_hf / (z_series + z_hf)
+    z_out = esr[:, None] + 1.0 / (s * cout[:, None])
+    t = grid.gain_const * z_comp * grid.modulator[None, :] * z_out
+
+    mag_db = 20.0 * np.log10(np.abs(t))
+    # Zcomp and Zout are RC impedances (phase in [-90°, 0°]), so their angles need no unwrapping.
+    phase = np.degrees(np.angle(z_comp) + np.angle(z_out) + grid.modulator_phase[None, :])
+    logf = np.log10(grid.f_hz)
+
+    n = len(rcomp)
+    rows = np.arange(n)
+    # Crossover: first downward crossing of 0 dB, interpolated in log frequency.
+    below = mag_db < 0.0
+    has_fc = below.any(axis=1) & ~below[:, 0]
+    k = np.where(has_fc, np.argmax(below, axis=1), 1)
+    w = mag_db[rows, k - 1] / (mag_db[rows, k - 1] - mag_db[rows, k])
+    fc = np.where(has_fc, 10.0 ** (logf[k - 1] + w * (logf[k] - logf[k - 1])), np.nan)
+    pm = np.where(has_fc, 180.0 + phase[rows, k - 1] + w * (phase[rows, k] - phase[rows, k - 1]), np.nan)
+
+    # Gain margin: first -180° crossing above crossover.
+    above_fc = np.arange(len(logf))[None, :] >= k[:, None]
+    crosses = above_fc & (phase <= -180.0)
+    has_pc = has_fc & crosses.any(axis=1)
+    p = np.where(has_pc, np.argmax(crosses, axis=1), 1)
+    wp = (phase[rows, p - 1] + 180.0) / (phase[rows, p - 1] - phase[rows, p])
+    gm = np.where(has_pc, -(mag_db[rows, p - 1] + wp * (mag_db[rows, p] - mag_db[rows, p - 1])), np.inf)
+    return fc, pm, gm
+
+
+def _worker(args) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return _margins_chunk(*args)
+
+
+def stability_map(
+    inp: DesignInputs,
+    axes: dict[str, np.ndarray],
+    *,
+    n_freq: int = N_FREQ_DEFAULT,
+    workers: int = 0,
+    chunk_points: int = CHUNK_POINTS_DEFAULT,
+) -> StabilityMap:
+    """PM/GM/crossover over the cartesian grid of `axes` (any subset of AXES; the rest fixed at `inp`).
+
+    The frequency grid and the power-stage factors are built once and shared by every point;
+    chunks of points run in a process pool when `workers > 0`.
+    """
+
+    unknown = set(axes) - set(AXES)
+    if unknown:
+        raise KeyError(f"Unknown axis: {', '.join(sorted(unknown))}")
+    res = run_design(inp)
+    defaults = {"rcomp_ohm": inp.rcomp_ohm, "f_c_hz": inp.f_c_hz, "cout_f": res.cout_load_off_f, "esr_ohm": inp.rout_esr_ohm}
+    full = {name: np.atleast_1d(np.asarray(axes.get(name, defaults[name]), dtype=np.float64)) for name in AXES}
+    shape = tuple(len(v) for v in full.values())
+    mesh = [m.ravel() for m in np.meshgrid(*full.values(), indexing="ij")]
+    grid = frequency_grid(inp, n_freq=n_freq)
+
+    n = mesh[0].size
+    jobs = [(grid, *(m[i : i + chunk_points] for m in mesh)) for i in range(0, n, chunk_points)]
+    if workers > 0 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_worker, jobs))
+    else:
+        parts = [_worker(j) for j in jobs]
+    fc, pm, gm = (np.concatenate([p[i] for p in parts]).reshape(shape) for i in range(3))
+    return StabilityMap(axes=full, crossover_hz=fc, phase_margin_deg=pm, gain_margin_db=gm)
+
+
+def robust_choice(
+    smap: StabilityMap,
+    *,
+    design_axes: tuple[str, ...] = ("rcomp_ohm", "f_c_hz"),
+    min_crossover_hz: float = 0.0,
+) -> Optional[dict[str, float]]:
+    """Design-axis values whose worst-case PM over the remaining axes (Cout, ESR spread) is highest.
+
+    Points whose crossover drops below `min_crossover_hz` anywhere in the spread are excluded.
+    """
+
+    names = list(smap.axes)
+    spread = tuple(i for i, name in enumerate(names) if name not in design_axes)
+    pm = np.where(np.isnan(smap.phase_margin_deg), -np.inf, smap.phase_margin_deg)
+    fc_ok = np.all(np.nan_to_num(smap.crossover_hz, nan=0.0) >= min_crossover_hz, axis=spread, keepdims=True)
+    worst_pm = np.min(pm, axis=spread, keepdims=True)
+    worst_gm = np.min(smap.gain_margin_db, axis=spread, keepdims=True)
+    score = np.where(fc_ok, worst_pm, -np.inf)
+    if not np.isfinite(score).any():
+        return None
+    idx = np.unravel_index(int(np.argmax(score)), score.shape)
+    out = {name: float(smap.axes[name][idx[i]]) for i, name in enumerate(names) if name in design_axes}
+    out["worst_phase_margin_deg"] = float(worst_pm[idx])
+    out["worst_gain_margin_db"] = float(worst_gm[idx])
+    return out
+
+
+def save_map(smap: StabilityMap, path: Path) -> None:
+    """`.npz` with the axes and one array per metric (grid shaped), for notebooks and Streamlit."""
+
+    np.savez_compressed(
+        path,
+        **{f"axis_{k}": v for k, v in smap.axes.items()},
+        crossover_hz=smap.crossover_hz,
+        phase_margin_deg=smap.phase_margin_deg,
+        gain_margin_db=smap.gain_margin_db,
+    )
+
+
+def load_map(path: Path) -> StabilityMap:
+    with np.load(path) as data:
+        axes = {k[len("axis_"):]: data[k] for k in data.files if k.startswith("axis_")}
+        return StabilityMap(
+            axes={k: axes[k] for k in AXES if k in axes},
+            crossover_hz=data["crossover_hz"],
+            phase_margin_deg=data["phase_margin_deg"],
+            gain_margin_db=data["gain_margin_db"],
+        )
+
+
+def main() -> int:
+    from lm5148_tool.lm5148_sweep import parse_grid
+
+    parser = argparse.ArgumentParser(description="Phase/gain margin and crossover over RCOMP / f_c / Cout / ESR grids.")
+    parser.add_argument("--json", type=str, default="", help="lm5148_design.json with the power stage (default: DesignInputs())")
+    parser.add_argument(
+        "--grid",
+        action="append",
+        default=[],
+        help=f"Axis grid ({', '.join(AXES)}), e.g. rcomp_ohm=2e3:50e3:40:log or cout_f=22e-6,44e-6,66e-6",
+    )
+    parser.add_argument("--n-freq", type=int, default=N_FREQ_DEFAULT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (0 = in process)")
+    parser.add_argument("--min-crossover", type=float, default=0.0, help="Robust choice: minimum crossover [Hz]")
+    parser.add_argument("--out", type=str, default="", help="Output .npz map")
+    args = parser.parse_args()
+
+    inp = DesignInputs()
+    if args.json:
+        inp = design_inputs_from_webapp(json.loads(Path(args.json).read_text(encoding="utf-8")).get("inputs") or {})
+    axes = dict(parse_grid(g) for g in args.grid)
+
+    smap = stability_map(inp, {k: np.array(v) for k, v in axes.items()}, n_freq=args.n_freq, workers=args.workers)
+    pm = smap.phase_margin_deg
+    print(f"{pm.size:,} point(s), grid {smap.shape}")
+    print(f"Phase margin: min {np.nanmin(pm):.1f}°, max {np.nanmax(pm):.1f}°; "
+          f"{np.mean(pm >= 45.0):.0%} of points with PM >= 45°")
+    choice = robust_choice(smap, min_crossover_hz=args.min_crossover)
+    if choice:
+        print("Most robust choice (worst case over the Cout/ESR spread):")
+        for k, v in choice.items():
+            print(f"  {k:24s} {v:.4g}")
+    else:
+        print("No point meets the crossover requirement")
+    if args.out:
+        save_map(smap, Path(args.out))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import argparse
+import math
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from lm5148_tool.results_store import ResultsStore
+
+
+# Points a browser chart handles comfortably; everything else is aggregated server-side.
+SERIES_POINTS_DEFAULT = 2000
+DENSITY_BINS_DEFAULT = (160, 120)
+# A zoom level halves the visible span; windows snap to the tile grid of their level so
+# nearby pans and zooms reuse the same cached aggregate.
+MAX_ZOOM_LEVEL = 16
+
+
+def _to_axis(values: np.ndarray, log: bool) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    if not log:
+        return values
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(values > 0.0, np.log10(values), np.nan)
+
+
+def _from_axis(values: np.ndarray, log: bool) -> np.ndarray:
+    return 10.0**values if log else values
+
+
+def column_range(store: ResultsStore, name: str, *, log: bool = False) -> tuple[float, float]:
+    """Finite (positive, with `log`) min and max of a column, one chunk at a time."""
+
+    lo, hi = math.inf, -math.inf
+    for values in store.iter_column(name):
+        v = _to_axis(values, log)
+        v = v[np.isfinite(v)]
+        if v.size:
+            lo, hi = min(lo, float(v.min())), max(hi, float(v.max()))
+    if lo > hi:
+        raise ValueError(f"Column {name} has no finite{' positive' if log else ''} values")
+    return float(_from_axis(lo, log)), float(_from_axis(hi, log))
+
+
+def widen_range(lo: float, hi: float, *, log: bool = False) -> tuple[float, float]:
+    """A non-empty plotting range for a column that may be constant (most inputs are in a sweep).
+
+    A single value v becomes v ± |v|/2 (± 0.5 at zero), or half a decade each side on a log axis.
+    """
+
+    if hi > lo:
+        return lo, hi
+    if log:
+        return lo / 10**0.5, hi * 10**0.5
+    half = abs(lo) / 2 or 0.5
+    return lo - half, hi + half
+
+
+@dataclass(frozen=True)
+class ZoomWindow:
+    level: int
+    lo: float
+    hi: float
+
+
+def snap_window(lo: float, hi: float, full: tuple[float, float], *, log: bool = False) -> ZoomWindow:
+    """Smallest window on the tile grid of its zoom level that contains [lo, hi].
+
+    Level z splits the full range into 2**z tiles; the level is the deepest one whose two-tile
+    span still covers the request, so the snapped window is at most ~4x the requested span.
+    """
+
+    f_lo, f_hi = (float(v) for v in _to_axis(np.array(full), log))
+    a, b = (float(v) for v in _to_axis(np.array([lo, hi]), log))
+    span = f_hi - f_lo
+    a, b = max(min(a, b), f_lo), min(max(a, b), f_hi)
+    if not span > 0 or not b > a:
+        return ZoomWindow(0, full[0], full[1])
+    level = int(min(max(math.floor(math.log2(span / (b - a))), 0), MAX_ZOOM_LEVEL))
+    tile = span / 2**level
+    t0 = math.floor((a - f_lo) / tile)
+    t1 = min(max(math.ceil((b - f_lo) / tile), t0 + 1), 2**level)
+    return ZoomWindow(level, float(_from_axis(f_lo + t0 * tile, log)), float(_from_axis(f_lo + t1 * tile, log)))
+
+
+@dataclass(frozen=True)
+class Density:
+    counts: np.ndarray  # (x bins, y bins)
+    x_edges: np.ndarray  # data units (log-spaced with a log axis)
+    y_edges: np.ndarray
+    n_points: int  # finite points inside the window
+
+
+def density(
+    store: ResultsStore,
+    x: str,
+    y: str,
+    *,
+    x_range: tuple[float, float],
+    y_range: tuple[float, float],
+    bins: tuple[int, int] = DENSITY_BINS_DEFAULT,
+    log_x: bool = False,
+    log_y: bool = False,
+) -> Density:
+    """2-D histogram of (x, y) over the window, accumulated chunk by chunk."""
+
+    xe = np.linspace(*_to_axis(np.array(x_range), log_x), bins[0] + 1)
+    ye = np.linspace(*_to_axis(np.array(y_range), log_y), bins[1] + 1)
+    counts = np.zeros(bins, dtype=np.int64)
+    for idx in range(store.n_chunks):
+        chunk = store.chunk(idx)
+        xv, yv = _to_axis(chunk[x], log_x), _to_axis(chunk[y], log_y)
+        ok = np.isfinite(xv) & np.isfinite(yv)
+        h, _, _ = np.histogram2d(xv[ok], yv[ok], bins=(xe, ye))
+        counts += h.astype(np.int64)
+    return Density(counts, _from_axis(xe, log_x), _from_axis(ye, log_y), int(counts.sum()))
+
+
+def minmax_buckets(
+    store: ResultsStore,
+    x: str,
+    y: str,
+    *,
+    x_range: tuple[float, float],
+    n_buckets: int,
+    log_x: bool = False,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Per x bucket, the points with the smallest and largest y (the envelope of the cloud).
+
+    Buckets have fixed edges over the window, so per-chunk minima and maxima merge exactly.
+    Returns (x, y) sorted by x, at most 2 points per bucket.
+    """
+
+    a, b = _to_axis(np.array(x_range), log_x)
+    best = {
+        "min": (np.full(n_buckets, np.inf), np.full(n_buckets, np.nan)),
+        "max": (np.full(n_buckets, -np.inf), np.full(n_buckets, np.nan)),
+    }
+    for idx in range(store.n_chunks):
+        chunk = store.chunk(idx)
+        xv, yv = _to_axis(chunk[x], log_x), np.asarray(chunk[y], dtype=np.float64)
+        ok = np.isfinite(xv) & np.isfinite(yv) & (xv >= a) & (xv <= b)
+        if not ok.any():
+            continue
+        xv, yv = xv[ok], yv[ok]
+        scale = n_buckets / (b - a) if b > a else 0.0
+        bucket = np.minimum(((xv - a) * scale).astype(np.int64), n_buckets - 1)
+        # Sort by (bucket, y): the first and last entry of each bucket are its extremes.
+        order = np.lexsort((yv, bucket))
+        bs = bucket[order]
+        starts = np.flatnonzero(np.r_[True, bs[1:] != bs[:-1]])
+        ends = np.r_[starts[1:], len(bs)] - 1
+        for key, pick in (("min", order[starts]), ("max", order[ends])):
+            ybest, xbest = best[key]
+            b_idx = bucket[pick]
+            better = yv[pick] < ybest[b_idx] if key == "min" else yv[pick] > ybest[b_idx]
+            ybest[b_idx[better]] = yv[pick][better]
+            xbest[b_idx[better]] = xv[pick][better]
+    xs = np.concatenate([best["min"][1], best["max"][1]])
+    ys = np.concatenate([best["min"][0], best["max"][0]])
+    ok = np.isfinite(xs) & np.isfinite(ys)
+    xs, ys = xs[ok], ys[ok]
+    order = np.lexsort((ys, xs))
+    xs, ys = xs[order], ys[order]
+    # A bucket with one point contributes it as both its min and max.
+    keep = np.r_[True, (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1])]
+    return _from_axis(xs[keep], log_x), ys[keep]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of `n_out` points that keep the visual shape of (x, y)."""
+
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        # Twice the triangle area (prev, candidate, next-bucket centroid).
+        area = np.abs((x[prev] - cx) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (cy - y[prev]))
+        prev = lo + int(np.argmax(area))
+        out[i + 1] = prev
+    return out
+
+
+def series(
+    store: ResultsStore,
+    x: str,
+    y: str,
+    *,
+    x_range: tuple[float, float],
+    n_points: int = SERIES_POINTS_DEFAULT,
+    log_x: bool = False,
+) -> tuple[np.ndarray, np.ndarray]:
+    """y vs x over the window in at most `n_points` points: min/max envelope per bucket, then LTTB."""
+
+    xs, ys = minmax_buckets(store, x, y, x_range=x_range, n_buckets=max(n_points, 2), log_x=log_x)
+    keep = lttb(_to_axis(xs, log_x), ys, n_points)
+    return xs[keep], ys[keep]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Downsample a results store column pair for plotting (prints a summary).")
+    parser.add_argument("store", type=str)
+    parser.add_argument("--x", required=True)
+    parser.add_argument("--y", required=True)
+    parser.add_argument("--log-x", action="store_true")
+    parser.add_argument("--log-y", action="store_true")
+    parser.add_argument("--points", type=int, default=SERIES_POINTS_DEFAULT)
+    parser.add_argument("--csv", type=str, default="", help="Write the downsampled series to this CSV")
+    args = parser.parse_args()
+
+    store = ResultsStore.open(Path(args.store))
+    t0 = time.perf_counter()
+    xr = widen_range(*column_range(store, args.x, log=args.log_x), log=args.log_x)
+    yr = widen_range(*column_range(store, args.y, log=args.log_y), log=args.log_y)
+    t1 = time.perf_counter()
+    dens = density(store, args.x, args.y, x_range=xr, y_range=yr, log_x=args.log_x, log_y=args.log_y)
+    t2 = time.perf_counter()
+    xs, ys = series(store, args.x, args.y, x_range=xr, n_points=args.points, log_x=args.log_x)
+    t3 = time.perf_counter()
+    print(f"{len(store):,} rows; ranges {t1 - t0:.2f} s")
+    print(f"density {dens.counts.shape[0]}x{dens.counts.shape[1]} bins, {dens.n_points:,} points: {t2 - t1:.2f} s")
+    print(f"series {len(xs):,} points: {t3 - t2:.2f} s")
+    if args.csv:
+        np.savetxt(args.csv, np.column_stack([xs, ys]), delimiter=",", header=f"{args.x},{args.y}", comments="")
+        print(f"Wrote: {args.csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from lm5148_tool.export_bundle import EXPORTERS, IMAGES_DIR_DEFAULT, BundleJob, load_equation_images, make_job
+from lm5148_tool.lm5148_core import WEBAPP_INPUT_KEYS
+from lm5148_tool.populate_quickstart_calculator import QUICKSTART_INPUT_CELLS, TEMPLATE_DEFAULT, QuickstartPatcher
+
+
+QUICKSTART_ARTIFACT = "LM5148_quickstart_filled.xlsm"
+
+# Artifact -> payload input keys it depends on (None: every input).
+# - The JSON and results.xlsx list every input, webapp-only ones included.
+# - export_to_excel only sees DesignInputs; its equation images come from the PDF, not the inputs,
+#   so they are rendered once at start-up and never again.
+# - The Word export holds the symbolic equations only.
+# - The quickstart only receives VIN/VOUT/IOUT/FSW (Excel recomputes the rest).
+ARTIFACT_INPUTS: dict[str, Optional[frozenset[str]]] = {
+    "lm5148_design.json": None,
+    "lm5148_results.xlsx": None,
+    "lm5148_design_export.xlsx": frozenset(WEBAPP_INPUT_KEYS) | {"lockLUsedToLreq"},
+    "lm5148_equations_pages_36_39.docx": frozenset(),
+    # vinMin falls back to vinNom, which is in the list too.
+    QUICKSTART_ARTIFACT: frozenset(key for key, _ in QUICKSTART_INPUT_CELLS.values()),
+}
+
+POLL_INTERVAL_S_DEFAULT = 0.1
+
+
+def changed_inputs(old: Optional[dict[str, Any]], new: dict[str, Any]) -> Optional[set[str]]:
+    """Input keys whose value differs (None on the first run: everything is stale)."""
+
+    if old is None:
+        return None
+    return {k for k in old.keys() | new.keys() if old.get(k) != new.get(k)}
+
+
+def affected_artifacts(changed: Optional[set[str]]) -> list[str]:
+    if changed is None:
+        return list(ARTIFACT_INPUTS)
+    return [name for name, deps in ARTIFACT_INPUTS.items() if changed and (deps is None or changed & deps)]
+
+
+@dataclass
+class _PayloadState:
+    stamp: tuple[int, int] = (0, 0)  # (mtime_ns, size)
+    inputs: Optional[dict[str, Any]] = None
+    error: str = ""  # why the last export of this payload failed ("" = it did not)
+
+
+class ExportWatcher:
+    """Keeps the artifacts of one or more payload files up to date, regenerating only what a change touches.
+
+    The quickstart template is held in memory and filled by patching its input cells, equation
+    images are resolved once, and every exporter runs in-process, so an update stays well under
+    a second (process start-up alone would not).
+    """
+
+    def __init__(
+        self,
+        out_dir: Path,
+        *,
+        template: Optional[Path] = TEMPLATE_DEFAULT,
+        images_dir: Optional[Path] = IMAGES_DIR_DEFAULT,
+        pdf: Optional[Path] = None,
+    ) -> None:
+        self.out_dir = out_dir
+        self.template = template if template is not None and template.exists() else None
+        self.patcher = QuickstartPatcher(self.template) if self.template is not None else None
+        # Images do not depend on any input: resolve (or extract from the PDF) once.
+        self._images = load_equation_images(images_dir=images_dir, pdf=pdf)
+        self._state: dict[Path, _PayloadState] = {}
+
+    @property
+    def failed(self) -> bool:
+        return any(state.error for state in self._state.values())
+
+    def _out_dir_for(self, payload_path: Path, many: bool) -> Path:
+        return self.out_dir / payload_path.stem if many else self.out_dir
+
+    def update(self, payload_path: Path, *, many: bool = False) -> Optional[tuple[Optional[set[str]], list[str], float]]:
+        """Regenerate the artifacts affected since the last call. Returns (changed keys, artifacts, seconds) or None."""
+
+        state = self._state.setdefault(payload_path, _PayloadState())
+        try:
+            st = payload_path.stat()
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == state.stamp:
+            return None
+        t0 = time.perf_counter()
+        try:
+            payload = json.loads(payload_path.read_text(encoding="utf-8"))
+            inputs = dict(payload["inputs"])
+        except (OSError, ValueError, KeyError, TypeError):
+            # Editors can expose a half-written file; the next save triggers another try.
+            return None
+        state.stamp = stamp
+
+        changed = changed_inputs(state.inputs, inputs)
+        names = affected_artifacts(changed)
+        if self.patcher is None:
+            names = [n for n in names if n != QUICKSTART_ARTIFACT]
+        if names:
+            try:
+                job = make_job(payload, template=self.template)
+                job = BundleJob(inputs=job.inputs, payload=job.payload, template=job.template, equation_images=self._images)
+                out_dir = self._out_dir_for(payload_path, many)
+                out_dir.mkdir(parents=True, exist_ok=True)
+                for name in names:
+                    data = self.patcher.build(job.payload) if name == QUICKSTART_ARTIFACT else EXPORTERS[name](job)
+                    tmp = out_dir / (name + ".tmp")
+                    tmp.write_bytes(data)
+                    tmp.replace(out_dir / name)
+            except Exception as e:  # a bad value in the editor must not end the session
+                # Keep the previous inputs, so the next save diffs against the last good export and retries.
+                state.error = f"{type(e).__name__}: {e}"
+                print(f"[{time.strftime('%H:%M:%S')}] {payload_path.name}: export failed ({state.error})", file=sys.stderr, flush=True)
+                return None
+        state.error = ""
+        state.inputs = inputs
+        return changed, names, time.perf_counter() - t0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Watch payload JSON files and re-export only the artifacts a change affects.")
+    parser.add_argument("payloads", nargs="+", help="lm5148_design.json file(s) to watch")
+    parser.add_argument("--out-dir", type=str, default=str(Path.cwd() / "lm5148_exports"))
+    parser.add_argument("--template", type=str, default=str(TEMPLATE_DEFAULT), help="TI quickstart .xlsm ('none' skips it)")
+    parser.add_argument("--images-dir", type=str, default=str(IMAGES_DIR_DEFAULT))
+    parser.add_argument("--pdf", type=str, default="", help="Extract equation images from lm5148.pdf once at start-up")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL_S_DEFAULT, help="Polling interval [s]")
+    parser.add_argument("--once", action="store_true", help="Export once and exit (no watching)")
+    args = parser.parse_args()
+
+    watcher = ExportWatcher(
+        Path(args.out_dir),
+        template=None if args.template == "none" else Path(args.template),
+        images_dir=Path(args.images_dir),
+        pdf=Path(args.pdf) if args.pdf else None,
+    )
+    paths = [Path(p) for p in args.payloads]
+    many = len(paths) > 1
+    if not args.once:
+        print(f"Watching {', '.join(map(str, paths))} -> {args.out_dir} (Ctrl+C to stop)")
+    try:
+        while True:
+            for path in paths:
+                update = watcher.update(path, many=many)
+                if update is None:
+                    continue
+                changed, names, seconds = update
+                what = "initial export" if changed is None else (", ".join(sorted(changed)) or "no input change")
+                print(f"[{time.strftime('%H:%M:%S')}] {path.name}: {what} -> "
+                      f"{', '.join(names) or 'nothing to do'} ({seconds * 1e3:.0f} ms)", flush=True)
+            if args.once:
+                return 1 if watcher.failed else 0
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import math
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from lm5148_tool.lm5148_batch import run_design_columns
+from lm5148_tool.lm5148_core import DesignInputs, design_inputs_from_webapp, run_design
+
+
+@dataclass(frozen=True)
+class CornerSpec:
+    # Component tolerances as +/- fractions of the nominal value (0 disables the axis).
+    l_tol: float = 0.20
+    fsw_tol: float = 0.05
+    vcs_th_tol: float = 0.10
+    rout_esr_tol: float = 0.0
+    rin_esr_tol: float = 0.0
+    # Vcs_th(T) = vcs_th_v * (1 + vcs_th_tc_per_c * (T - 25 °C)), evaluated at each temperature.
+    vcs_th_tc_per_c: float = 0.0
+    temps_c: tuple[float, ...] = (-40.0, 25.0, 125.0)
+
+
+@dataclass(frozen=True)
+class CornerAxis:
+    name: str
+    labels: tuple[str, ...]
+    # {DesignInputs field: one value per level}; the VIN axis drives two fields together.
+    values: dict[str, tuple[float, ...]]
+    # Level used when a result does not depend on this axis.
+    nominal: int
+
+
+# Limiting direction per result: +1 = the largest value is worst, -1 = the smallest.
+# Setpoint outputs (RT, RFB top, CCOMP, CHF) have no "worst" side and are not reported.
+WORST_DIRECTION: dict[str, int] = {
+    "l_required_h": +1,
+    "delta_il_vin_max_a": +1,
+    "il_peak_vin_max_a": +1,
+    "rsense_ohm": -1,
+    "il_peak_short_a": +1,
+    "cout_load_off_f": +1,
+    "vout_ripple_pp_v": +1,
+    "ioutcap_rms_a": +1,
+    "duty_nom": +1,
+    "cin_rms_a": +1,
+    "cin_required_f": +1,
+}
+
+# Sign of d(result)/d(axis value) for the corner equations (0 = independent).
+# Axes missing from a result's entry are treated as non-monotonic and enumerated in full.
+# VIN moves vin_nom_v and vin_max_v together. L (L_used, with L_required resolved at the nominal
+# corner) and Rsense are frozen at the nominal design, as real parts would be.
+MONOTONICITY: dict[str, dict[str, int]] = {
+    # Eq.31: Vout*(Vin-Vout)/(Vin*Fsw*dIL) grows with Vin, falls with Fsw.
+    "l_required_h": {"vin": +1, "l": 0, "fsw": -1, "vcs_th": 0, "rout_esr": 0, "rin_esr": 0},
+    # Eq.32
+    "delta_il_vin_max_a": {"vin": +1, "l": -1, "fsw": -1, "vcs_th": 0, "rout_esr": 0, "rin_esr": 0},
+    "il_peak_vin_max_a": {"vin": +1, "l": -1, "fsw": -1, "vcs_th": 0, "rout_esr": 0, "rin_esr": 0},
+    # Eq.34: Vcs_th / (margin * IL_pk)
+    "rsense_ohm": {"vin": -1, "l": +1, "fsw": +1, "vcs_th": +1, "rout_esr": 0, "rin_esr": 0},
+    # Eq.35 with the nominal Rsense: Vcs_th(T)/Rsense_nom + Vin*t_delay/L.
+    "il_peak_short_a": {"vin": +1, "l": -1, "fsw": 0, "vcs_th": +1, "rout_esr": 0, "rin_esr": 0},
+    # Eq.36
+    "cout_load_off_f": {"vin": 0, "l": +1, "fsw": 0, "vcs_th": 0, "rout_esr": 0, "rin_esr": 0},
+    # Eq.37 with Cout_eff = Eq.36 (grows with L)
+    "vout_ripple_pp_v": {"vin": 0, "l": -1, "fsw": -1, "vcs_th": 0, "rout_esr": +1, "rin_esr": 0},
+    "ioutcap_rms_a": {"vin": 0, "l": 0, "fsw": 0, "vcs_th": 0, "rout_esr": 0, "rin_esr": 0},
+    "duty_nom": {"vin": -1, "l": 0, "fsw": 0, "vcs_th": 0, "rout_esr": 0, "rin_esr": 0},
+    # Eq.39/40 at the corner duty D = Vout/Vin: D*(1-D) peaks at D = 0.5, so VIN is enumerated.
+    "cin_rms_a": {"l": 0, "fsw": 0, "vcs_th": 0, "rout_esr": 0, "rin_esr": 0},
+    "cin_required_f": {"l": 0, "fsw": -1, "vcs_th": 0, "rout_esr": 0, "rin_esr": +1},
+}
+
+
+@dataclass(frozen=True)
+class WorstCaseRow:
+    result: str
+    nominal: float
+    worst: float
+    corner: dict[str, str]
+    corners_considered: int
+
+
+@dataclass(frozen=True)
+class WorstCaseReport:
+    rows: list[WorstCaseRow]
+    corners_total: int
+    corners_evaluated: int
+
+
+def _tol_levels(nominal: float, tol: float) -> tuple[tuple[str, ...], tuple[float, ...]]:
+    if tol <= 0:
+        return ("nom",), (nominal,)
+    return (f"-{tol:.0%}", "nom", f"+{tol:.0%}"), (nominal * (1 - tol), nominal, nominal * (1 + tol))
+
+
+def build_axes(inp: DesignInputs, spec: CornerSpec) -> list[CornerAxis]:
+    vins = (inp.vin_min_or_nom_v, inp.vin_nom_v, inp.vin_max_v)
+    if not vins[0] <= vins[1] <= vins[2]:
+        raise ValueError(f"Need VIN min <= VIN nom <= VIN max, got {vins[0]:g} / {vins[1]:g} / {vins[2]:g} V")
+    # Freeze L_used at the nominal design so L tolerance applies to a real part value.
+    l_nom = inp.l_used_h if inp.l_used_h is not None else run_design(inp).l_required_h
+
+    axes = [CornerAxis("vin", ("min", "nom", "max"), {"vin_nom_v": vins, "vin_max_v": vins}, nominal=1)]
+
+    for name, field, nominal, tol in (
+        ("l", "l_used_h", l_nom, spec.l_tol),
+        ("fsw", "fsw_hz", inp.fsw_hz, spec.fsw_tol),
+        ("rout_esr", "rout_esr_ohm", inp.rout_esr_ohm, spec.rout_esr_tol),
+        ("rin_esr", "rin_esr_ohm", inp.rin_esr_ohm, spec.rin_esr_tol),
+    ):
+        labels, values = _tol_levels(nominal, tol)
+        axes.append(CornerAxis(name, labels, {field: values}, nominal=len(values) // 2))
+
+    vcs_labels: list[str] = []
+    vcs_values: list[float] = []
+    vcs_temps: list[float] = []
+    tol_labels, tol_factors = _tol_levels(1.0, spec.vcs_th_tol)
+    for t in spec.temps_c:
+        drift = 1.0 + spec.vcs_th_tc_per_c * (t - 25.0)
+        for label, factor in zip(tol_labels, tol_factors):
+            vcs_labels.append(f"{t:g}C/{label}")
+            vcs_values.append(inp.vcs_th_v * drift * factor)
+            vcs_temps.append(t)
+    # Nominal = the level closest to the datasheet Vcs_th, preferring the temperature nearest 25 °C.
+    nominal_vcs = min(
+        range(len(vcs_values)), key=lambda i: (abs(vcs_values[i] - inp.vcs_th_v), abs(vcs_temps[i] - 25.0))
+    )
+    axes.append(CornerAxis("vcs_th", tuple(vcs_labels), {"vcs_th_v": tuple(vcs_values)}, nominal=nominal_vcs))
+    return axes
+
+
+def _axis_value(axis: CornerAxis, level: int) -> float:
+    return next(iter(axis.values.values()))[level]
+
+
+def _candidate_levels(axis: CornerAxis, sign: Optional[int], direction: int) -> list[int]:
+    n = len(axis.labels)
+    if n == 1 or sign == 0:
+        return [axis.nominal]
+    if sign is None:
+        return list(range(n))
+    # Monotonic: only the extreme level in the worsening direction can be worst.
+    key = lambda i: direction * sign * _axis_value(axis, i)  # noqa: E731
+    return [max(range(n), key=key)]
+
+
+def _corner_results(cols: dict[str, object], rsense_nom: float) -> dict[str, np.ndarray]:
+    """`run_design_columns` plus the corner forms of Eq.35 (nominal Rsense) and Eq.39/40 (corner duty)."""
+
+    res = dict(run_design_columns(cols))
+    v = {k: np.asarray(a, dtype=np.float64) for k, a in cols.items()}
+    # Eq.34 still reports the Rsense each corner would need; the fitted part is the nominal one.
+    res["il_peak_short_a"] = v["vcs_th_v"] / rsense_nom + v["vin_max_v"] * v["t_delay_isns_s"] / v["l_used_h"]
+
+    duty = np.asarray(res["duty_nom"])
+    iout = v["iout_a"]
+    cin_rms = iout * np.sqrt(duty * (1.0 - duty))
+    dv_in = v["vin_ripple_pp_v"]
+    dv_esr = cin_rms * v["rin_esr_ohm"]
+    dv_cap_allow = np.sqrt(np.maximum(dv_in**2 - dv_esr**2, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        res["cin_rms_a"] = cin_rms
+        res["cin_required_f"] = np.where(
+            (dv_esr >= dv_in) | (dv_cap_allow <= 0.0), np.inf, iout * duty * (1.0 - duty) / (v["fsw_hz"] * dv_cap_allow)
+        )
+    return res
+
+
+def worst_case(inp: DesignInputs, spec: CornerSpec = CornerSpec(), *, exhaustive: bool = False) -> WorstCaseReport:
+    """Worst value of each limit-type result over VIN x tolerance x temperature corners.
+
+    Unless `exhaustive` is set, corners are pruned with MONOTONICITY: for each result only the
+    extreme level of each monotonic axis is kept. The union of surviving corners (and the nominal
+    one) is evaluated in one vectorized batch.
+    """
+
+    axes = build_axes(inp, spec)
+    corners_total = int(np.prod([len(a.labels) for a in axes]))
+
+    needed: dict[str, list[tuple[int, ...]]] = {}
+    for result, direction in WORST_DIRECTION.items():
+        signs = MONOTONICITY.get(result, {})
+        if exhaustive:
+            per_axis = [list(range(len(a.labels))) for a in axes]
+        else:
+            per_axis = [_candidate_levels(a, signs.get(a.name), direction) for a in axes]
+        needed[result] = list(itertools.product(*per_axis))
+
+    nominal_corner = tuple(a.nominal for a in axes)
+    corners = sorted({nominal_corner, *(c for cs in needed.values() for c in cs)})
+    index = {c: i for i, c in enumerate(corners)}
+
+    base = {k: v for k, v in vars(inp).items() if k != "pdf_path" and v is not None}
+    cols: dict[str, object] = {k: np.full(len(corners), v, dtype=np.float64) for k, v in base.items()}
+    levels = np.array(corners, dtype=np.int64).reshape(len(corners), len(axes))
+    for j, axis in enumerate(axes):
+        for field, values in axis.values.items():
+            cols[field] = np.asarray(values, dtype=np.float64)[levels[:, j]]
+    nominal_res = run_design(replace(inp, l_used_h=_axis_value(axes[1], axes[1].nominal)))
+    res = _corner_results(cols, nominal_res.rsense_ohm)
+
+    rows = []
+    for result, direction in WORST_DIRECTION.items():
+        idx = np.array([index[c] for c in needed[result]])
+        vals = np.asarray(res[result])[idx]
+        k = int(np.argmax(direction * np.where(np.isnan(vals), -np.inf * direction, vals)))
+        corner = corners[idx[k]]
+        rows.append(
+            WorstCaseRow(
+                result=result,
+                nominal=float(np.asarray(res[result])[index[nominal_corner]]),
+                worst=float(vals[k]),
+                corner={a.name: a.labels[lvl] for a, lvl in zip(axes, corner)},
+                corners_considered=len(idx),
+            )
+        )
+    return WorstCaseReport(rows=rows, corners_total=corners_total, corners_evaluated=len(corners))
+
+
+def _finite_or_none(v: float) -> Optional[float]:
+    return v if math.isfinite(v) else None
+
+
+def format_report(report: WorstCaseReport) -> str:
+    lines = [
+        f"Evaluated {report.corners_evaluated} of {report.corners_total} corners",
+        f"{'result':20s} {'nominal':>12s} {'worst':>12s}  limiting corner",
+    ]
+    for r in report.rows:
+        corner = ", ".join(f"{k}={v}" for k, v in r.corner.items())
+        lines.append(f"{r.result:20s} {r.nominal:12.4g} {r.worst:12.4g}  {corner}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Worst-case corner analysis (VIN min/nom/max, component tolerances, Vcs_th over temperature)."
+    )
+    parser.add_argument("--json", type=str, required=True, help="lm5148_design.json (webapp/Streamlit export)")
+    parser.add_argument("--l-tol", type=float, default=CornerSpec.l_tol)
+    parser.add_argument("--fsw-tol", type=float, default=CornerSpec.fsw_tol)
+    parser.add_argument("--vcs-th-tol", type=float, default=CornerSpec.vcs_th_tol)
+    parser.add_argument("--vcs-th-tc", type=float, default=CornerSpec.vcs_th_tc_per_c, help="Fractional Vcs_th drift per °C")
+    parser.add_argument("--rout-esr-tol", type=float, default=CornerSpec.rout_esr_tol)
+    parser.add_argument("--rin-esr-tol", type=float, default=CornerSpec.rin_esr_tol)
+    parser.add_argument("--temps", type=str, default="-40,25,125", help="Comma-separated temperatures in °C")
+    parser.add_argument("--exhaustive", action="store_true", help="Evaluate every corner (no monotonic pruning)")
+    parser.add_argument("--out", type=str, default="", help="Optional JSON report path")
+    args = parser.parse_args()
+
+    payload = json.loads(Path(args.json).read_text(encoding="utf-8"))
+    inp = design_inputs_from_webapp(payload.get("inputs") or {})
+    spec = CornerSpec(
+        l_tol=args.l_tol,
+        fsw_tol=args.fsw_tol,
+        vcs_th_tol=args.vcs_th_tol,
+        rout_esr_tol=args.rout_esr_tol,
+        rin_esr_tol=args.rin_esr_tol,
+        vcs_th_tc_per_c=args.vcs_th_tc,
+        temps_c=tuple(float(t) for t in args.temps.split(",") if t.strip()),
+    )
+
+    try:
+        report = worst_case(inp, spec, exhaustive=args.exhaustive)
+    except ValueError as e:
+        print(f"Invalid design: {e}")
+        return 2
+    print(format_report(report))
+    if args.out:
+        data = {
+            "cornersTotal": report.corners_total,
+            "cornersEvaluated": report.corners_evaluated,
+            # Non-finite values (e.g. Eq.40 when ESR ripple alone exceeds the spec) are written as null.
+            "results": [
+                {**vars(r), "nominal": _finite_or_none(r.nominal), "worst": _finite_or_none(r.worst)}
+                for r in report.rows
+            ],
+        }
+        Path(args.out).write_text(json.dumps(data, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())